@@ -0,0 +1,161 @@
+"""gzip / brotli response compression as a pure ASGI middleware.
+
+Only complete (non-streaming) HTTP responses are compressed, and only when
+the body is at least ``minimum_size`` bytes, has a compressible content type
+and no Content-Encoding yet. The encoding is negotiated from Accept-Encoding
+(q-values honoured; brotli preferred when the ``brotli`` package is present).
+Bodies of ``offload_size`` bytes or more are compressed in a worker thread so
+a large admin export does not stall the event loop. Paths under
+``exclude_prefixes`` (the Socket.IO mounts) are passed through untouched.
+"""
+from typing import Dict, Iterable, List, Tuple
+import asyncio
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """{"gzip": 1.0, "br": 0.5, ...}; tokens lowercased, missing q means 1."""
+    out: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        out[token] = q
+    return out
+
+
+def choose_encoding(header: str, brotli_available: bool = brotli is not None) -> str | None:
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps output deterministic for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        offload_size: int = 256 * 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_prefixes: Iterable[str] = ("/socket.io",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "HEAD" or scope.get("path", "").startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether compressing pays off
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                # Streaming or not worth it: release everything unchanged
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            if len(body) >= self.offload_size:
+                compressed = await asyncio.to_thread(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            if len(compressed) >= len(body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            start_message["headers"] = self._compressed_headers(start_message["headers"], encoding, len(compressed))
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start_message["status"] in (204, 206, 304):
+            return False
+        content_type = b""
+        for name, value in start_message["headers"]:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").lower().startswith(_COMPRESSIBLE)
+
+    @staticmethod
+    def _compressed_headers(headers: List[Tuple[bytes, bytes]], encoding: str, length: int) -> List[Tuple[bytes, bytes]]:
+        out = []
+        vary = None
+        for name, value in headers:
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # A strong validator names exact bytes; the encoded body is a different representation
+                value = b"W/" + value
+            if name == b"vary":
+                vary = value
+                continue
+            out.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary = vary + b", Accept-Encoding"
+        out += [(b"content-encoding", encoding.encode()), (b"content-length", str(length).encode()), (b"vary", vary)]
+        return out
@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
@@ -11,6 +12,14 @@ class Settings(BaseSettings):
     
     ENV: str = "development"
     API_PREFIX: str = "/api"
+    # Attach per-stage timings to bot_message and Server-Timing to HTTP responses
+    DEBUG_TIMINGS: bool = False
+    # Structured logging (app/core/logs.py); LOG_SAMPLE_RATES maps event -> keep fraction,
+    # e.g. LOG_SAMPLE_RATES='{"socket.chat_message": 0.01}'
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
 
     JWT_SECRET: str = "change_me_dev_secret"
     JWT_ALGORITHM: str = "HS256"
@@ -34,6 +43,104 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str | None = None
     GOOGLE_API_KEY: str | None = None
 
+    # Answer cache (see services/answer_cache.py)
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+    ANSWER_CACHE_MAX_ENTRIES: int = 2048
+    ANSWER_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    ANSWER_CACHE_POLICY: str = "lru"  # lru or lfu
+    ANSWER_CACHE_SIMILARITY: float = 0.88
+
+    # Single-flight de-duplication of concurrent LLM generations
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: int = 30
+    SINGLEFLIGHT_WAIT_SECONDS: float = 25.0
+    SINGLEFLIGHT_POLL_SECONDS: float = 0.2
+
+    # Write-behind FAQ creation from LLM answers
+    FAQ_WRITER_BATCH_SIZE: int = 50
+    FAQ_WRITER_FLUSH_SECONDS: float = 2.0
+    FAQ_WRITER_MAX_QUEUE: int = 5000
+    FAQ_DEDUPE_SIMILARITY: float = 0.9
+    # Resolved tickets per LLM prompt when mining FAQs (services/faq_mining.py)
+    FAQ_MINING_BATCH_SIZE: int = 20
+
+    # Background jobs (services/jobs.py): idle poll interval of the per-worker runner; a running
+    # job without progress for JOB_STALE_SECONDS is taken over and resumed from its checkpoint
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_STALE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Write-behind batching of case_memory messages
+    CHAT_WRITER_BATCH_SIZE: int = 200
+    CHAT_WRITER_FLUSH_SECONDS: float = 0.5
+    CHAT_WRITER_MAX_QUEUE: int = 20000
+    # block, drop_newest or drop_oldest; "block" waits in an executor thread when called from the event loop
+    CHAT_WRITER_OVERFLOW: str = "drop_oldest"
+    CHAT_WRITER_BLOCK_SECONDS: float = 0.05
+    # A failed insert_many is retried this many times, waiting RETRY_SECONDS, then twice that, ...
+    CHAT_WRITER_RETRIES: int = 3
+    CHAT_WRITER_RETRY_SECONDS: float = 0.2
+    # case_memory tiering (services/case_archive.py, run by tools/archive_case_memory.py):
+    # sessions idle for CASE_MEMORY_HOT_DAYS move to one case_memory_archive document each;
+    # with CASE_ARCHIVE_DIR set, archived sessions older than CASE_ARCHIVE_EXPORT_DAYS are
+    # written to gzip JSONL segments there (must be shared by every worker that reads history)
+    CASE_MEMORY_HOT_DAYS: int = 30
+    CASE_ARCHIVE_DIR: str = ""
+    CASE_ARCHIVE_EXPORT_DAYS: int = 180
+
+    # Per-worker memory of sessions known to have an open ticket
+    OPEN_TICKET_CACHE_SECONDS: float = 120.0
+    OPEN_TICKET_CACHE_SIZE: int = 50000
+    # Monthly tickets partitions (db/partitions.py): created this many months ahead at startup,
+    # and `tools.ticket_partitions maintain` detaches months older than the retention (0 keeps all)
+    TICKETS_PARTITION_MONTHS_AHEAD: int = 3
+    TICKETS_RETENTION_MONTHS: int = 0
+    # Detached partitions are moved to this schema; empty drops them instead
+    TICKETS_ARCHIVE_SCHEMA: str = "archive"
+
+    # Local intent classifier (train with: python -m tools.train_intent_model)
+    INTENT_MODEL_PATH: str | None = "intent_model.npz"
+    INTENT_MODEL_MIN_CONFIDENCE: float = 0.7
+    # Resolving closes the ticket, so the model alone needs much more confidence for it
+    INTENT_MODEL_RESOLVE_MIN_CONFIDENCE: float = 0.95
+
+    # Admission control for chat_message (services/admission.py)
+    ADMISSION_MAX_INFLIGHT: int = 64
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    SESSION_MAX_PENDING: int = 5
+    SESSION_RATE_LIMIT: int = 30
+    SESSION_RATE_WINDOW_SECONDS: int = 60
+
+    # Socket.IO heartbeat (python-socketio takes seconds) and connection lifecycle (services/connections.py)
+    SOCKETIO_PING_INTERVAL_SECONDS: int = 25
+    SOCKETIO_PING_TIMEOUT_SECONDS: int = 20
+    # Dead peers are dropped by the heartbeat above. A non-zero idle timeout also disconnects
+    # live but silent clients (the frontend reconnects after such a server disconnect); 0 = off.
+    SOCKET_IDLE_TIMEOUT_SECONDS: int = 0
+    SOCKET_REAP_INTERVAL_SECONDS: int = 60
+    # Per-address connection cap; 0 disables it. Behind a proxy (e.g. Render) every client has the
+    # proxy's address, so only enable it together with SOCKET_TRUST_FORWARDED_FOR, and only when
+    # that proxy sets X-Forwarded-For itself (otherwise clients can spoof it).
+    SOCKET_MAX_PER_IP: int = 0
+    # Count connections per X-Forwarded-For client instead of the peer address
+    SOCKET_TRUST_FORWARDED_FOR: bool = False
+    # Second Socket.IO endpoint speaking msgpack (needs the msgpack package); empty disables it.
+    # Clients opt in with socket.io-msgpack-parser and path "/<SOCKETIO_MSGPACK_PATH>".
+    SOCKETIO_MSGPACK_PATH: str = "socket.io-msgpack"
+
+    # HTTP response compression (core/compression.py); brotli is used when the package is installed.
+    # Bodies of at least COMPRESSION_OFFLOAD_BYTES are compressed in a worker thread.
+    COMPRESSION_MIN_BYTES: int = 1024  # 0 disables compression
+    COMPRESSION_OFFLOAD_BYTES: int = 262144
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Minimum spacing between FAQ snapshot reloads triggered by notifications
+    FAQ_CATALOG_MIN_RELOAD_SECONDS: float = 1.0
+    # Browser/proxy freshness for GET /faq; after it expires clients revalidate with If-None-Match.
+    # 0 keeps admin edits visible immediately at the cost of a (cheap) 304 round trip.
+    FAQ_CACHE_MAX_AGE_SECONDS: int = 0
+
 
 settings = Settings()
 
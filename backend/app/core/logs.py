@@ -0,0 +1,105 @@
+from typing import Any, Dict
+from datetime import datetime, timezone
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+from .config import settings
+
+
+# Attributes every LogRecord has; anything else came from ``extra`` and is emitted as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "event", "exc_text"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, msg plus extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full the record is dropped and counted."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() folds the traceback into msg; keep it separate for the
+        # JSON "exc" field but render it now so frames are not kept alive in the queue
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """Route the ``csupport`` logger tree through a bounded queue to a background writer."""
+    global _listener
+    if _listener is not None:
+        return
+    sink = logging.StreamHandler(sys.stdout)
+    sink.setFormatter(JsonFormatter() if settings.LOG_JSON else logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    root = logging.getLogger("csupport")
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.handlers = [_DroppingQueueHandler(log_queue)]
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=False)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records; the listener thread exits once the queue is drained."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"csupport.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, msg: str = "", **fields: Any) -> None:
+    """Log a structured event, subject to level gating and LOG_SAMPLE_RATES.
+
+    The level check comes first so disabled events cost one method call; pass
+    cheap values (ids, counts) and keep formatting out of the call site.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = settings.LOG_SAMPLE_RATES.get(event)
+    if rate is not None and random.random() >= rate:
+        return
+    exc_info = fields.pop("exc_info", None)
+    logger.log(level, msg or event, extra={"event": event, **fields}, exc_info=exc_info)
@@ -0,0 +1,21 @@
+"""Response classes.
+
+``FastJSONResponse`` is ORJSONResponse when orjson is installed, otherwise
+Starlette's JSONResponse. It is the app's default response class, which
+speeds up the final encode; handlers whose payload is already plain
+dicts/lists/str/datetime can return ``fast_json(payload)`` to also skip
+FastAPI's jsonable_encoder pass, which dominates for large nested payloads.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse imports it lazily)
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
+
+
+def fast_json(content: Any, status_code: int = 200) -> JSONResponse:
+    return FastJSONResponse(content, status_code=status_code)
@@ -0,0 +1,187 @@
+"""Per-stage latency tracing.
+
+``stage("name")`` times a block (or, as ``traced("name")``, a function) and
+feeds three sinks, each optional:
+
+* the current request's ``Trace`` (a context variable), used for the debug
+  ``timings`` field on bot messages and the HTTP ``Server-Timing`` header;
+* a Prometheus histogram, when ``prometheus_client`` is installed;
+* an OpenTelemetry span, when ``opentelemetry-api`` is installed and a
+  tracer provider is configured (otherwise its API is already a no-op).
+"""
+from typing import Any, Callable, Dict, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import inspect
+import time
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+except ImportError:
+    Counter = Gauge = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; charset=utf-8"
+    generate_latest = None
+
+try:
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer("csupport")
+except ImportError:
+    _tracer = None
+
+
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if Histogram is not None:
+    STAGE_SECONDS = Histogram("chat_stage_seconds", "Time spent in one stage of a request", ["stage"], buckets=_BUCKETS)
+    MESSAGE_SECONDS = Histogram("chat_message_seconds", "End-to-end chat message handling time", ["source"], buckets=_BUCKETS)
+    HTTP_SECONDS = Histogram("http_request_seconds", "HTTP request handling time", ["method", "route", "status"], buckets=_BUCKETS)
+    ADMISSION_WAIT_SECONDS = Histogram("chat_admission_wait_seconds", "Time a chat message waited for admission", ["queue"], buckets=_BUCKETS)
+    ADMISSION_REJECTED = Counter("chat_admission_rejected_total", "Chat messages rejected by admission control", ["reason"])
+    ADMISSION_INFLIGHT = Gauge("chat_admission_inflight", "Chat messages being handled")
+    SOCKET_CONNECTIONS = Gauge("socketio_connections", "Live Socket.IO connections")
+    SOCKET_MEMORY_PER_CONNECTION = Gauge("socketio_memory_per_connection_bytes", "Resident memory growth since start divided by live connections")
+    SOCKET_CLOSED = Counter("socketio_connections_closed_total", "Socket.IO connections closed or refused", ["reason"])
+else:
+    STAGE_SECONDS = MESSAGE_SECONDS = HTTP_SECONDS = None
+    ADMISSION_WAIT_SECONDS = ADMISSION_REJECTED = ADMISSION_INFLIGHT = None
+    SOCKET_CONNECTIONS = SOCKET_MEMORY_PER_CONNECTION = SOCKET_CLOSED = None
+
+
+class Trace:
+    """Timings and attributes collected while handling one request."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.attrs: Dict[str, Any] = {}
+
+    def add(self, stage_name: str, seconds: float) -> None:
+        self.timings[stage_name] = self.timings.get(stage_name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def timings_ms(self) -> Dict[str, float]:
+        out = {k: round(v * 1000, 3) for k, v in self.timings.items()}
+        out["total"] = round(self.elapsed() * 1000, 3)
+        return out
+
+    def server_timing(self) -> str:
+        parts = [f"{_token(k)};dur={v * 1000:.3f}" for k, v in self.timings.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+def tag(key: str, value: Any) -> None:
+    """Attach an attribute (e.g. answer source) to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.attrs[key] = value
+
+
+@contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    trace = Trace(name)
+    token = _current.set(trace)
+    span_cm = _tracer.start_as_current_span(name) if _tracer else None
+    if span_cm:
+        span_cm.__enter__()
+    try:
+        yield trace
+    finally:
+        if span_cm:
+            span_cm.__exit__(None, None, None)
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    span_cm = _tracer.start_as_current_span(name) if _tracer else None
+    if span_cm:
+        span_cm.__enter__()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if span_cm:
+            span_cm.__exit__(None, None, None)
+        if STAGE_SECONDS is not None:
+            STAGE_SECONDS.labels(name).observe(elapsed)
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, elapsed)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of ``stage`` for sync and async functions."""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def observe_message(source: str, seconds: float) -> None:
+    if MESSAGE_SECONDS is not None:
+        MESSAGE_SECONDS.labels(source).observe(seconds)
+
+
+def observe_http(method: str, route: str, status: int, seconds: float) -> None:
+    if HTTP_SECONDS is not None:
+        HTTP_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_admission_wait(queue: str, seconds: float) -> None:
+    if ADMISSION_WAIT_SECONDS is not None:
+        ADMISSION_WAIT_SECONDS.labels(queue).observe(seconds)
+
+
+def count_admission_rejected(reason: str) -> None:
+    if ADMISSION_REJECTED is not None:
+        ADMISSION_REJECTED.labels(reason).inc()
+
+
+def set_admission_inflight(count: int) -> None:
+    if ADMISSION_INFLIGHT is not None:
+        ADMISSION_INFLIGHT.set(count)
+
+
+def set_socket_connections(count: int, memory_per_connection: float | None = None) -> None:
+    if SOCKET_CONNECTIONS is not None:
+        SOCKET_CONNECTIONS.set(count)
+        if memory_per_connection is not None:
+            SOCKET_MEMORY_PER_CONNECTION.set(memory_per_connection)
+
+
+def count_socket_closed(reason: str) -> None:
+    if SOCKET_CLOSED is not None:
+        SOCKET_CLOSED.labels(reason).inc()
+
+
+def render_metrics() -> bytes | None:
+    """Prometheus exposition text, or None when prometheus_client is missing."""
+    return generate_latest() if generate_latest else None
+
+
+def _token(name: str) -> str:
+    # Server-Timing metric names are HTTP tokens
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
@@ -18,3 +18,15 @@ def get_case_memory_collection():
     return db["case_memory"]
 
 
+def get_case_archive_collection():
+    """Cold sessions compacted out of case_memory (services/case_archive.py)"""
+    client = get_mongo_client()
+    db = client[settings.MONGO_DB]
+    return db["case_memory_archive"]
+
+
+def get_sessions_collection():
+    """One summary document per chat session (services/sessions.py)"""
+    client = get_mongo_client()
+    db = client[settings.MONGO_DB]
+    return db["sessions"]
@@ -0,0 +1,126 @@
+"""Monthly range partitioning of ``tickets`` on ``created_at``.
+
+New databases get a partitioned ``tickets`` from init_schema; an existing
+unpartitioned table is converted with ``python -m tools.ticket_partitions migrate``.
+Partitions are named ``tickets_pYYYY_MM`` and cover [month start, next month
+start). ``tickets_default`` catches rows outside every partition; creating a
+partition moves matching rows out of it first, so it can be added late.
+Old months leave with a metadata-only DETACH instead of a long DELETE.
+"""
+from typing import List, Tuple
+from datetime import date
+import re
+
+
+DEFAULT_PARTITION = "tickets_default"
+_PARTITION_RE = re.compile(r"^tickets_p(\d{4})_(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    year, month = divmod(d.year * 12 + d.month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"tickets_p{month:%Y_%m}"
+
+
+def tickets_partitioned(cur) -> bool | None:
+    """True if tickets is partitioned, False for a plain table, None if it does not exist."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('tickets')")
+    row = cur.fetchone()
+    return None if row is None else row[0] == "p"
+
+
+def create_partitioned_tickets(cur) -> None:
+    # Primary and unique keys of a partitioned table must include the partition key
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS tickets (
+            id SERIAL,
+            user_email VARCHAR(255) NOT NULL,
+            customer_name VARCHAR(255),
+            subject TEXT NOT NULL,
+            category VARCHAR(100),
+            description TEXT NOT NULL,
+            status VARCHAR(50) DEFAULT 'open',
+            priority VARCHAR(50) DEFAULT 'medium',
+            session_id VARCHAR(64),
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW(),
+            resolution_summary JSONB,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF tickets DEFAULT;
+        CREATE INDEX IF NOT EXISTS tickets_session_id_idx ON tickets (session_id);
+        CREATE INDEX IF NOT EXISTS tickets_created_at_idx ON tickets (created_at);
+        """
+    )
+
+
+def ticket_partitions(cur) -> List[Tuple[str, date | None]]:
+    """(name, month) of every attached partition, oldest first; month is None for the default."""
+    cur.execute(
+        """
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('tickets')
+        """
+    )
+    out = []
+    for (name,) in cur.fetchall():
+        m = _PARTITION_RE.match(name)
+        out.append((name, date(int(m.group(1)), int(m.group(2)), 1) if m else None))
+    return sorted(out, key=lambda p: (p[1] is not None, p[1] or date.min))
+
+
+def ensure_ticket_partitions(cur, first: date, last: date) -> List[str]:
+    """Create the monthly partitions covering first..last; returns the names created."""
+    existing = {name for name, _ in ticket_partitions(cur)}
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            lo, hi = month.isoformat(), add_months(month, 1).isoformat()
+            # One atomic statement; the lock serializes workers running init_schema together
+            cur.execute(
+                f"""
+                DO $$
+                BEGIN
+                    PERFORM pg_advisory_xact_lock(hashtext('tickets_partitions'));
+                    IF to_regclass('{name}') IS NULL THEN
+                        CREATE TABLE {name} (LIKE tickets INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+                        WITH moved AS (
+                            DELETE FROM {DEFAULT_PARTITION}
+                            WHERE created_at >= '{lo}' AND created_at < '{hi}'
+                            RETURNING *
+                        )
+                        INSERT INTO {name} SELECT * FROM moved;
+                        ALTER TABLE tickets ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}');
+                    END IF;
+                END $$
+                """
+            )
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def detach_ticket_partitions(cur, before: date, archive_schema: str | None) -> List[str]:
+    """Detach monthly partitions older than ``before``.
+
+    With ``archive_schema`` the detached tables are moved there (dump or drop
+    them later); without it they are dropped. Either way the parent loses the
+    rows instantly, without a DELETE over the heap.
+    """
+    old = [name for name, month in ticket_partitions(cur) if month is not None and month < month_start(before)]
+    if old and archive_schema:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+    for name in old:
+        tail = f"ALTER TABLE {name} SET SCHEMA {archive_schema}" if archive_schema else f"DROP TABLE {name}"
+        cur.execute(f"ALTER TABLE tickets DETACH PARTITION {name}; {tail}")
+    return old
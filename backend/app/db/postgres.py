@@ -1,7 +1,14 @@
+import logging
 import psycopg2
 import psycopg2.extras
 import time
+from datetime import date
 from ..core.config import settings
+from ..core.logs import get_logger, log_event
+from .partitions import tickets_partitioned, create_partitioned_tickets, ensure_ticket_partitions, month_start, add_months
+
+
+logger = get_logger("db")
 
 
 def get_postgres_connection():
@@ -47,28 +54,94 @@ def init_schema():
             updated_at TIMESTAMP DEFAULT NOW()
         );
 
-        CREATE TABLE IF NOT EXISTS tickets (
-            id SERIAL PRIMARY KEY,
-            user_email VARCHAR(255) NOT NULL,
-            customer_name VARCHAR(255),
-            subject TEXT NOT NULL,
-            category VARCHAR(100),
-            description TEXT NOT NULL,
-            status VARCHAR(50) DEFAULT 'open',
-            priority VARCHAR(50) DEFAULT 'medium',
-            session_id VARCHAR(64),
-            created_at TIMESTAMP DEFAULT NOW(),
-            updated_at TIMESTAMP DEFAULT NOW()
+        CREATE TABLE IF NOT EXISTS faq_tags (
+            faq_id INTEGER NOT NULL,
+            tag VARCHAR(32) NOT NULL,
+            PRIMARY KEY (tag, faq_id)
+        );
+        CREATE INDEX IF NOT EXISTS faq_tags_faq_id_idx ON faq_tags (faq_id);
+
+        -- Append-only ticket history (services/ticket_events.py); no FK so tickets can be partitioned
+        CREATE TABLE IF NOT EXISTS ticket_events (
+            id BIGSERIAL PRIMARY KEY,
+            ticket_id INTEGER NOT NULL,
+            type VARCHAR(32) NOT NULL,
+            payload JSONB NOT NULL DEFAULT '{}',
+            ts TIMESTAMP NOT NULL DEFAULT NOW()
         );
+        CREATE INDEX IF NOT EXISTS ticket_events_ticket_ts_idx ON ticket_events (ticket_id, ts);
+
+        -- Background jobs (services/jobs.py)
+        CREATE TABLE IF NOT EXISTS jobs (
+            id VARCHAR(36) PRIMARY KEY,
+            kind VARCHAR(64) NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'queued',
+            params JSONB NOT NULL DEFAULT '{}',
+            progress JSONB NOT NULL DEFAULT '{}',
+            checkpoint JSONB,
+            result JSONB,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker VARCHAR(128),
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status_created_idx ON jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS jobs_kind_finished_idx ON jobs (kind, finished_at DESC);
         """
     )
 
+    # New installs get tickets partitioned by month (db/partitions.py); an older
+    # unpartitioned table keeps working and is converted by tools/ticket_partitions.py
+    partitioned = tickets_partitioned(cur)
+    if partitioned is None:
+        create_partitioned_tickets(cur)
+        partitioned = True
+    if partitioned:
+        try:
+            this_month = month_start(date.today())
+            ensure_ticket_partitions(cur, this_month, add_months(this_month, settings.TICKETS_PARTITION_MONTHS_AHEAD))
+        except Exception as exc:
+            # Rows still land in tickets_default; the next start or `maintain` run retries
+            log_event(logger, logging.WARNING, "schema.partitions_skipped", str(exc))
+
     # Perform ALTERs to add columns if the table already existed
     try:
         cur.execute("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS customer_name VARCHAR(255)")
         cur.execute("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS category VARCHAR(100)")
         cur.execute("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS priority VARCHAR(50) DEFAULT 'medium'")
         cur.execute("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS session_id VARCHAR(64)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tickets_session_id_idx ON tickets (session_id)")
+        cur.execute("ALTER TABLE tickets ADD COLUMN IF NOT EXISTS resolution_summary JSONB")
+        # Keyset scan of resolved tickets for FAQ mining (services/faq_mining.py)
+        cur.execute("CREATE INDEX IF NOT EXISTS tickets_resolved_idx ON tickets (updated_at, id) WHERE status = 'resolved'")
+    except Exception:
+        pass
+    try:
+        cur.execute("ALTER TABLE faqs ADD COLUMN IF NOT EXISTS question_norm TEXT")
+        cur.execute("CREATE INDEX IF NOT EXISTS faqs_question_norm_idx ON faqs (question_norm)")
+        # Incremental snapshot refreshes read rows by updated_at
+        cur.execute("CREATE INDEX IF NOT EXISTS faqs_updated_at_idx ON faqs (updated_at)")
+        # Tell per-worker FAQ snapshots (services/faq_catalog.py) to refresh
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_faq_changed() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('faq_changed', TG_OP);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE TRIGGER faqs_notify_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faqs
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_faq_changed()
+            """
+        )
     except Exception:
         pass
     cur.close()
@@ -1,15 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+import importlib.util
 import socketio
 from .routers import auth, faq, tickets
-from .routers import admin
+from .routers import admin, metrics, sessions, jobs
 from .sockets import register_socketio
 from .core.config import settings
 from .startup import register_events
+from .core.tracing import start_trace, observe_http
+from .core.responses import FastJSONResponse
+from .core.compression import CompressionMiddleware
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Customer Support Chatbot", openapi_url=f"{settings.API_PREFIX}/openapi.json")
+    app = FastAPI(
+        title="Customer Support Chatbot",
+        openapi_url=f"{settings.API_PREFIX}/openapi.json",
+        default_response_class=FastJSONResponse,
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -17,27 +25,69 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Pagination cursor of /chat-sessions; browsers hide other headers cross-origin
+        expose_headers=["X-Next-Cursor"],
     )
 
     app.include_router(auth.router, prefix=settings.API_PREFIX, tags=["auth"])
     app.include_router(faq.router, prefix=settings.API_PREFIX, tags=["faq"])
     app.include_router(tickets.router, prefix=settings.API_PREFIX, tags=["tickets"])
     app.include_router(admin.router, prefix=settings.API_PREFIX, tags=["admin"])
+    app.include_router(sessions.router, prefix=settings.API_PREFIX, tags=["sessions"])
+    app.include_router(jobs.router, prefix=settings.API_PREFIX, tags=["jobs"])
+    app.include_router(metrics.router, tags=["metrics"])
+
+    # Added before timing_middleware so it sits inside it and compression time is traced.
+    # Socket.IO is mounted outside FastAPI; the prefix check guards against a future re-mount.
+    if settings.COMPRESSION_MIN_BYTES:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_BYTES,
+            offload_size=settings.COMPRESSION_OFFLOAD_BYTES,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            exclude_prefixes=("/socket.io", f"/{settings.SOCKETIO_MSGPACK_PATH}"),
+        )
 
-    # Socket.IO
-    # Increase ping timeout to avoid premature disconnects behind proxies (CF/Netlify/Render)
+    @app.middleware("http")
+    async def timing_middleware(request: Request, call_next):
+        with start_trace(f"{request.method} {request.url.path}") as trace:
+            response = await call_next(request)
+        route = request.scope.get("route")
+        observe_http(request.method, getattr(route, "path", "unmatched"), response.status_code, trace.elapsed())
+        if settings.DEBUG_TIMINGS:
+            response.headers["Server-Timing"] = trace.server_timing()
+        return response
+
+    # Socket.IO; python-socketio takes the heartbeat in seconds. A peer that stops
+    # answering pings is dropped after ping_interval + ping_timeout.
     sio = socketio.AsyncServer(
         async_mode="asgi",
         cors_allowed_origins="*",
-        ping_timeout=60_000,  # ms
-        ping_interval=25_000,  # ms
+        ping_timeout=settings.SOCKETIO_PING_TIMEOUT_SECONDS,
+        ping_interval=settings.SOCKETIO_PING_INTERVAL_SECONDS,
     )
     asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
     register_socketio(sio)
+
+    # Same events over msgpack for clients that opt in; packets are binary and smaller.
+    # Each server broadcasts only to its own clients, which is all bot_message needs.
+    sio_msgpack = None
+    if settings.SOCKETIO_MSGPACK_PATH and importlib.util.find_spec("msgpack"):
+        sio_msgpack = socketio.AsyncServer(
+            async_mode="asgi",
+            cors_allowed_origins="*",
+            serializer="msgpack",
+            ping_timeout=settings.SOCKETIO_PING_TIMEOUT_SECONDS,
+            ping_interval=settings.SOCKETIO_PING_INTERVAL_SECONDS,
+        )
+        asgi_app = socketio.ASGIApp(sio_msgpack, other_asgi_app=asgi_app, socketio_path=settings.SOCKETIO_MSGPACK_PATH)
+        register_socketio(sio_msgpack)
     register_events(app)
 
     # Expose attributes for uvicorn target
     app.state.sio = sio
+    app.state.sio_msgpack = sio_msgpack
     app.state.asgi = asgi_app
     return app
 
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime, timedelta
 from ..core.security import require_admin
+from ..core.responses import fast_json
 from ..db.mongo import get_case_memory_collection
 from ..db.postgres import get_postgres_connection
+from ..services.answer_cache import answer_cache
+from ..services.chat_writer import chat_writer
+from ..services.faq_writer import faq_writer
+from ..services.admission import chat_admission
+from ..services.connections import connections
+from ..services.sessions import list_sessions, latest_tickets, count_sessions
+from ..services.case_archive import session_messages
+from ..services.ticket_events import format_resolution_summary, legacy_resolution_summary
 
 
 router = APIRouter()
@@ -12,57 +21,43 @@ router = APIRouter()
 def get_chat_history(limit: int = 50):
     col = get_case_memory_collection()
     docs = list(col.find({}, {"_id": 0}).sort("_id", -1).limit(limit))
-    return docs
+    return fast_json(docs)
 
 
 @router.get("/admin/users-live", dependencies=[Depends(require_admin)])
-def get_users_live():
-    """Aggregate active chat sessions with user metadata and latest status/priority from tickets."""
-    col = get_case_memory_collection()
-    # Gather latest doc per session
-    pipeline = [
-        {"$sort": {"ts": -1}},
-        {"$group": {
-            "_id": "$session_id",
-            "last": {"$first": "$$ROOT"},
-            "started_at": {"$last": "$ts"},
-        }},
-    ]
-    items = list(col.aggregate(pipeline))
-
-    # Map by session
+def get_users_live(limit: int = Query(200, ge=1, le=1000), cursor: str | None = None):
+    """Most recently active chat sessions with user metadata and latest status/priority from tickets.
+
+    Reads the per-session summaries (services/sessions.py); the next page's
+    cursor is returned as "next_cursor".
+    """
+    try:
+        docs, next_cursor = list_sessions(limit, cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        tickets = latest_tickets([d["_id"] for d in docs])
+    except Exception:
+        tickets = {}
+
     sessions = []
-    conn = get_postgres_connection(); cur = conn.cursor()
-    for it in items:
-        last = it.get("last", {})
-        sess = {
-            "session_id": last.get("session_id"),
-            "user_email": last.get("user_email"),
-            "customer_name": last.get("customer_name"),
-            "subject": last.get("subject"),
-            "category": last.get("category"),
-            "last_message_role": last.get("role"),
-            "last_message": last.get("content"),
-            "last_at": str(last.get("ts")) if last.get("ts") else None,
-            "started_at": str(it.get("started_at")) if it.get("started_at") else None,
-            "status": None,
-            "priority": None,
-            "has_prefill": bool(last.get("user_email") or last.get("customer_name") or last.get("subject")),
-        }
-        # Try to enrich with ticket info
-        try:
-            cur.execute(
-                "SELECT status, priority FROM tickets WHERE session_id=%s ORDER BY id DESC LIMIT 1",
-                (sess["session_id"],)
-            )
-            row = cur.fetchone()
-            if row:
-                sess["status"], sess["priority"] = row[0], row[1]
-        except Exception:
-            pass
-        sessions.append(sess)
-    cur.close(); conn.close()
-    return {"sessions": sessions}
+    for d in docs:
+        _ticket_id, status, priority = tickets.get(d["_id"], (None, None, None))
+        sessions.append({
+            "session_id": d["_id"],
+            "user_email": d.get("user_email"),
+            "customer_name": d.get("customer_name"),
+            "subject": d.get("subject"),
+            "category": d.get("category"),
+            "last_message_role": d.get("last_role"),
+            "last_message": d.get("last_message"),
+            "last_at": str(d["last_at"]) if d.get("last_at") else None,
+            "started_at": str(d["started_at"]) if d.get("started_at") else None,
+            "status": status,
+            "priority": priority,
+            "has_prefill": bool(d.get("user_email") or d.get("customer_name") or d.get("subject")),
+        })
+    return fast_json({"sessions": sessions, "next_cursor": next_cursor})
 
 
 @router.get("/admin/cases-table", dependencies=[Depends(require_admin)])
@@ -71,7 +66,8 @@ def get_cases_table(limit: int = 200):
     conn = get_postgres_connection(); cur = conn.cursor()
     cur.execute(
         """
-        SELECT id, customer_name, user_email, subject, category, priority, status, description, session_id
+        SELECT id, customer_name, user_email, subject, category, priority, status, session_id, resolution_summary,
+               CASE WHEN resolution_summary IS NULL AND status = 'resolved' THEN description END
         FROM tickets
         ORDER BY id DESC
         LIMIT %s
@@ -81,25 +77,19 @@ def get_cases_table(limit: int = 200):
     rows = cur.fetchall()
     cur.close(); conn.close()
 
-    col = get_case_memory_collection()
     items = []
     for r in rows:
-        _id, customer_name, user_email, subject, category, priority, status, description, session_id = r
+        _id, customer_name, user_email, subject, category, priority, status, session_id, summary, legacy_description = r
         # messages from mongo for this session
         messages = []
         if session_id:
             try:
-                for d in col.find({"session_id": session_id}, {"_id": 0}).sort("_id", 1):
+                for d in session_messages(session_id):
                     messages.append({"role": d.get("role"), "content": d.get("content")})
             except Exception:
                 pass
-        # extract resolution summary
-        resolution_summary = None
-        if description and "--- RESOLUTION SUMMARY ---" in description:
-            try:
-                resolution_summary = description.split("--- RESOLUTION SUMMARY ---", 1)[1].strip()
-            except Exception:
-                pass
+        # Tickets resolved before the resolution_summary column kept it inside description
+        resolution_summary = format_resolution_summary(summary) or legacy_resolution_summary(legacy_description)
         items.append({
             "customer_name": customer_name,
             "customer_email": user_email,
@@ -109,8 +99,9 @@ def get_cases_table(limit: int = 200):
             "status": status,
             "messages": messages,
             "resolution_summary": resolution_summary,
+            "resolution": summary,
         })
-    return {"items": items}
+    return fast_json({"items": items})
 
 
 @router.get("/admin/analytics", dependencies=[Depends(require_admin)])
@@ -163,14 +154,8 @@ def get_analytics(start_date: str = Query(None), end_date: str = Query(None)):
     
     cur.close(); conn.close()
 
-    # Get chat session data from mongo
-    col = get_case_memory_collection()
-    sessions = set()
-    for doc in col.find({}, {"_id": 0, "session_id": 1}):
-        if doc.get("session_id"):
-            sessions.add(doc["session_id"])
-    
-    total_sessions = len(sessions)
+    # Chat sessions across hot case_memory and the archive
+    total_sessions = count_sessions()
     
     return {
         "faq_count": faq_count,
@@ -241,3 +226,25 @@ def get_user_analytics(start_date: str = Query(None), end_date: str = Query(None
     }
 
 
+@router.get("/admin/cache-stats", dependencies=[Depends(require_admin)])
+def get_cache_stats():
+    """Per-tier hit rates and memory usage of this worker's answer cache."""
+    return answer_cache.stats()
+
+
+@router.get("/admin/writer-stats", dependencies=[Depends(require_admin)])
+def get_writer_stats():
+    """Queue depth, drops and flush latency of this worker's write-behind buffers."""
+    return {"writers": [chat_writer.stats(), faq_writer.stats()]}
+
+
+@router.get("/admin/admission-stats", dependencies=[Depends(require_admin)])
+def get_admission_stats():
+    """In-flight, queued and rejected chat messages in this worker."""
+    return chat_admission.stats()
+
+
+@router.get("/admin/connection-stats", dependencies=[Depends(require_admin)])
+def get_connection_stats():
+    """Live Socket.IO connections, reaping and per-address refusals in this worker."""
+    return connections.stats()
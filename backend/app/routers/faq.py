@@ -1,30 +1,83 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Dict, List, Tuple
 from ..models.schemas import FAQ
 from ..db.postgres import get_postgres_connection
 from ..core.security import require_admin
 from ..core.config import settings
-from openai import OpenAI
+from ..core.compression import choose_encoding, compress
+from ..core.responses import fast_json
+from ..services.answer_cache import answer_cache, normalize_query
+from ..services.jobs import submit_job
+from ..services import faq_mining
+from ..services.faq_catalog import insert_faq_tags, retag_faq, untag_faq, faq_catalog
 
 
 router = APIRouter()
 
 
+# (snapshot version, {content-encoding: response body}); only the current version is
+# kept. Requests run on threadpool threads, so the tuple is never mutated in place:
+# a new one is built and swapped in with a single assignment.
+_faq_bodies: Tuple[str, Dict[str, bytes]] = ("", {})
+
+
+def _faq_body(version: str, items, encoding: str) -> bytes:
+    global _faq_bodies
+    cached_version, bodies = _faq_bodies
+    body = bodies.get(encoding) if cached_version == version else None
+    if body is None:
+        if encoding == "identity":
+            body = fast_json([{"id": _id, "question": q, "answer": a} for _id, q, a in items]).body
+        else:
+            body = compress(_faq_body(version, items, "identity"), encoding,
+                            settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY)
+        # Re-read: other threads (or the identity call above) may have swapped it meanwhile
+        cached_version, bodies = _faq_bodies
+        _faq_bodies = (version, {**(bodies if cached_version == version else {}), encoding: body})
+    return body
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag.removeprefix("W/") for t in tags)
+
+
 @router.get("/faq", response_model=List[FAQ])
-def list_faq():
-    conn = get_postgres_connection(); cur = conn.cursor()
-    cur.execute("SELECT id, question, answer FROM faqs ORDER BY id DESC")
-    items = [FAQ(id=r[0], question=r[1], answer=r[2]) for r in cur.fetchall()]
-    cur.close(); conn.close()
-    return items
+def list_faq(request: Request):
+    # The body is served from the snapshot, serialized (and compressed) once per version.
+    # The version is a content hash, so every worker hands out the same ETag.
+    snap = faq_catalog.snapshot
+    etag = f'W/"{snap.version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.FAQ_CACHE_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    body = _faq_body(snap.version, snap.items, "identity")
+    encoding = None
+    if settings.COMPRESSION_MIN_BYTES and len(body) >= settings.COMPRESSION_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding:
+        body = _faq_body(snap.version, snap.items, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/faq", response_model=FAQ, dependencies=[Depends(require_admin)])
 def create_faq(item: FAQ):
     conn = get_postgres_connection(); cur = conn.cursor()
-    cur.execute("INSERT INTO faqs (question, answer) VALUES (%s, %s) RETURNING id", (item.question, item.answer))
+    cur.execute(
+        "INSERT INTO faqs (question, answer, question_norm) VALUES (%s, %s, %s) RETURNING id",
+        (item.question, item.answer, normalize_query(item.question)),
+    )
     new_id = cur.fetchone()[0]
+    insert_faq_tags(cur, [(new_id, item.question)])
     conn.commit(); cur.close(); conn.close()
+    answer_cache.clear()
+    faq_catalog.changed("INSERT")
     item.id = new_id
     return item
 
@@ -32,11 +85,17 @@ def create_faq(item: FAQ):
 @router.put("/faq/{faq_id}", response_model=FAQ, dependencies=[Depends(require_admin)])
 def update_faq(faq_id: int, item: FAQ):
     conn = get_postgres_connection(); cur = conn.cursor()
-    cur.execute("UPDATE faqs SET question=%s, answer=%s, updated_at=NOW() WHERE id=%s", (item.question, item.answer, faq_id))
+    cur.execute(
+        "UPDATE faqs SET question=%s, answer=%s, question_norm=%s, updated_at=NOW() WHERE id=%s",
+        (item.question, item.answer, normalize_query(item.question), faq_id),
+    )
     if cur.rowcount == 0:
         cur.close(); conn.close()
         raise HTTPException(status_code=404, detail="FAQ not found")
+    retag_faq(cur, faq_id, item.question)
     conn.commit(); cur.close(); conn.close()
+    answer_cache.clear()
+    faq_catalog.changed("UPDATE")
     item.id = faq_id
     return item
 
@@ -48,56 +107,25 @@ def delete_faq(faq_id: int):
     if cur.rowcount == 0:
         cur.close(); conn.close()
         raise HTTPException(status_code=404, detail="FAQ not found")
+    untag_faq(cur, faq_id)
     conn.commit(); cur.close(); conn.close()
+    answer_cache.clear()
+    faq_catalog.changed("DELETE", deleted_ids=(faq_id,))
     return {"deleted": True}
 
 
-@router.post("/faq/generate", dependencies=[Depends(require_admin)])
-def generate_faqs_from_resolved(limit: int = 10, max_new: int = 5):
-    conn = get_postgres_connection(); cur = conn.cursor()
-    cur.execute(
-        "SELECT id, subject, category, description FROM tickets WHERE status='resolved' ORDER BY updated_at DESC LIMIT %s",
-        (limit,),
-    )
-    cases = cur.fetchall()
-    cur.close(); conn.close()
-
-    if not cases:
-        return {"created": 0}
-
-    prompts = []
-    for _id, subject, category, description in cases:
-        prompts.append(f"Subject: {subject}\nCategory: {category}\nResolution: {description}")
-
-    qa: List[FAQ] = []
-    if settings.OPENAI_API_KEY:
-        try:
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            system = "You are a support knowledge base curator. Produce concise FAQ pairs from successful resolutions in 'Question: Answer' lines."
-            user = "\n\n".join(prompts)
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
-                temperature=0.2,
-            )
-            text = completion.choices[0].message.content.strip()
-            for line in text.split("\n"):
-                if ":" in line:
-                    q, a = line.split(":", 1)
-                    qa.append(FAQ(question=q.strip(), answer=a.strip()))
-        except Exception:
-            pass
-
-    if not qa:
-        for _id, subject, category, description in cases[:max_new]:
-            qa.append(FAQ(question=subject, answer=description))
-
-    conn = get_postgres_connection(); cur = conn.cursor()
-    created = 0
-    for item in qa[:max_new]:
-        cur.execute("INSERT INTO faqs (question, answer) VALUES (%s, %s)", (item.question, item.answer))
-        created += 1
-    conn.commit(); cur.close(); conn.close()
-    return {"created": created}
-
-
+@router.post("/faq/generate", status_code=202, dependencies=[Depends(require_admin)])
+def generate_faqs_from_resolved(
+    limit: int = Query(10, ge=1),
+    max_new: int = Query(5, ge=1),
+    uncapped: bool = False,
+):
+    """Queue FAQ mining over tickets resolved since the last run; poll GET /jobs/{job_id}.
+
+    ``limit`` caps the tickets read and ``max_new`` the FAQs created by this run;
+    ``uncapped=true`` lifts both and mines every ticket resolved since the last run.
+    While a mining job is queued or running, that job is returned instead of a new one.
+    """
+    params = {"limit": 0, "max_new": 0} if uncapped else {"limit": limit, "max_new": max_new}
+    job = submit_job(faq_mining.KIND, params)
+    return {"job_id": job["id"], "status": job["status"]}
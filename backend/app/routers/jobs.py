@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from ..core.security import require_admin
+from ..services.jobs import get_job, list_jobs
+
+
+router = APIRouter()
+
+
+@router.get("/jobs", dependencies=[Depends(require_admin)])
+def list_background_jobs(kind: Optional[str] = None, limit: int = Query(20, ge=1, le=200)):
+    return list_jobs(kind, limit)
+
+
+@router.get("/jobs/{job_id}", dependencies=[Depends(require_admin)])
+def get_background_job(job_id: str):
+    """Status, progress ({done, total, ...}), result and error of one job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
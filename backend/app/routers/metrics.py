@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+from ..core.tracing import render_metrics, CONTENT_TYPE_LATEST
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    body = render_metrics()
+    if body is None:
+        return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
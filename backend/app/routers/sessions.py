@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from ..core.security import require_admin
+from ..core.responses import fast_json
+from ..services.sessions import list_sessions, latest_tickets
+
+
+router = APIRouter()
+
+
+@router.get("/chat-sessions", dependencies=[Depends(require_admin)])
+def list_chat_sessions(
+    q: Optional[str] = Query(None, description="Search in name/email/subject"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Chat sessions, most recently active first.
+
+    The body stays a plain array for the admin UI; when more sessions follow,
+    pass the X-Next-Cursor response header back as ``cursor``.
+    """
+    try:
+        docs, next_cursor = list_sessions(limit, cursor, q)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        tickets = latest_tickets([d["_id"] for d in docs])
+    except Exception:
+        tickets = {}
+
+    items = []
+    for d in docs:
+        ticket_id, ticket_status, _priority = tickets.get(d["_id"], (None, None, None))
+        items.append({
+            "session_id": d["_id"],
+            "customer_name": d.get("customer_name"),
+            "user_email": d.get("user_email"),
+            "subject": d.get("subject"),
+            "category": d.get("category"),
+            "message_count": d.get("message_count", 0),
+            "created_at": str(d["started_at"]) if d.get("started_at") else None,
+            "updated_at": str(d["last_at"]) if d.get("last_at") else None,
+            "is_escalated": ticket_status == "escalated",
+            "ticket_id": ticket_id,
+            "ticket_status": ticket_status,
+        })
+    response = fast_json(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
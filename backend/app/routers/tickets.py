@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from ..models.schemas import Ticket, TicketUpdate
 from ..db.postgres import get_postgres_connection
 from ..db.mongo import get_mongo_db
 from ..core.security import require_admin
+from ..services.ticket_events import INSERT_TICKET_UNLESS_LIVE, LOCK_TICKET_SESSION, LIVE_CONFLICT
 
 
 router = APIRouter()
@@ -61,44 +62,55 @@ def list_tickets(
 def create_ticket(ticket: Ticket):
     conn = get_postgres_connection(); cur = conn.cursor()
     cur.execute(
-        """
-        INSERT INTO tickets (user_email, customer_name, subject, category, description, status, priority, session_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-        """,
-        (
-            ticket.user_email, ticket.customer_name, ticket.subject, ticket.category,
-            ticket.description, ticket.status or 'open', ticket.priority or 'medium', ticket.session_id
+        INSERT_TICKET_UNLESS_LIVE,
+        dict(
+            user_email=ticket.user_email, customer_name=ticket.customer_name, subject=ticket.subject,
+            category=ticket.category, description=ticket.description, status=ticket.status or 'open',
+            priority=ticket.priority or 'medium', session_id=ticket.session_id,
         ),
     )
-    ticket.id = cur.fetchone()[0]
+    row = cur.fetchone()
     conn.commit(); cur.close(); conn.close()
+    if not row:
+        raise HTTPException(status_code=409, detail="Session already has an open ticket")
+    ticket.id = row[0]
     return ticket
 
 
 @router.patch("/tickets/{ticket_id}", response_model=Ticket, dependencies=[Depends(require_admin)])
 def update_ticket(ticket_id: int, ticket: TicketUpdate):
     conn = get_postgres_connection(); cur = conn.cursor()
+    # Reopening a ticket (or moving it to another session) must not give the
+    # session a second live ticket; checked under the ticket-creation lock.
     cur.execute(
-        """
+        LOCK_TICKET_SESSION + f"""
         UPDATE tickets
-        SET user_email=COALESCE(%s, user_email),
-            customer_name=COALESCE(%s, customer_name),
-            subject=COALESCE(%s, subject),
-            category=COALESCE(%s, category),
-            description=COALESCE(%s, description),
-            status=COALESCE(%s, status),
-            priority=COALESCE(%s, priority),
-            session_id=COALESCE(%s, session_id),
+        SET user_email=COALESCE(%(user_email)s, user_email),
+            customer_name=COALESCE(%(customer_name)s, customer_name),
+            subject=COALESCE(%(subject)s, subject),
+            category=COALESCE(%(category)s, category),
+            description=COALESCE(%(description)s, description),
+            status=COALESCE(%(status)s, status),
+            priority=COALESCE(%(priority)s, priority),
+            session_id=COALESCE(%(session_id)s, session_id),
             updated_at=NOW()
-        WHERE id=%s
+        WHERE id=%(id)s AND NOT ({LIVE_CONFLICT})
         RETURNING id, user_email, customer_name, subject, category, description, status, priority, session_id, created_at, updated_at
         """,
-        (
-            ticket.user_email, ticket.customer_name, ticket.subject, ticket.category, ticket.description,
-            ticket.status, ticket.priority, ticket.session_id, ticket_id
+        dict(
+            user_email=ticket.user_email, customer_name=ticket.customer_name, subject=ticket.subject,
+            category=ticket.category, description=ticket.description, status=ticket.status,
+            priority=ticket.priority, session_id=ticket.session_id, id=ticket_id,
         ),
     )
     row = cur.fetchone()
+    if not row:
+        cur.execute("SELECT 1 FROM tickets WHERE id=%s", (ticket_id,))
+        exists = cur.fetchone() is not None
+        conn.rollback(); cur.close(); conn.close()
+        if exists:
+            raise HTTPException(status_code=409, detail="Session already has an open ticket")
+        raise HTTPException(status_code=404, detail="Ticket not found")
     conn.commit(); cur.close(); conn.close()
     return Ticket(
         id=row[0], user_email=row[1], customer_name=row[2], subject=row[3], category=row[4], description=row[5],
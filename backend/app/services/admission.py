@@ -0,0 +1,157 @@
+from typing import Any, AsyncIterator, Dict
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+from ..db.redis_client import get_redis_client
+from ..core.config import settings
+from ..core.tracing import observe_admission_wait, count_admission_rejected, set_admission_inflight
+
+
+class Rejected(Exception):
+    """A chat message was turned away; the client should retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _SessionQueue:
+    __slots__ = ("lock", "waiting")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0  # holders + waiters; the entry is dropped when it reaches zero
+
+
+class AdmissionController:
+    """Gate for chat_message handling in one worker.
+
+    Messages of one session run strictly one at a time, in arrival order
+    (asyncio.Lock wakes waiters FIFO), so failure counters, the ticket upsert
+    and history reads never interleave. Across sessions at most
+    ``max_inflight`` messages run at once; up to ``max_queue`` more may wait
+    ``queue_timeout`` seconds, anything beyond is rejected immediately.
+    Per-session rate limits live in Redis so they hold across workers.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue: int,
+        queue_timeout: float,
+        session_max_pending: int,
+        rate_limit: int,
+        rate_window: int,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.session_max_pending = session_max_pending
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self._sessions: Dict[str, _SessionQueue] = {}
+        self._slots: asyncio.Semaphore | None = None
+        self._inflight = 0
+        self._queued = 0
+        self._redis = None
+        self._stats = {"admitted": 0, "rejected_rate_limited": 0, "rejected_session_busy": 0, "rejected_busy": 0}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            max_inflight=settings.ADMISSION_MAX_INFLIGHT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            session_max_pending=settings.SESSION_MAX_PENDING,
+            rate_limit=settings.SESSION_RATE_LIMIT,
+            rate_window=settings.SESSION_RATE_WINDOW_SECONDS,
+        )
+
+    @asynccontextmanager
+    async def admit(self, session_id: str | None) -> AsyncIterator[None]:
+        """Hold a session turn and a global slot for the duration of the block."""
+        key = session_id or ""
+        self._check_rate(key)
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = self._sessions[key] = _SessionQueue()
+        elif entry.waiting >= self.session_max_pending:
+            self._reject("session_busy", 1.0)
+        entry.waiting += 1
+        try:
+            started = time.perf_counter()
+            async with entry.lock:
+                observe_admission_wait("session", time.perf_counter() - started)
+                # Take the global slot only once it is this message's turn, so one
+                # chatty session cannot occupy several slots while it queues
+                await self._acquire_slot()
+                self._inflight += 1
+                set_admission_inflight(self._inflight)
+                self._stats["admitted"] += 1
+                try:
+                    yield
+                finally:
+                    self._inflight -= 1
+                    set_admission_inflight(self._inflight)
+                    self._slots.release()
+        finally:
+            entry.waiting -= 1
+            if entry.waiting == 0 and self._sessions.get(key) is entry:
+                del self._sessions[key]
+
+    async def _acquire_slot(self) -> None:
+        if self._slots is None:
+            # Created lazily so it binds to the running loop
+            self._slots = asyncio.Semaphore(self.max_inflight)
+        started = time.perf_counter()
+        if self._slots.locked():
+            if self._queued >= self.max_queue:
+                self._reject("busy", 2.0)
+            self._queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("busy", 2.0)
+            finally:
+                self._queued -= 1
+        else:
+            await self._slots.acquire()
+        observe_admission_wait("global", time.perf_counter() - started)
+
+    def _check_rate(self, session_id: str) -> None:
+        """Fixed-window counter per session; fails open if Redis is unavailable."""
+        if not session_id or self.rate_limit <= 0:
+            return
+        window = int(time.time()) // self.rate_window
+        key = f"ratelimit:chat:{session_id}:{window}"
+        try:
+            if self._redis is None:
+                self._redis = get_redis_client()
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, self.rate_window + 1)
+            count = pipe.execute()[0]
+        except Exception:
+            return
+        if count > self.rate_limit:
+            self._reject("rate_limited", (window + 1) * self.rate_window - time.time())
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        self._stats[f"rejected_{reason}"] += 1
+        count_admission_rejected(reason)
+        raise Rejected(reason, round(max(retry_after, 0.0), 1))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "inflight": self._inflight,
+            "queued": self._queued,
+            "sessions": len(self._sessions),
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+        }
+
+
+chat_admission = AdmissionController.from_settings()
@@ -0,0 +1,301 @@
+from typing import Dict, Any, Set, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import hashlib
+import math
+import re
+import threading
+import time
+
+from ..db.redis_client import get_redis_client
+from ..core.config import settings
+
+
+# Words that carry no meaning for matching support questions. Negations are
+# deliberately absent so "can't log in" never collides with "log in", and so
+# are question words: "how to cancel" and "when to cancel" need different answers.
+STOPWORDS = frozenset({
+    "a", "an", "the", "i", "me", "my", "mine", "we", "our", "you", "your", "it", "its",
+    "is", "am", "are", "was", "were", "be", "been", "do", "does", "did", "to", "of",
+    "in", "on", "at", "for", "with", "by", "from", "and", "or", "so",
+    "would", "should", "will", "please",
+    "hi", "hello", "hey", "there", "this", "that", "these", "those", "some", "any",
+    "just", "about", "get", "want", "need", "like",
+})
+# A semantic match must ask the same kind of question
+QUESTION_WORDS = frozenset({"how", "what", "where", "when", "which", "who", "why", "can", "could", "help"})
+
+# Bump whenever normalize_query changes: it is part of the Redis keys, and
+# backfill_question_norms recomputes faqs.question_norm once per version.
+NORMALIZE_VERSION = 2
+
+_PUNCT_RE = re.compile(r"[^\w\s']+")
+_EMBED_DIM = 1 << 12
+# Redis keys are faq:<normalize version>.<generation>:<normalized query>. clear()
+# bumps the generation instead of deleting keys; old ones expire with their TTL.
+_GENERATION_KEY = "faq:generation"
+_GENERATION_MAX_AGE = 1.0  # seconds a worker trusts its copy of the generation
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and stopwords, collapse whitespace.
+
+    "How do I reset my password?" -> "how reset password"
+    """
+    if not text:
+        return ""
+    words = _PUNCT_RE.sub(" ", text.lower()).replace("'", "").split()
+    kept = [w for w in words if w not in STOPWORDS]
+    return " ".join(kept or words)
+
+
+def embed(normalized: str) -> Dict[int, float]:
+    """Sparse hashed embedding of a normalized query.
+
+    Word unigrams plus character trigrams are hashed into a fixed space and
+    L2-normalized, so cosine similarity is a dot product over shared keys and
+    small typos ("pasword") still land close to the original.
+    """
+    vec: Dict[int, float] = {}
+    for word in normalized.split():
+        _bump(vec, "w:" + word, 1.0)
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            _bump(vec, "c:" + padded[i:i + 3], 0.5)
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    if norm:
+        for k in vec:
+            vec[k] /= norm
+    return vec
+
+
+def _bump(vec: Dict[int, float], feature: str, weight: float) -> None:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest()
+    idx = int.from_bytes(digest, "little") % _EMBED_DIM
+    vec[idx] = vec.get(idx, 0.0) + weight
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+@dataclass
+class _Entry:
+    answer: str
+    vector: Dict[int, float]
+    expires_at: float
+    size: int
+    hits: int = 0
+
+
+@dataclass
+class _TierStats:
+    hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+@dataclass
+class _Stats:
+    tiers: Dict[str, _TierStats] = field(default_factory=lambda: {t: _TierStats() for t in ("local", "semantic", "redis")})
+    evictions: int = 0
+    expirations: int = 0
+
+
+class AnswerCache:
+    """Multi-tier cache of assistant answers keyed by normalized query.
+
+    Tiers, checked in order:
+      local    - exact normalized key in this worker's memory (LRU or LFU)
+      semantic - nearest cached query in this worker by embedding cosine
+      redis    - exact normalized key shared across workers
+
+    The in-process tiers are bounded by entry count and approximate bytes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: int,
+        policy: str = "lru",
+        similarity: float = 0.88,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.policy = policy if policy in ("lru", "lfu") else "lru"
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+        self._generation: Tuple[str, float] | None = None  # (value, fetched at)
+
+    @classmethod
+    def from_settings(cls) -> "AnswerCache":
+        return cls(
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            max_bytes=settings.ANSWER_CACHE_MAX_BYTES,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            policy=settings.ANSWER_CACHE_POLICY,
+            similarity=settings.ANSWER_CACHE_SIMILARITY,
+        )
+
+    def get(self, query: str) -> str | None:
+        key = normalize_query(query)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry:
+                self._touch(key, entry)
+                self._stats.tiers["local"].hits += 1
+                return entry.answer
+            self._stats.tiers["local"].misses += 1
+
+            vector = embed(key)
+            match = self._nearest(key, vector, now)
+            if match:
+                self._touch(match, self._entries[match])
+                self._stats.tiers["semantic"].hits += 1
+                return self._entries[match].answer
+            self._stats.tiers["semantic"].misses += 1
+
+        try:
+            redis = get_redis_client()
+            answer = redis.get(self._redis_key(redis, key))
+        except Exception:
+            answer = None
+        with self._lock:
+            if answer:
+                self._stats.tiers["redis"].hits += 1
+                self._insert(key, answer, vector, now)
+            else:
+                self._stats.tiers["redis"].misses += 1
+        return answer
+
+    def put(self, query: str, answer: str) -> None:
+        key = normalize_query(query)
+        if not key or not answer:
+            return
+        with self._lock:
+            self._insert(key, answer, embed(key), time.time())
+        try:
+            redis = get_redis_client()
+            redis.setex(self._redis_key(redis, key), self.ttl_seconds, answer)
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        """Drop every cached answer, locally and in Redis (e.g. after FAQ edits).
+
+        O(1) in Redis: bumping the generation orphans every shared key at once.
+        Other workers pick the new generation up within _GENERATION_MAX_AGE.
+        """
+        self.clear_local()
+        try:
+            generation = get_redis_client().incr(_GENERATION_KEY)
+            self._generation = (str(generation), time.monotonic())
+        except Exception:
+            pass
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self._stats.evictions,
+                "expirations": self._stats.expirations,
+                "tiers": {name: t.as_dict() for name, t in self._stats.tiers.items()},
+            }
+
+    def _redis_key(self, redis, key: str) -> str:
+        now = time.monotonic()
+        cached = self._generation
+        if cached is None or now - cached[1] > _GENERATION_MAX_AGE:
+            value = redis.get(_GENERATION_KEY)
+            if isinstance(value, bytes):
+                value = value.decode()
+            cached = self._generation = (str(value or 0), now)
+        return f"faq:{NORMALIZE_VERSION}.{cached[0]}:{key}"
+
+    # internals; callers hold self._lock
+
+    def _live_entry(self, key: str, now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry and entry.expires_at <= now:
+            self._remove(key)
+            self._stats.expirations += 1
+            return None
+        return entry
+
+    def _touch(self, key: str, entry: _Entry) -> None:
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+    def _nearest(self, key: str, vector: Dict[int, float], now: float) -> str | None:
+        candidates: Set[str] = set()
+        for word in key.split():
+            candidates |= self._index.get(word, set())
+        asks = QUESTION_WORDS.intersection(key.split())
+        best: Tuple[float, str | None] = (self.similarity, None)
+        for cand in candidates:
+            entry = self._live_entry(cand, now)
+            if not entry or QUESTION_WORDS.intersection(cand.split()) != asks:
+                continue
+            score = cosine(vector, entry.vector)
+            if score >= best[0]:
+                best = (score, cand)
+        return best[1]
+
+    def _insert(self, key: str, answer: str, vector: Dict[int, float], now: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = len(key) + len(answer) + 16 * len(vector)
+        if size > self.max_bytes:
+            return
+        while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+            self._remove(self._victim())
+            self._stats.evictions += 1
+        self._entries[key] = _Entry(answer=answer, vector=vector, expires_at=now + self.ttl_seconds, size=size)
+        self._bytes += size
+        for word in key.split():
+            self._index.setdefault(word, set()).add(key)
+
+    def _victim(self) -> str:
+        if self.policy == "lfu":
+            # Ties fall back to recency order: the first minimum found is the least recently used.
+            return min(self._entries.items(), key=lambda kv: kv[1].hits)[0]
+        return next(iter(self._entries))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return
+        self._bytes -= entry.size
+        for word in key.split():
+            bucket = self._index.get(word)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[word]
+
+
+answer_cache = AnswerCache.from_settings()
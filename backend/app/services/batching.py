@@ -0,0 +1,229 @@
+from typing import Any, Callable, Dict, List
+import asyncio
+import atexit
+import queue
+import threading
+import time
+
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class BatchWriter:
+    """Write-behind buffer flushed by a background thread.
+
+    Producers call ``submit`` and return immediately. The flusher thread hands
+    ``flush_fn`` a batch whenever ``max_batch`` items are waiting or
+    ``flush_interval`` seconds have passed since the first buffered item.
+    ``stop`` drains whatever is left, and is also run at interpreter exit.
+
+    The buffer holds at most ``max_queue`` items. When it is full, ``overflow``
+    decides what gives: ``block`` waits up to ``block_seconds`` for room and
+    then drops the new item, ``drop_newest`` rejects it immediately and
+    ``drop_oldest`` evicts the oldest buffered item to make room. Called from an
+    event loop thread, ``block`` does its waiting in the loop's executor so the
+    other connections are not stalled; the item is then counted as submitted
+    and, if it still finds no room, as dropped.
+
+    With a ``key`` function, items are also indexed by key from submission
+    until their flush finishes (or ``release``), so ``pending(key)`` costs only
+    that key's items rather than a copy of the whole buffer.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[Any]], None],
+        max_batch: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        overflow: str = "drop_newest",
+        block_seconds: float = 0.05,
+        key: Callable[[Any], Any] | None = None,
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.overflow = overflow if overflow in OVERFLOW_POLICIES else "drop_newest"
+        self.block_seconds = block_seconds
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._key = key
+        self._pending: Dict[Any, List[Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats = {"submitted": 0, "flushed": 0, "batches": 0, "dropped": 0, "failed": 0}
+        self._latency = {"last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0}
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        thread = self._thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
+        # Anything submitted after the thread exited is flushed inline
+        self._flush(self._drain(self._queue.qsize()))
+
+    def submit(self, item: Any) -> bool:
+        if self._stopping.is_set():
+            # Shutting down: write through instead of queueing behind a dead thread
+            self._stats["submitted"] += 1
+            self._track(item)
+            self._flush([item])
+            return True
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+        self._track(item)
+        if not self._enqueue(item):
+            self._untrack([item])
+            self._stats["dropped"] += 1
+            return False
+        self._stats["submitted"] += 1
+        return True
+
+    def pending(self, key: Any) -> List[Any]:
+        """Buffered or mid-flush items whose ``key`` is ``key``, oldest first."""
+        with self._pending_lock:
+            return list(self._pending.get(key, ()))
+
+    def release(self, items: List[Any]) -> None:
+        """Stop reporting ``items`` as pending while ``flush_fn`` is still running.
+
+        For a ``flush_fn`` that makes the items visible elsewhere before it
+        returns, so ``pending`` does not report them a second time.
+        """
+        self._untrack(items)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats["batches"]
+        return {
+            "name": self.name,
+            "overflow": self.overflow,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            **self._stats,
+            "flush_last_ms": round(self._latency["last_ms"], 3),
+            "flush_max_ms": round(self._latency["max_ms"], 3),
+            "flush_avg_ms": round(self._latency["total_ms"] / batches, 3) if batches else 0.0,
+        }
+
+    def _enqueue(self, item: Any) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if self.overflow == "block":
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return self._put_blocking(item)
+            future = loop.run_in_executor(None, self._put_blocking, item)
+            future.add_done_callback(self._count_late_drop)
+            return True
+        if self.overflow == "drop_oldest":
+            try:
+                self._untrack([self._queue.get_nowait()])
+                self._stats["dropped"] += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                return False
+        return False
+
+    def _put_blocking(self, item: Any) -> bool:
+        try:
+            self._queue.put(item, timeout=self.block_seconds)
+            return True
+        except queue.Full:
+            self._untrack([item])
+            return False
+
+    def _track(self, item: Any) -> None:
+        if self._key is None:
+            return
+        key = self._key(item)
+        if key is not None:
+            with self._pending_lock:
+                self._pending.setdefault(key, []).append(item)
+
+    def _untrack(self, items: List[Any]) -> None:
+        if self._key is None:
+            return
+        with self._pending_lock:
+            for item in items:
+                key = self._key(item)
+                bucket = self._pending.get(key)
+                if not bucket:
+                    continue
+                for i, other in enumerate(bucket):
+                    if other is item:
+                        del bucket[i]
+                        break
+                if not bucket:
+                    del self._pending[key]
+
+    def _count_late_drop(self, future: "asyncio.Future[bool]") -> None:
+        if future.cancelled() or future.exception() or not future.result():
+            self._stats["dropped"] += 1
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _drain(self, limit: int) -> List[Any]:
+        items: List[Any] = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _flush(self, batch: List[Any]) -> None:
+        for i in range(0, len(batch), self.max_batch):
+            chunk = batch[i:i + self.max_batch]
+            started = time.perf_counter()
+            try:
+                self.flush_fn(chunk)
+                self._stats["flushed"] += len(chunk)
+                self._stats["batches"] += 1
+            except Exception:
+                # Best effort, like the synchronous writes this replaces
+                self._stats["failed"] += len(chunk)
+            finally:
+                self._untrack(chunk)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._latency["last_ms"] = elapsed_ms
+                self._latency["max_ms"] = max(self._latency["max_ms"], elapsed_ms)
+                self._latency["total_ms"] += elapsed_ms
@@ -0,0 +1,188 @@
+"""Tiered storage for case_memory.
+
+* hot:     ``case_memory``, one document per message, as chat_writer inserts them;
+* archive: ``case_memory_archive``, one document per cold session (``_id`` is the
+           session id) holding its messages, first/last timestamps and metadata;
+* segment: gzip JSONL files under CASE_ARCHIVE_DIR. Each session is written as
+           its own gzip member, and the archive document keeps only
+           (file, offset, length) references, so one session is read with a
+           single seek. A segment is still a valid .jsonl.gz file (one
+           case_memory document per line), so the --jsonl options of the
+           tools read it after ``gzip -dc``.
+
+``archive_cold_sessions`` and ``export_archived_sessions`` move data down the
+tiers (see tools/archive_case_memory.py); ``session_messages`` reads across
+all three, so history lookups do not care where a session lives.
+"""
+from typing import Any, Dict, List
+from datetime import datetime
+import gzip
+import json
+import os
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from ..db.mongo import get_case_memory_collection, get_case_archive_collection
+from ..core.config import settings
+
+
+_META_FIELDS = ("user_email", "customer_name", "subject", "category")
+
+
+def ensure_indexes() -> None:
+    get_case_memory_collection().create_index([("session_id", ASCENDING), ("ts", ASCENDING)])
+    get_case_archive_collection().create_index([("last_ts", ASCENDING)])
+
+
+def _encode(doc: Dict[str, Any]) -> str:
+    out = dict(doc)
+    if isinstance(out.get("_id"), ObjectId):
+        out["_id"] = str(out["_id"])
+    if isinstance(out.get("ts"), datetime):
+        out["ts"] = out["ts"].isoformat()
+    return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    doc = json.loads(line)
+    if ObjectId.is_valid(doc.get("_id") or ""):
+        doc["_id"] = ObjectId(doc["_id"])
+    if isinstance(doc.get("ts"), str):
+        try:
+            doc["ts"] = datetime.fromisoformat(doc["ts"])
+        except ValueError:
+            pass
+    return doc
+
+
+def read_segment(ref: Dict[str, Any]) -> List[Dict[str, Any]]:
+    with open(os.path.join(settings.CASE_ARCHIVE_DIR, ref["file"]), "rb") as fh:
+        fh.seek(ref["offset"])
+        data = fh.read(ref["length"])
+    return [_decode(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line]
+
+
+def archived_messages(session_id: str) -> List[Dict[str, Any]]:
+    doc = get_case_archive_collection().find_one({"_id": session_id})
+    if not doc:
+        return []
+    messages: List[Dict[str, Any]] = []
+    for ref in doc.get("segments", []):
+        try:
+            messages += read_segment(ref)
+        except (OSError, ValueError):
+            # Segment not mounted on this host or damaged; show what is left
+            pass
+    for m in doc.get("messages", []):
+        messages.append({**m, "session_id": session_id})
+    return messages
+
+
+def session_messages(session_id: str) -> List[Dict[str, Any]]:
+    """Every stored message of a session across the tiers, oldest first."""
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    try:
+        for m in archived_messages(session_id):
+            by_id[m.get("_id")] = m
+    except Exception:
+        pass
+    for m in get_case_memory_collection().find({"session_id": session_id}):
+        by_id[m["_id"]] = m
+    return sorted(by_id.values(), key=lambda d: d.get("ts") or datetime.min)
+
+
+def archive_cold_sessions(cutoff: datetime, max_sessions: int | None = None, chunk: int = 500) -> Dict[str, int]:
+    """Move sessions with no message since ``cutoff`` from case_memory to the archive.
+
+    Messages are added with $addToSet and deleted from case_memory only after
+    the archive write succeeded, so an interrupted run can simply be repeated.
+    A session that becomes active again starts a fresh hot history; it is merged
+    into the same archive document when it goes cold again.
+    """
+    hot = get_case_memory_collection()
+    archive = get_case_archive_collection()
+    pipeline: List[Dict[str, Any]] = [
+        {"$group": {"_id": "$session_id", "last": {"$max": "$ts"}}},
+        {"$match": {"_id": {"$ne": None}, "last": {"$lt": cutoff}}},
+    ]
+    if max_sessions:
+        pipeline.append({"$limit": max_sessions})
+    cold_ids = [d["_id"] for d in hot.aggregate(pipeline, allowDiskUse=True)]
+
+    stats = {"sessions": 0, "messages": 0}
+    for i in range(0, len(cold_ids), chunk):
+        by_session: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in hot.find({"session_id": {"$in": cold_ids[i:i + chunk]}}).sort([("session_id", 1), ("ts", 1)]):
+            by_session.setdefault(doc.pop("session_id"), []).append(doc)
+        ops, moved = [], []
+        now = datetime.utcnow()
+        for session_id, messages in by_session.items():
+            meta = {f"meta.{k}": m[k] for m in messages for k in _META_FIELDS if m.get(k) is not None}
+            ops.append(UpdateOne(
+                {"_id": session_id},
+                {
+                    "$addToSet": {"messages": {"$each": messages}},
+                    "$min": {"first_ts": messages[0].get("ts")},
+                    "$max": {"last_ts": messages[-1].get("ts")},
+                    "$set": {**meta, "archived_at": now},
+                },
+                upsert=True,
+            ))
+            moved += [m["_id"] for m in messages]
+        if ops:
+            archive.bulk_write(ops, ordered=False)
+            hot.delete_many({"_id": {"$in": moved}})
+        stats["sessions"] += len(by_session)
+        stats["messages"] += len(moved)
+    return stats
+
+
+def export_archived_sessions(cutoff: datetime, directory: str, segment_bytes: int = 64 << 20) -> Dict[str, int]:
+    """Write archived sessions last active before ``cutoff`` to gzip JSONL segments.
+
+    The archive document keeps its metadata and gains a segment reference; its
+    messages array is dropped only if it did not change while being written.
+    """
+    archive = get_case_archive_collection()
+    os.makedirs(directory, exist_ok=True)
+    stats = {"sessions": 0, "messages": 0, "bytes": 0, "files": 0}
+    cursor = archive.find({"last_ts": {"$lt": cutoff}, "messages.0": {"$exists": True}}).sort("last_ts", 1)
+    fh, name, ops = None, None, []
+    try:
+        for doc in cursor:
+            if fh is None or fh.tell() >= segment_bytes:
+                if fh is not None:
+                    _finish_segment(fh, archive, ops)
+                    ops = []
+                name = f"case_memory-{datetime.utcnow():%Y%m%dT%H%M%S%f}-{stats['files']:04d}.jsonl.gz"
+                fh = open(os.path.join(directory, name), "xb")
+                stats["files"] += 1
+            messages = sorted(doc["messages"], key=lambda m: m.get("ts") or datetime.min)
+            lines = "".join(_encode({**m, "session_id": doc["_id"]}) + "\n" for m in messages)
+            data = gzip.compress(lines.encode("utf-8"), mtime=0)
+            ref = {"file": name, "offset": fh.tell(), "length": len(data), "count": len(messages)}
+            fh.write(data)
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "messages": {"$size": len(doc["messages"])}},
+                {"$push": {"segments": ref}, "$unset": {"messages": ""}},
+            ))
+            stats["sessions"] += 1
+            stats["messages"] += len(messages)
+            stats["bytes"] += len(data)
+        if fh is not None:
+            _finish_segment(fh, archive, ops)
+            fh = None
+    finally:
+        if fh is not None:
+            fh.close()
+    return stats
+
+
+def _finish_segment(fh, archive, ops: List[UpdateOne]) -> None:
+    # The references must never point at bytes that are not on disk yet
+    fh.flush()
+    os.fsync(fh.fileno())
+    fh.close()
+    if ops:
+        archive.bulk_write(ops, ordered=False)
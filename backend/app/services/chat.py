@@ -1,17 +1,44 @@
 from typing import Dict, Any, List, Tuple
-from ..db.mongo import get_case_memory_collection
 from ..db.redis_client import get_redis_client
 from ..db.postgres import get_postgres_connection
 from ..core.config import settings
+from .answer_cache import answer_cache, normalize_query
+from .singleflight import generation_flight
+from .faq_writer import enqueue_faq
+from .faq_catalog import sample_related_faqs, lookup_faq_answer
+from .chat_writer import enqueue_message, pending_messages, session_counters
+from .case_archive import session_messages
+from .sessions import session_summary_from_history
+from .ticket_events import transition_sql, event_payload, INSERT_TICKET_UNLESS_LIVE
+from .intents import classify_message, offers_solution
+from .intent_model import predict_intent
+from ..core.tracing import start_trace, stage, traced, tag, observe_message
+from ..core.logs import get_logger, log_event
 from openai import OpenAI
 import httpx
 import google.generativeai as genai
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
+import logging
+import threading
 import time
 
 
+logger = get_logger("chat")
+
+
 async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
+    with start_trace("chat.handle_message") as trace:
+        response = await _answer_message(data)
+    observe_message(trace.attrs.get("source", "unknown"), trace.elapsed())
+    if settings.DEBUG_TIMINGS:
+        response["timings"] = trace.timings_ms()
+        response["source"] = trace.attrs.get("source")
+    return response
+
+
+async def _answer_message(data: Dict[str, Any]) -> Dict[str, Any]:
     session_id = data.get("session_id")
     content = data.get("content", "").strip()
     user_email = data.get("user_email", "guest@example.com")
@@ -53,16 +80,23 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
         pass
 
     # Track user activity timestamp for auto-resolve logic
-    redis = get_redis_client()
-    try:
-        redis.set(f"last_user:{session_id}", str(int(time.time())))
-        # Any new user message cancels pending auto-resolve
-        redis.delete(f"pending_resolve:{session_id}")
-    except Exception:
-        pass
+    with stage("redis_activity"):
+        redis = get_redis_client()
+        try:
+            redis.set(f"last_user:{session_id}", str(int(time.time())))
+            # Any new user message cancels pending auto-resolve
+            redis.delete(f"pending_resolve:{session_id}")
+        except Exception:
+            pass
+
+    # Keyword matcher first, then the local classifier for what keywords miss.
+    # These intents are answered without any LLM call, including suggestions.
+    with stage("intent"):
+        intents = classify_message(content)
+        local_intent = None if intents.negated else predict_intent(content)
 
     # Immediate escalation trigger (manual override)
-    if content.lower().strip() in {"!escalate", "/escalate", "escalate now", "please escalate"}:
+    if intents.escalate or local_intent == "escalate":
         try:
             _escalate_ticket(session_id=session_id, user_email=user_email, customer_name=customer_name, subject=subject, category=category, reason="Manual escalation trigger")
             _reset_failure_counter(session_id)
@@ -70,15 +104,24 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
             pass
         msg = "I've escalated this case to a human agent. You'll be contacted shortly."
         _store_chat(session_id, role="assistant", content=msg)
-        return {"session_id": session_id, "role": "assistant", "content": msg, "related": _related_questions(category)}
+        tag("source", "escalation")
+        return {"session_id": session_id, "role": "assistant", "content": msg, "related": _get_fallback_questions(category)[:3]}
 
     # Check for resolution confirmation keywords
-    if _is_resolution_confirmation(content):
+    if intents.resolved or local_intent == "resolved":
         _mark_ticket_resolved(session_id, user_email)
         _store_chat(session_id, role="assistant", content="Great! I've marked your case as resolved. Thank you for confirming!")
-        return {"session_id": session_id, "role": "assistant", "content": "Great! I've marked your case as resolved. Thank you for confirming!", "related": _related_questions(category)}
+        tag("source", "resolution")
+        return {"session_id": session_id, "role": "assistant", "content": "Great! I've marked your case as resolved. Thank you for confirming!", "related": _get_fallback_questions(category)[:3]}
+
+    if local_intent == "greeting":
+        msg = "Hi! How can I help you today?"
+        _store_chat(session_id, role="assistant", content=msg)
+        tag("source", "greeting")
+        return {"session_id": session_id, "role": "assistant", "content": msg, "related": _get_fallback_questions(category)[:3]}
 
-    cached = redis.get(f"faq:{content.lower()}")
+    with stage("answer_cache"):
+        cached = answer_cache.get(content)
     if cached:
         answer = cached
         _store_chat(session_id, role="assistant", content=answer)
@@ -86,31 +129,31 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
         if _should_suggest_resolution(answer, content):
             answer += "\n\n✅ Does this answer resolve your issue? If so, please let me know by saying 'yes, resolved' or 'that helps, thanks'."
             _schedule_auto_resolve(session_id, user_email, delay_seconds=120)
+        tag("source", "cache")
         return {"session_id": session_id, "role": "assistant", "content": answer, "related": _related_questions(category)}
 
     # naive answer using FAQs in Postgres
     answer = _lookup_faq_answer(content)
     if answer:
-        redis.setex(f"faq:{content.lower()}", 3600, answer)
+        answer_cache.put(content, answer)
         # Check if this FAQ answer might resolve the issue
         if _should_suggest_resolution(answer, content):
             answer += "\n\n✅ Does this answer resolve your issue? If so, please let me know by saying 'yes, resolved' or 'that helps, thanks'."
             _schedule_auto_resolve(session_id, user_email, delay_seconds=120)
         _store_chat(session_id, role="assistant", content=answer)
+        tag("source", "faq")
         return {"session_id": session_id, "role": "assistant", "content": answer, "related": _related_questions(category)}
 
-    # Always try Google Gemini next and store as new FAQ on success
-    gemini_answer = _gemini_answer(content)
+    # Always try Google Gemini next and store as new FAQ on success.
+    # Identical questions arriving together share one generation (and one FAQ row).
+    gemini_answer = await generation_flight.do(
+        normalize_query(content),
+        lambda: asyncio.to_thread(_gemini_answer_and_remember, content),
+        lookup=lambda: answer_cache.get(content),
+    )
     if gemini_answer:
-        try:
-            _create_faq(question=content, answer=gemini_answer)
-        except Exception:
-            pass
-        try:
-            redis.setex(f"faq:{content.lower()}", 3600, gemini_answer)
-        except Exception:
-            pass
         _store_chat(session_id, role="assistant", content=gemini_answer)
+        tag("source", "llm")
         return {"session_id": session_id, "role": "assistant", "content": gemini_answer, "related": _related_questions(category)}
 
     # handle fallback; try OpenAI if key provided
@@ -121,7 +164,8 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
             messages = ([{"role": "system", "content": "You are a helpful customer support assistant. Use FAQs if relevant."}] +
                         [{"role": m["role"], "content": m["content"]} for m in history] +
                         [{"role": "user", "content": content}])
-            completion = client.chat.completions.create(model="gpt-4o-mini", messages=messages, temperature=0.3)
+            with stage("llm_openai"):
+                completion = client.chat.completions.create(model="gpt-4o-mini", messages=messages, temperature=0.3)
             answer = completion.choices[0].message.content.strip()
             if answer:
                 # Check if this AI answer might resolve the issue
@@ -129,6 +173,7 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
                     answer += "\n\n✅ Does this answer resolve your issue? If so, please let me know by saying 'yes, resolved' or 'that helps, thanks'."
                     _schedule_auto_resolve(session_id, user_email, delay_seconds=120)
                 _store_chat(session_id, role="assistant", content=answer)
+                tag("source", "llm")
                 return {"session_id": session_id, "role": "assistant", "content": answer, "related": _related_questions(category)}
         except Exception:
             pass
@@ -137,7 +182,7 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             history = _load_chat_history(session_id)
             prompt = _format_prompt(history, content)
-            with httpx.Client(timeout=10) as client:
+            with httpx.Client(timeout=10) as client, stage("llm_ollama"):
                 resp = client.post("http://localhost:11434/api/generate", json={"model": "llama3.1:8b", "prompt": prompt, "stream": False})
                 if resp.status_code == 200:
                     data = resp.json()
@@ -148,6 +193,7 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
                             answer += "\n\n✅ Does this answer resolve your issue? If so, please let me know by saying 'yes, resolved' or 'that helps, thanks'."
                             _schedule_auto_resolve(session_id, user_email, delay_seconds=120)
                         _store_chat(session_id, role="assistant", content=answer)
+                        tag("source", "llm")
                         return {"session_id": session_id, "role": "assistant", "content": answer, "related": _related_questions(category)}
         except Exception:
             pass
@@ -155,38 +201,26 @@ async def handle_incoming_message(data: Dict[str, Any]) -> Dict[str, Any]:
     # handle fallback; count failures and escalate after many tries (avoid premature escalation)
     failures = _increment_failure_counter(session_id)
     if failures >= 5:
-        _create_ticket(user_email, subject=subject or f"Escalation for session {session_id}", description=f"User asked: {content}", category=category, customer_name=customer_name, session_id=session_id, status="escalated")
+        # Escalate the session's live ticket rather than opening a second one
+        _escalate_ticket(session_id=session_id, user_email=user_email, customer_name=customer_name, subject=subject or f"Escalation for session {session_id}", category=category, reason=f"User asked: {content}")
         _reset_failure_counter(session_id)
         msg = "I'm escalating your request to a human agent. You'll be contacted soon."
         _store_chat(session_id, role="assistant", content=msg)
+        tag("source", "escalation")
         return {"session_id": session_id, "role": "assistant", "content": msg, "related": _related_questions(category)}
 
     reply = "I'm not sure about that. Could you rephrase or provide more details?"
     _store_chat(session_id, role="assistant", content=reply)
+    tag("source", "fallback")
     return {"session_id": session_id, "role": "assistant", "content": reply, "related": _related_questions(category)}
 
 
+@traced("faq_lookup")
 def _lookup_faq_answer(query: str) -> str | None:
-    if not query:
-        return None
-    conn = get_postgres_connection(); cur = conn.cursor()
-    cur.execute("SELECT answer FROM faqs WHERE LOWER(question) = LOWER(%s) LIMIT 1", (query,))
-    row = cur.fetchone()
-    cur.close(); conn.close()
-    if row:
-        return row[0]
-    return None
-
-
-def _create_faq(question: str, answer: str) -> None:
-    conn = get_postgres_connection(); cur = conn.cursor()
-    try:
-        cur.execute("INSERT INTO faqs (question, answer) VALUES (%s, %s)", (question, answer))
-        conn.commit()
-    finally:
-        cur.close(); conn.close()
+    return lookup_faq_answer(query)
 
 
+@traced("llm_gemini")
 def _gemini_answer(query: str) -> str | None:
     if not settings.GOOGLE_API_KEY or not query:
         return None
@@ -220,6 +254,15 @@ def _gemini_answer(query: str) -> str | None:
         return None
 
 
+def _gemini_answer_and_remember(query: str) -> str | None:
+    """Generate an answer with Gemini and record it as an FAQ and cache entry."""
+    answer = _gemini_answer(query)
+    if answer:
+        enqueue_faq(query, answer)
+        answer_cache.put(query, answer)
+    return answer
+
+
 def _get_example_questions(category: str) -> str:
     """Get example questions for a category to guide Gemini."""
     examples = {
@@ -286,27 +329,33 @@ Generate {limit} similar questions, one per line:"""
         return []
 
 
+@traced("store_chat")
 def _store_chat(session_id: str, role: str, content: str, meta: Dict[str, Any] | None = None) -> None:
-    try:
-        col = get_case_memory_collection()
-        doc: Dict[str, Any] = {"session_id": session_id, "role": role, "content": content, "ts": datetime.utcnow()}
-        if meta:
-            # only store simple serializable fields
-            for k in ["user_email", "customer_name", "subject", "category"]:
-                v = meta.get(k)
-                if v is not None:
-                    doc[k] = v
-        col.insert_one(doc)
-    except Exception:
-        # Do not block responses if Mongo is temporarily unavailable
-        pass
-
+    doc: Dict[str, Any] = {"session_id": session_id, "role": role, "content": content, "ts": datetime.utcnow()}
+    if meta:
+        # only store simple serializable fields
+        for k in ["user_email", "customer_name", "subject", "category"]:
+            v = meta.get(k)
+            if v is not None:
+                doc[k] = v
+    # Buffered and bulk-inserted off the response path (see chat_writer.py)
+    enqueue_message(doc)
+
+@traced("history_load")
 def _load_chat_history(session_id: str):
     try:
-        col = get_case_memory_collection()
-        return list(col.find({"session_id": session_id}, {"_id": 0, "session_id": 0}))
+        # Hot case_memory plus whatever was archived (see case_archive.py)
+        stored = session_messages(session_id)
     except Exception:
-        return []
+        stored = []
+    # Include messages still waiting in the write-behind buffer
+    seen = {d["_id"] for d in stored}
+    history = stored + [dict(d) for d in pending_messages(session_id) if d["_id"] not in seen]
+    history.sort(key=lambda d: d.get("ts") or datetime.min)
+    for d in history:
+        d.pop("_id", None)
+        d.pop("session_id", None)
+    return history
 
 
 def _format_prompt(history, user_input: str) -> str:
@@ -360,51 +409,15 @@ def _append_related_faqs(answer: str, category: str | None) -> str:
 #     return rows[:limit]  # Ensure we don't exceed limit
 
 def _fetch_related_faqs(category: str | None, limit: int = 3) -> List[Tuple[str, str]]:
-    """Fetch FAQs filtered by category keywords."""
-    conn = get_postgres_connection()
-    cur = conn.cursor()
+    """Fetch random FAQs tagged with the category (see faq_catalog.CATEGORY_KEYWORDS)."""
     try:
-        # Normalize category to get the main keyword
-        category_keyword = None
-        if category:
-            category_keyword = category.split()[0].lower()  # "General Question" -> "general"
-        
-        print(f"🔍 DEBUG: _fetch_related_faqs - category_keyword='{category_keyword}'", flush=True)
-        
-        # Try to fetch category-specific FAQs first
-        if category_keyword:
-            # Map categories to relevant keywords
-            keyword_map = {
-                'general': ['password', 'login', 'account', 'contact', 'support', 'help'],
-                'technical': ['error', 'loading', 'crash', 'bug', 'issue', 'problem', 'fix'],
-                'billing': ['bill', 'payment', 'subscription', 'invoice', 'refund', 'charge', 'price', 'cost'],
-                'account': ['profile', 'settings', 'username', 'delete', 'export', 'privacy']
-            }
-            
-            keywords = keyword_map.get(category_keyword, [])
-            if keywords:
-                # Build a query to find FAQs matching any of the keywords
-                keyword_conditions = ' OR '.join(['LOWER(question) LIKE %s'] * len(keywords))
-                keyword_params = [f'%{kw}%' for kw in keywords]
-                
-                cur.execute(
-                    f"SELECT question, answer FROM faqs WHERE {keyword_conditions} ORDER BY RANDOM() LIMIT %s",
-                    (*keyword_params, limit)
-                )
-                rows = cur.fetchall()
-                print(f"🔍 DEBUG: Found {len(rows)} FAQs matching category keywords", flush=True)
-                if rows:
-                    return [(r[0], r[1]) for r in rows]
-        
+        rows = sample_related_faqs(category, limit)
+        log_event(logger, logging.DEBUG, "related.faqs", category=category, found=len(rows))
         # Don't fallback to random FAQs - return empty so Gemini can generate
-        print(f"🔍 DEBUG: No category-specific FAQs found, returning empty", flush=True)
-        return []
+        return rows
     except Exception as e:
-        print(f"Error fetching FAQs: {e}", flush=True)
+        log_event(logger, logging.WARNING, "related.faqs_failed", str(e), category=category)
         return []
-    finally:
-        cur.close()
-        conn.close()
 
 
 # def _related_questions(category: str | None, limit: int = 3) -> List[str]:
@@ -412,12 +425,11 @@ def _fetch_related_faqs(category: str | None, limit: int = 3) -> List[Tuple[str,
 #     pairs = _fetch_related_faqs(category, limit)
 #     return [q for q, _ in pairs]
 
+@traced("related_questions")
 def _related_questions(category: str | None, limit: int = 3) -> List[str]:
     """Return related FAQ questions: prioritize Gemini for fresh questions, then fallback."""
     result = []
-    
-    print(f"🔍 DEBUG: _related_questions called with category='{category}'", flush=True)
-    
+
     # Step 1: Try Gemini FIRST for fresh, relevant questions (avoid repetition)
     category_prompts = {
         'billing': 'customer billing, payments, subscriptions, invoices, and refunds',
@@ -439,7 +451,7 @@ def _related_questions(category: str | None, limit: int = 3) -> List[str]:
     for q in gemini_questions:
         if len(q) > 10 and '?' in q and len(result) < limit:
             result.append(q)
-    print(f"🔍 DEBUG: Got {len(result)} questions from Gemini", flush=True)
+    from_gemini = len(result)
     
     # Step 2: If Gemini didn't provide enough, try database
     if len(result) < limit:
@@ -448,20 +460,21 @@ def _related_questions(category: str | None, limit: int = 3) -> List[str]:
         for q, _ in pairs:
             if q not in result and len(result) < limit:
                 result.append(q)
-        print(f"🔍 DEBUG: Added {len([q for q, _ in pairs if q in result])} questions from database", flush=True)
     
     # Step 3: If still not enough, use hardcoded fallback questions
+    from_db = len(result) - from_gemini
     if len(result) < limit:
         fallback_questions = _get_fallback_questions(category)
         for q in fallback_questions:
             if q not in result and len(result) < limit:
                 result.append(q)
-        print(f"🔍 DEBUG: Added fallback questions, total now: {len(result)}", flush=True)
-    
-    print(f"🔍 DEBUG: _related_questions returning {len(result)} questions: {result}", flush=True)
+
+    log_event(logger, logging.DEBUG, "related.questions", category=category,
+              gemini=from_gemini, database=from_db, fallback=len(result) - from_gemini - from_db)
     return result[:limit]  # Ensure we don't exceed limit
 
 
+@traced("failure_counter")
 def _increment_failure_counter(session_id: str) -> int:
     redis = get_redis_client()
     key = f"fail:{session_id}"
@@ -480,15 +493,14 @@ def _reset_failure_counter(session_id: str) -> None:
 def _create_ticket(user_email: str, subject: str, description: str, category: str | None = None, customer_name: str | None = None, session_id: str | None = None, status: str = 'open') -> None:
     conn = get_postgres_connection(); cur = conn.cursor()
     cur.execute(
-        """
-        INSERT INTO tickets (user_email, customer_name, subject, category, description, status, priority, session_id)
-        VALUES (%s, %s, %s, %s, %s, %s, 'high', %s)
-        """,
-        (user_email, customer_name, subject, category, description, status, session_id),
+        INSERT_TICKET_UNLESS_LIVE,
+        dict(user_email=user_email, customer_name=customer_name, subject=subject, category=category,
+             description=description, status=status, priority='high', session_id=session_id),
     )
     conn.commit(); cur.close(); conn.close()
 
 
+@traced("ticket_escalate")
 def _escalate_ticket(session_id: str | None, user_email: str, customer_name: str | None, subject: str | None, category: str | None, reason: str | None = None) -> None:
     """Escalate an existing open/in_progress ticket for the session or create one if missing."""
     if not session_id:
@@ -496,13 +508,11 @@ def _escalate_ticket(session_id: str | None, user_email: str, customer_name: str
     conn = get_postgres_connection(); cur = conn.cursor()
     try:
         cur.execute(
-            """
-            UPDATE tickets 
-            SET status = 'escalated', updated_at = NOW(), description = CONCAT(description, '\n\n[Escalated] ', %s)
-            WHERE session_id = %s AND user_email = %s AND status IN ('open','in_progress')
-            RETURNING id
-            """,
-            (reason or 'Manual escalation', session_id, user_email),
+            transition_sql(
+                "status = 'escalated', updated_at = NOW()",
+                "session_id = %s AND user_email = %s AND status IN ('open','in_progress')",
+            ),
+            (session_id, user_email, 'escalated', event_payload({"reason": reason or 'Manual escalation'})),
         )
         row = cur.fetchone()
         if not row:
@@ -523,43 +533,13 @@ def _escalate_ticket(session_id: str | None, user_email: str, customer_name: str
         cur.close(); conn.close()
 
 
-def _is_resolution_confirmation(content: str) -> bool:
-    """Check if user message indicates they're satisfied with the solution"""
-    resolution_keywords = [
-        'yes, resolved', 'that helps, thanks', 'resolved', 'solved', 'fixed', 
-        'that works', 'perfect', 'thank you', 'thanks', 'great', 'awesome',
-        'that answers it', 'that\'s what i needed', 'exactly what i needed',
-        'problem solved', 'issue resolved', 'all set', 'good to go'
-    ]
-    content_lower = content.lower().strip()
-    return any(keyword in content_lower for keyword in resolution_keywords)
-
-
 def _should_suggest_resolution(answer: str, user_question: str) -> bool:
     """Determine if the answer is comprehensive enough to suggest resolution"""
-    # Check if answer contains solution indicators
-    solution_indicators = [
-        'here\'s how', 'follow these steps', 'to fix this', 'solution is',
-        'you need to', 'try this', 'do the following', 'here\'s what',
-        'the issue is', 'this should resolve', 'this will fix'
-    ]
-    
-    # Check if user question seems like a problem statement
-    problem_indicators = [
-        'how do i', 'how can i', 'why is', 'what\'s wrong', 'not working',
-        'error', 'problem', 'issue', 'trouble', 'help', 'fix', 'solve'
-    ]
-    
-    answer_lower = answer.lower()
-    question_lower = user_question.lower()
-    
-    has_solution = any(indicator in answer_lower for indicator in solution_indicators)
-    is_problem = any(indicator in question_lower for indicator in problem_indicators)
-    
     # Suggest resolution if we have a solution for what seems like a problem
-    return has_solution and is_problem and len(answer) > 50  # Substantial answer
+    return len(answer) > 50 and offers_solution(answer) and classify_message(user_question).problem  # Substantial answer
 
 
+@traced("auto_resolve_schedule")
 def _schedule_auto_resolve(session_id: str, user_email: str, delay_seconds: int = 120) -> None:
     """Mark resolved after delay if no new user message arrives."""
     try:
@@ -591,50 +571,51 @@ def _schedule_auto_resolve(session_id: str, user_email: str, delay_seconds: int
         pass
 
 
+@traced("ticket_resolve")
 def _mark_ticket_resolved(session_id: str, user_email: str) -> None:
     """Mark the ticket as resolved for this session and generate summary"""
+    # Counters kept per session by chat_writer, plus messages still buffered
+    try:
+        counters = session_counters(session_id)
+    except Exception:
+        counters = None
+    if counters is None:
+        counters = session_summary_from_history(_load_chat_history(session_id))
+    summary = _generate_resolution_summary(counters)
+
     conn = get_postgres_connection(); cur = conn.cursor()
-    
-    # Get conversation history for summary
-    history = _load_chat_history(session_id)
-    summary = _generate_resolution_summary(history)
-    
     cur.execute(
-        """
-        UPDATE tickets 
-        SET status = 'resolved', updated_at = NOW(), description = CONCAT(description, '\n\n--- RESOLUTION SUMMARY ---\n', %s)
-        WHERE session_id = %s AND user_email = %s AND status IN ('open', 'escalated')
-        """,
-        (summary, session_id, user_email)
+        transition_sql(
+            "status = 'resolved', updated_at = NOW(), resolution_summary = %s",
+            "session_id = %s AND user_email = %s AND status IN ('open', 'escalated')",
+        ),
+        (event_payload(summary), session_id, user_email, 'resolved', event_payload(summary)),
     )
     conn.commit(); cur.close(); conn.close()
+    _open_sessions.discard(session_id)
 
 
-def _generate_resolution_summary(history: List[Dict[str, str]]) -> str:
-    """Generate a summary of how the issue was resolved"""
-    if not history:
-        return "Issue resolved - no conversation history available."
-    
-    # Extract key information
-    user_messages = [h['content'] for h in history if h['role'] == 'user']
-    assistant_messages = [h['content'] for h in history if h['role'] == 'assistant']
+def _generate_resolution_summary(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Structured summary of how the issue was resolved (tickets.resolution_summary)"""
+    summary: Dict[str, Any] = {
+        "message_count": counters["message_count"],
+        "resolved_at": datetime.now().isoformat(),
+        "customer_confirmed": True,
+    }
+    if not counters["message_count"]:
+        summary["note"] = "no conversation history available"
+        return summary
     
-    if not user_messages or not assistant_messages:
-        return "Issue resolved - limited conversation history."
+    if not counters["user_messages"] or not counters["assistant_messages"]:
+        summary["note"] = "limited conversation history"
+        return summary
     
     # Simple summary based on conversation flow
-    initial_issue = user_messages[0] if user_messages else "Unknown issue"
-    final_response = assistant_messages[-1] if assistant_messages else "No final response"
-    
-    summary = f"""
-RESOLUTION SUMMARY:
-- Initial Issue: {initial_issue[:100]}{'...' if len(initial_issue) > 100 else ''}
-- Resolution Method: {'FAQ-based solution' if 'FAQ' in final_response else 'AI-generated solution'}
-- Conversation Length: {len(history)} messages
-- Resolution Time: {datetime.now().isoformat()}
-- Customer Confirmed: Yes
-"""
-    return summary.strip()
+    initial_issue = counters["first_user_message"] or ""
+    final_response = counters["last_assistant_message"] or ""
+    summary["initial_issue"] = f"{initial_issue[:100]}{'...' if len(initial_issue) > 100 else ''}"
+    summary["method"] = 'FAQ-based solution' if 'FAQ' in final_response else 'AI-generated solution'
+    return summary
 
 
 
@@ -685,6 +666,45 @@ def _get_fallback_questions(category: str | None) -> List[str]:
     return fallback_by_category["General"]
 
 
+class _KnownOpenSessions:
+    """Sessions this worker recently saw with an open ticket.
+
+    Lets steady-state messages skip Postgres entirely. Entries expire so that
+    tickets closed elsewhere (admin UI, other workers) are noticed eventually.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            expires = self._expires.get(session_id)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._expires[session_id]
+                return False
+            return True
+
+    def add(self, session_id: str) -> None:
+        with self._lock:
+            self._expires[session_id] = time.monotonic() + self.ttl_seconds
+            self._expires.move_to_end(session_id)
+            while len(self._expires) > self.max_size:
+                self._expires.popitem(last=False)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._expires.pop(session_id, None)
+
+
+_open_sessions = _KnownOpenSessions(settings.OPEN_TICKET_CACHE_SECONDS, settings.OPEN_TICKET_CACHE_SIZE)
+
+
+@traced("ticket_upsert")
 def _ensure_open_ticket(
     session_id: str | None,
     user_email: str,
@@ -696,34 +716,20 @@ def _ensure_open_ticket(
     """Create an open ticket for this session if none exists yet.
 
     This ensures admin Tickets/Analytics reflect activity as soon as the user starts chatting.
+    INSERT_TICKET_UNLESS_LIVE makes concurrent first messages race-free.
     """
-    if not session_id:
+    if not session_id or session_id in _open_sessions:
         return
+    ticket_subject = subject or (f"Support request from {customer_name}" if customer_name else f"Support request {session_id}")
+    description = (first_message or "").strip() or "User started a chat session."
     conn = get_postgres_connection(); cur = conn.cursor()
     try:
         cur.execute(
-            """
-            SELECT id FROM tickets
-            WHERE session_id = %s AND status IN ('open','in_progress','escalated')
-            ORDER BY id DESC LIMIT 1
-            """,
-            (session_id,),
-        )
-        row = cur.fetchone()
-        if row:
-            return  # Ticket already open for this session
-
-        # Create a new open ticket
-        ticket_subject = subject or (f"Support request from {customer_name}" if customer_name else f"Support request {session_id}")
-        description = (first_message or "").strip() or "User started a chat session."
-        cur.execute(
-            """
-            INSERT INTO tickets (user_email, customer_name, subject, category, description, status, priority, session_id)
-            VALUES (%s, %s, %s, %s, %s, 'open', 'medium', %s)
-            """,
-            (user_email, customer_name, ticket_subject, category, description, session_id),
+            INSERT_TICKET_UNLESS_LIVE,
+            dict(user_email=user_email, customer_name=customer_name, subject=ticket_subject, category=category,
+                 description=description, status='open', priority='medium', session_id=session_id),
         )
         conn.commit()
     finally:
         cur.close(); conn.close()
-
+    _open_sessions.add(session_id)
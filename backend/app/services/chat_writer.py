@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Set
+import threading
+import time
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from ..db.mongo import get_case_memory_collection
+from ..core.config import settings
+from .batching import BatchWriter
+from .sessions import record_messages, rebuild_session_counters, session_summary
+from .case_archive import session_messages
+
+
+_collection = None
+
+# Held while a flushed chunk moves from "pending" to "counted in sessions", so a
+# reader never sees it in both (or neither) places.
+_counters_lock = threading.Lock()
+# Sessions whose stored counters missed a batch; recomputed from history on the next flush
+_stale_sessions: Set[str] = set()
+
+
+def _case_memory():
+    # One client for the flusher thread instead of one per message
+    global _collection
+    if _collection is None:
+        _collection = get_case_memory_collection()
+    return _collection
+
+
+_DUPLICATE_KEY = 11000
+
+
+def _insert_messages(docs: List[Dict[str, Any]]) -> None:
+    try:
+        _insert_with_retry(docs)
+    except Exception:
+        # Part of the batch may have landed; the history rebuild counts whatever did
+        with _counters_lock:
+            _stale_sessions.update(d["session_id"] for d in docs if d.get("session_id"))
+            chat_writer.release(docs)
+        raise
+    # The insert stands even if the session counters fail; those are repaired separately
+    with _counters_lock:
+        _update_counters(docs)
+        chat_writer.release(docs)
+
+
+def _insert_with_retry(docs: List[Dict[str, Any]]) -> None:
+    """insert_many with backoff, retrying only the documents that did not land.
+
+    Ids are assigned at enqueue time, so a duplicate key error means an earlier
+    attempt already stored that document.
+    """
+    remaining = docs
+    for attempt in range(settings.CHAT_WRITER_RETRIES + 1):
+        try:
+            _case_memory().insert_many(remaining, ordered=False)
+            return
+        except BulkWriteError as exc:
+            if exc.details.get("writeConcernErrors"):
+                failed = remaining  # which documents stuck is unknown; duplicates sort that out
+            else:
+                failed = [
+                    remaining[err["index"]] for err in exc.details.get("writeErrors", [])
+                    if err.get("code") != _DUPLICATE_KEY
+                ]
+            if not failed:
+                return
+            remaining, error = failed, exc
+        except PyMongoError as exc:
+            error = exc
+        if attempt < settings.CHAT_WRITER_RETRIES:
+            time.sleep(settings.CHAT_WRITER_RETRY_SECONDS * 2 ** attempt)
+    raise error
+
+
+def _update_counters(docs: List[Dict[str, Any]]) -> None:
+    # Session summaries follow in the same flush, one upsert per session in the batch
+    try:
+        record_messages(docs)
+    except Exception:
+        _stale_sessions.update(d["session_id"] for d in docs if d.get("session_id"))
+    # The batch is already in case_memory, so a rebuild counts it exactly once
+    for session_id in list(_stale_sessions):
+        try:
+            rebuild_session_counters(session_id, session_messages(session_id))
+            _stale_sessions.discard(session_id)
+        except Exception:
+            break
+
+
+def enqueue_message(doc: Dict[str, Any]) -> bool:
+    """Buffer a case_memory document for the next bulk insert."""
+    # Assign the id up front so readers can merge buffered and stored copies
+    doc.setdefault("_id", ObjectId())
+    return chat_writer.submit(doc)
+
+
+def pending_messages(session_id: str) -> List[Dict[str, Any]]:
+    """Messages for a session that are buffered but may not be in Mongo yet."""
+    return chat_writer.pending(session_id)
+
+
+def session_counters(session_id: str) -> Dict[str, Any] | None:
+    """session_summary including buffered messages; None when the stored counters are not to be trusted."""
+    with _counters_lock:
+        if session_id in _stale_sessions:
+            return None
+        return session_summary(session_id, pending_messages(session_id))
+
+
+chat_writer = BatchWriter(
+    "case_memory",
+    _insert_messages,
+    max_batch=settings.CHAT_WRITER_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITER_FLUSH_SECONDS,
+    max_queue=settings.CHAT_WRITER_MAX_QUEUE,
+    overflow=settings.CHAT_WRITER_OVERFLOW,
+    block_seconds=settings.CHAT_WRITER_BLOCK_SECONDS,
+    key=lambda d: d.get("session_id"),
+)
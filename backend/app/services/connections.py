@@ -0,0 +1,146 @@
+from typing import Any, Dict
+from dataclasses import dataclass
+import asyncio
+import os
+import time
+
+from ..core.config import settings
+from ..core.tracing import set_socket_connections, count_socket_closed
+
+
+@dataclass
+class _Conn:
+    sio: Any  # the server (JSON or msgpack) that owns the connection
+    ip: str
+    connected_at: float
+    last_seen: float
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size; None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ConnectionManager:
+    """Tracks live Socket.IO connections of this worker.
+
+    Dead peers are dropped by the engine.io heartbeat; this adds what the
+    heartbeat cannot see, both off by default: with ``idle_timeout``, clients
+    that keep answering pings but have not sent a chat message for that many
+    seconds are disconnected by a periodic reaper, and with ``max_per_ip`` one
+    address may hold at most that many connections.
+    """
+
+    def __init__(self, idle_timeout: float, reap_interval: float, max_per_ip: int, trust_forwarded_for: bool):
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.max_per_ip = max_per_ip
+        self.trust_forwarded_for = trust_forwarded_for
+        self._conns: Dict[str, _Conn] = {}
+        self._per_ip: Dict[str, int] = {}
+        self._reaper: asyncio.Task | None = None
+        self._baseline_rss = _rss_bytes()
+        self._stats = {"opened": 0, "closed": 0, "reaped": 0, "refused": 0}
+
+    @classmethod
+    def from_settings(cls) -> "ConnectionManager":
+        return cls(
+            idle_timeout=settings.SOCKET_IDLE_TIMEOUT_SECONDS,
+            reap_interval=settings.SOCKET_REAP_INTERVAL_SECONDS,
+            max_per_ip=settings.SOCKET_MAX_PER_IP,
+            trust_forwarded_for=settings.SOCKET_TRUST_FORWARDED_FOR,
+        )
+
+    def client_ip(self, environ: Dict[str, Any]) -> str:
+        if self.trust_forwarded_for:
+            forwarded = environ.get("HTTP_X_FORWARDED_FOR")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return environ.get("REMOTE_ADDR") or "unknown"
+
+    def opened(self, sio, sid: str, environ: Dict[str, Any]) -> bool:
+        """Register a new connection; False means refuse it."""
+        self._ensure_reaper()
+        ip = self.client_ip(environ)
+        if self.max_per_ip and self._per_ip.get(ip, 0) >= self.max_per_ip:
+            self._stats["refused"] += 1
+            count_socket_closed("ip_limit")
+            return False
+        now = time.monotonic()
+        self._conns[sid] = _Conn(sio, ip, now, now)
+        self._per_ip[ip] = self._per_ip.get(ip, 0) + 1
+        self._stats["opened"] += 1
+        set_socket_connections(len(self._conns))
+        return True
+
+    def touch(self, sid: str) -> None:
+        conn = self._conns.get(sid)
+        if conn is not None:
+            conn.last_seen = time.monotonic()
+
+    def closed(self, sid: str, reason: str = "disconnect") -> None:
+        conn = self._conns.pop(sid, None)
+        if conn is None:
+            return
+        left = self._per_ip.get(conn.ip, 1) - 1
+        if left > 0:
+            self._per_ip[conn.ip] = left
+        else:
+            self._per_ip.pop(conn.ip, None)
+        self._stats["closed"] += 1
+        count_socket_closed(reason)
+        set_socket_connections(len(self._conns))
+
+    def _ensure_reaper(self) -> None:
+        # Started from the first connect so it runs on the server's loop
+        if self.idle_timeout and (self._reaper is None or self._reaper.done()):
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_forever())
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap()
+            except Exception:
+                pass
+
+    async def reap(self) -> int:
+        """Disconnect connections idle for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [(sid, c.sio) for sid, c in self._conns.items() if c.last_seen < cutoff]
+        for sid, sio in idle:
+            self._stats["reaped"] += 1
+            # Forget it first; the disconnect handler's closed() then is a no-op
+            self.closed(sid, "idle")
+            await sio.disconnect(sid)
+        set_socket_connections(len(self._conns), self.memory_per_connection())
+        return len(idle)
+
+    def memory_per_connection(self) -> float | None:
+        rss = _rss_bytes()
+        if rss is None or self._baseline_rss is None or not self._conns:
+            return None
+        return max(rss - self._baseline_rss, 0) / len(self._conns)
+
+    def stop(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "live": len(self._conns),
+            "addresses": len(self._per_ip),
+            "busiest_address_connections": max(self._per_ip.values(), default=0),
+            "memory_per_connection_bytes": self.memory_per_connection(),
+            "idle_timeout_seconds": self.idle_timeout,
+            "max_per_ip": self.max_per_ip,
+        }
+
+
+connections = ConnectionManager.from_settings()
@@ -0,0 +1,459 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from dataclasses import dataclass, replace
+from datetime import datetime
+import hashlib
+import os
+import random
+import select
+import threading
+import time
+import psycopg2.extras
+
+from ..db.postgres import get_postgres_connection
+from ..db.redis_client import get_redis_client
+from ..core.config import settings
+from .answer_cache import answer_cache
+
+
+FAQ_CHANNEL = "faq_changed"
+
+
+# Chat categories map to question keywords; an FAQ is tagged with every
+# category whose keywords appear in its question.
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    'general': ['password', 'login', 'account', 'contact', 'support', 'help'],
+    'technical': ['error', 'loading', 'crash', 'bug', 'issue', 'problem', 'fix'],
+    'billing': ['bill', 'payment', 'subscription', 'invoice', 'refund', 'charge', 'price', 'cost'],
+    'account': ['profile', 'settings', 'username', 'delete', 'export', 'privacy'],
+}
+
+
+def category_tag(category: str | None) -> str | None:
+    """"General Question" -> "general"."""
+    if not category or not category.split():
+        return None
+    return category.split()[0].lower()
+
+
+def tags_for_question(question: str) -> List[str]:
+    q = (question or "").lower()
+    return [tag for tag, keywords in CATEGORY_KEYWORDS.items() if any(kw in q for kw in keywords)]
+
+
+def insert_faq_tags(cur, rows: List[Tuple[int, str]]) -> None:
+    """Tag freshly written FAQs given (id, question) rows. Caller commits."""
+    pairs = [(faq_id, tag) for faq_id, question in rows for tag in tags_for_question(question)]
+    if pairs:
+        psycopg2.extras.execute_values(cur, "INSERT INTO faq_tags (faq_id, tag) VALUES %s ON CONFLICT DO NOTHING", pairs)
+
+
+def retag_faq(cur, faq_id: int, question: str) -> None:
+    cur.execute("DELETE FROM faq_tags WHERE faq_id = %s", (faq_id,))
+    insert_faq_tags(cur, [(faq_id, question)])
+
+
+def untag_faq(cur, faq_id: int) -> None:
+    cur.execute("DELETE FROM faq_tags WHERE faq_id = %s", (faq_id,))
+
+
+def backfill_faq_tags(after_id: int | None = None) -> None:
+    """Tag existing FAQs once, set-based, when the tag table is still empty.
+
+    With ``after_id``, tag only FAQs with a larger id (rows bulk-loaded
+    without going through insert_faq_tags), whether or not tags exist.
+    """
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        if after_id is None:
+            cur.execute("SELECT 1 FROM faq_tags LIMIT 1")
+            if cur.fetchone():
+                return
+        for tag, keywords in CATEGORY_KEYWORDS.items():
+            cur.execute(
+                """
+                INSERT INTO faq_tags (faq_id, tag)
+                SELECT id, %s FROM faqs WHERE id > %s AND LOWER(question) LIKE ANY(%s)
+                ON CONFLICT DO NOTHING
+                """,
+                (tag, after_id or 0, [f"%{kw}%" for kw in keywords]),
+            )
+        # No faqs row changed, so the faqs trigger stays quiet; have snapshots re-read tags
+        cur.execute("SELECT pg_notify(%s, 'TAGS')", (FAQ_CHANNEL,))
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+
+
+@dataclass(frozen=True)
+class FaqSnapshot:
+    """Immutable view of the faqs table; a new one is swapped in on every change."""
+
+    version: str
+    items: Tuple[Tuple[int, str, str], ...]  # (id, question, answer), newest first
+    by_id: Dict[int, Tuple[str, str]]
+    by_question: Dict[str, str]  # lower(question) -> answer
+    by_norm: Dict[str, int]  # question_norm -> id
+    tag_ids: Dict[str, List[int]]
+    loaded_at: float
+
+
+_EMPTY = FaqSnapshot("", (), {}, {}, {}, {}, 0.0)
+
+# Rows whose updated_at is this close to the newest one seen are read again on every
+# refresh, so a transaction that committed late (NOW() is its start time) is not missed.
+_DELTA_SLACK_SECONDS = 60
+
+
+def _row_hash(faq_id: int, question: str, answer: str) -> int:
+    return int.from_bytes(hashlib.sha1(f"{faq_id}\x1f{question}\x1f{answer}".encode("utf-8")).digest()[:8], "big")
+
+
+class FaqCatalog:
+    """Per-worker in-memory FAQ snapshot kept fresh by change notifications.
+
+    Writes to faqs fire a Postgres NOTIFY on ``FAQ_CHANNEL`` (via a trigger
+    installed by init_schema; backfill_faq_tags notifies "TAGS" itself) and
+    writers also publish on the Redis channel of the same name. A listener
+    thread refreshes the snapshot when either arrives, preferring Postgres
+    LISTEN and falling back to Redis pub/sub. Readers only touch ``snapshot``
+    and never do I/O once the first load has happened.
+
+    Only TRUNCATE (or a row count that no longer adds up after a DELETE) reloads
+    the whole table. Otherwise a refresh reads the rows with a new id or a recent
+    updated_at and patches the snapshot; when nothing differs, as for the echo of
+    this worker's own write, the snapshot is kept as is. The version is an
+    order-independent hash of the rows, so all workers agree on it.
+    """
+
+    def __init__(self, min_reload_seconds: float, listen_timeout: float = 5.0):
+        self.min_reload_seconds = min_reload_seconds
+        self.listen_timeout = listen_timeout
+        self._snapshot: FaqSnapshot | None = None
+        self._load_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._token = os.urandom(8).hex()  # tags this worker's Redis messages
+        self.source: str | None = None  # "postgres" or "redis" once listening
+        self._reset()
+
+    def _reset(self) -> None:
+        # Indexes behind the snapshot, only touched under _load_lock
+        self._rows: Dict[int, Tuple[str, str, str | None]] = {}  # id -> (question, answer, norm)
+        self._faq_tags: Dict[int, Set[str]] = {}
+        self._tag_members: Dict[str, Set[int]] = {}
+        self._question_ids: Dict[str, Set[int]] = {}
+        self._norm_ids: Dict[str, Set[int]] = {}
+        self._hash = 0
+        self._max_id = 0
+        self._watermark: datetime | None = None
+
+    @property
+    def snapshot(self) -> FaqSnapshot:
+        snap = self._snapshot
+        if snap is None:
+            snap = self.reload()
+        return snap
+
+    def reload(self) -> FaqSnapshot:
+        """Load both tables from scratch."""
+        with self._load_lock:
+            conn = get_postgres_connection(); cur = conn.cursor()
+            try:
+                cur.execute("SELECT id, question, answer, question_norm, updated_at FROM faqs")
+                rows = cur.fetchall()
+                cur.execute("SELECT faq_id, tag FROM faq_tags")
+                tag_rows = cur.fetchall()
+            finally:
+                cur.close(); conn.close()
+            self._reset()
+            return self._apply(_EMPTY, rows, set(), _group_tags(tag_rows))
+
+    def refresh(self, check_deletes: bool = False) -> bool:
+        """Apply rows inserted or updated since the last load; True if the snapshot changed.
+
+        With ``check_deletes``, falls back to a full reload when the table holds
+        fewer rows than the snapshot, i.e. some were deleted elsewhere.
+        """
+        if self._snapshot is None:
+            self.reload()
+            return True
+        with self._load_lock:
+            conn = get_postgres_connection(); cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    SELECT id, question, answer, question_norm, updated_at FROM faqs
+                    WHERE id > %s OR updated_at >= %s::timestamp - make_interval(secs => %s)
+                    """,
+                    (self._max_id, self._watermark or datetime.min, _DELTA_SLACK_SECONDS),
+                )
+                rows = [r for r in cur.fetchall() if self._rows.get(r[0]) != (r[1], r[2], r[3])]
+                tags: Dict[int, Set[str]] = {}
+                if rows:
+                    cur.execute("SELECT faq_id, tag FROM faq_tags WHERE faq_id = ANY(%s)", ([r[0] for r in rows],))
+                    tags = _group_tags(cur.fetchall())
+                count = None
+                if check_deletes:
+                    cur.execute("SELECT COUNT(*) FROM faqs")
+                    count = cur.fetchone()[0]
+            finally:
+                cur.close(); conn.close()
+            if rows:
+                self._apply(self._snapshot, rows, set(), tags)
+            if count is None or count == len(self._rows):
+                return bool(rows)
+        self.reload()
+        return True
+
+    def reload_tags(self) -> None:
+        """Re-read faq_tags only, after tags were written without touching faqs."""
+        if self._snapshot is None:
+            self.reload()
+            return
+        with self._load_lock:
+            conn = get_postgres_connection(); cur = conn.cursor()
+            try:
+                cur.execute("SELECT faq_id, tag FROM faq_tags")
+                tags = _group_tags(cur.fetchall())
+            finally:
+                cur.close(); conn.close()
+            self._faq_tags = {i: t for i, t in tags.items() if i in self._rows}
+            self._tag_members = {}
+            for faq_id, faq_tags in self._faq_tags.items():
+                for tag in faq_tags:
+                    self._tag_members.setdefault(tag, set()).add(faq_id)
+            self._snapshot = replace(
+                self._snapshot,
+                tag_ids={tag: sorted(ids) for tag, ids in self._tag_members.items()},
+                loaded_at=time.time(),
+            )
+
+    def _apply(self, snap: FaqSnapshot, rows, deleted: Set[int], tags: Dict[int, Set[str]]) -> FaqSnapshot:
+        """Patch ``snap`` with upserted ``rows`` and ``deleted`` ids. Caller holds _load_lock."""
+        by_id = dict(snap.by_id)
+        by_question = dict(snap.by_question)
+        by_norm = dict(snap.by_norm)
+        questions: Set[str] = set()
+        norms: Set[str] = set()
+        touched_tags: Set[str] = set()
+        upserted = {r[0] for r in rows}
+        appended_only = not snap.items or not (deleted or any(i <= self._max_id for i in upserted))
+
+        for faq_id in deleted | upserted:
+            old = self._rows.pop(faq_id, None)
+            if old:
+                self._hash ^= _row_hash(faq_id, old[0], old[1])
+                questions.add(old[0].lower()); self._question_ids[old[0].lower()].discard(faq_id)
+                if old[2]:
+                    norms.add(old[2]); self._norm_ids[old[2]].discard(faq_id)
+                by_id.pop(faq_id, None)
+            for tag in self._faq_tags.pop(faq_id, ()):
+                touched_tags.add(tag); self._tag_members[tag].discard(faq_id)
+
+        for faq_id, question, answer, norm, updated_at in rows:
+            self._rows[faq_id] = (question, answer, norm)
+            self._hash ^= _row_hash(faq_id, question, answer)
+            questions.add(question.lower()); self._question_ids.setdefault(question.lower(), set()).add(faq_id)
+            if norm:
+                norms.add(norm); self._norm_ids.setdefault(norm, set()).add(faq_id)
+            by_id[faq_id] = (question, answer)
+            faq_tags = tags.get(faq_id, set())
+            if faq_tags:
+                self._faq_tags[faq_id] = faq_tags
+            for tag in faq_tags:
+                touched_tags.add(tag); self._tag_members.setdefault(tag, set()).add(faq_id)
+            self._max_id = max(self._max_id, faq_id)
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+
+        # Oldest row wins, matching what an admin most likely curated first
+        for key in questions:
+            ids = self._question_ids.get(key)
+            if ids:
+                by_question[key] = self._rows[min(ids)][1]
+            else:
+                by_question.pop(key, None); self._question_ids.pop(key, None)
+        for key in norms:
+            ids = self._norm_ids.get(key)
+            if ids:
+                by_norm[key] = min(ids)
+            else:
+                by_norm.pop(key, None); self._norm_ids.pop(key, None)
+        tag_ids = dict(snap.tag_ids)
+        for tag in touched_tags:
+            if self._tag_members.get(tag):
+                tag_ids[tag] = sorted(self._tag_members[tag])
+            else:
+                tag_ids.pop(tag, None); self._tag_members.pop(tag, None)
+
+        if appended_only:
+            # New ids are all above the old ones: prepend instead of re-sorting everything
+            fresh = tuple((i, *by_id[i]) for i in sorted(upserted, reverse=True))
+            items = fresh + snap.items
+        else:
+            items = tuple((i, *by_id[i]) for i in sorted(by_id, reverse=True))
+
+        self._snapshot = FaqSnapshot(
+            version=f"{self._hash:016x}",
+            items=items,
+            by_id=by_id,
+            by_question=by_question,
+            by_norm=by_norm,
+            tag_ids=tag_ids,
+            loaded_at=time.time(),
+        )
+        return self._snapshot
+
+    def changed(self, op: str = "UPDATE", deleted_ids: Iterable[int] = ()) -> None:
+        """Called by writers after commit: refresh here and tell other workers."""
+        deleted = set(deleted_ids)
+        if deleted and self._snapshot is not None:
+            with self._load_lock:
+                self._apply(self._snapshot, [], deleted & self._rows.keys(), {})
+        self._safe_refresh({op})
+        try:
+            get_redis_client().publish(FAQ_CHANNEL, f"{op}:{self._token}")
+        except Exception:
+            pass
+
+    def start(self) -> None:
+        self.reload()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="faq-catalog-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _safe_refresh(self, ops: Set[str]) -> None:
+        try:
+            if "TRUNCATE" in ops:
+                self.reload()
+                changed = True
+            else:
+                changed = self.refresh(check_deletes="DELETE" in ops)
+                if "TAGS" in ops:
+                    self.reload_tags()
+        except Exception:
+            return
+        if changed and ops & {"UPDATE", "DELETE", "TRUNCATE"}:
+            # Cached answers may quote an FAQ that was just edited or removed
+            answer_cache.clear_local()
+
+    def _listen_forever(self) -> None:
+        backoff = 1.0
+        while not self._stopping.is_set():
+            for listen in (self._listen_postgres, self._listen_redis):
+                try:
+                    listen()
+                    backoff = 1.0
+                except Exception:
+                    continue
+                if self._stopping.is_set():
+                    return
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _listen_postgres(self) -> None:
+        conn = get_postgres_connection()
+        conn.autocommit = True
+        try:
+            cur = conn.cursor()
+            cur.execute(f"LISTEN {FAQ_CHANNEL}")
+            self.source = "postgres"
+            # Catch up on anything missed while (re)connecting
+            self._safe_refresh({"DELETE"})
+            while not self._stopping.is_set():
+                if select.select([conn], [], [], self.listen_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                ops = {n.payload for n in conn.notifies}
+                conn.notifies.clear()
+                if ops:
+                    self._debounce()
+                    conn.poll()
+                    ops |= {n.payload for n in conn.notifies}
+                    conn.notifies.clear()
+                    self._safe_refresh(ops)
+        finally:
+            self.source = None
+            conn.close()
+
+    def _listen_redis(self) -> None:
+        pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(FAQ_CHANNEL)
+            self.source = "redis"
+            self._safe_refresh({"DELETE"})
+            while not self._stopping.is_set():
+                msg = pubsub.get_message(timeout=self.listen_timeout)
+                if not msg:
+                    continue
+                ops = self._foreign_ops([msg])
+                self._debounce()
+                more = []
+                while True:
+                    m = pubsub.get_message(timeout=0)
+                    if not m:
+                        break
+                    more.append(m)
+                ops |= self._foreign_ops(more)
+                if ops:
+                    self._safe_refresh(ops)
+        finally:
+            self.source = None
+            pubsub.close()
+
+    def _foreign_ops(self, messages) -> Set[str]:
+        """Ops of messages published by other workers; this worker already applied its own."""
+        ops = set()
+        for m in messages:
+            data = m.get("data")
+            if isinstance(data, bytes):
+                data = data.decode()
+            op, _, origin = str(data).partition(":")
+            if origin != self._token:
+                ops.add(op)
+        return ops
+
+    def _debounce(self) -> None:
+        snap = self._snapshot
+        if snap:
+            wait = snap.loaded_at + self.min_reload_seconds - time.time()
+            if wait > 0:
+                self._stopping.wait(wait)
+
+
+def _group_tags(rows) -> Dict[int, Set[str]]:
+    tags: Dict[int, Set[str]] = {}
+    for faq_id, tag in rows:
+        tags.setdefault(faq_id, set()).add(tag)
+    return tags
+
+
+faq_catalog = FaqCatalog(settings.FAQ_CATALOG_MIN_RELOAD_SECONDS)
+
+
+def lookup_faq_answer(query: str) -> str | None:
+    """Exact, case-insensitive question match against the snapshot."""
+    if not query:
+        return None
+    return faq_catalog.snapshot.by_question.get(query.lower())
+
+
+def sample_related_faqs(category: str | None, limit: int = 3) -> List[Tuple[str, str]]:
+    """Random (question, answer) pairs tagged with the category.
+
+    Sampling happens over the snapshot's id list, so the cost is O(limit).
+    """
+    tag = category_tag(category)
+    if not tag or tag not in CATEGORY_KEYWORDS or limit <= 0:
+        return []
+    snap = faq_catalog.snapshot
+    ids = snap.tag_ids.get(tag)
+    if not ids:
+        return []
+    chosen = random.sample(ids, min(limit, len(ids)))
+    return [snap.by_id[i] for i in chosen if i in snap.by_id]
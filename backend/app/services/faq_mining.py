@@ -0,0 +1,186 @@
+"""Mine FAQ entries from resolved tickets as a background job.
+
+Each run picks up where the last successful one stopped: resolved tickets are
+read in (updated_at, id) order after the previous run's checkpoint, in batches
+of FAQ_MINING_BATCH_SIZE. Every batch becomes one LLM prompt built from the
+tickets' resolution summaries (tickets without one are skipped), and its
+candidates go through upsert_faqs, which drops near-duplicates of existing FAQs
+and bulk inserts the rest. The checkpoint is saved after every batch and only
+ever covers tickets whose candidates were kept: a missing API key or a failed
+LLM call fails the job (to be retried from the checkpoint), and when
+``max_new`` cuts a batch short the checkpoint stops at the last ticket taken.
+"""
+from typing import Any, Dict, List, Tuple
+import re
+
+from openai import OpenAI
+
+from ..db.postgres import get_postgres_connection
+from ..core.config import settings
+from .answer_cache import answer_cache
+from .faq_writer import upsert_faqs
+from .ticket_events import format_resolution_summary, legacy_resolution_summary
+from .jobs import JobContext, job_handler, last_checkpoint
+
+
+KIND = "faq_mining"
+
+_SYSTEM = (
+    "You are a support knowledge base curator. Produce concise FAQ pairs from successful resolutions "
+    "in '[case number] Question: Answer' lines, e.g. '[2] How do I reset my password?: Open Settings...'."
+)
+# "[2] Question: Answer"; the case number attributes the pair to its ticket
+_LINE_RE = re.compile(r"^\s*\[(\d+)\]\s*(.+?):\s*(.+)$")
+
+
+def _resolved_after(cur, after: List[Any] | None, limit: int):
+    if after:
+        cur.execute(
+            """
+            SELECT id, subject, category, resolution_summary,
+                   CASE WHEN resolution_summary IS NULL THEN description END, updated_at
+            FROM tickets
+            WHERE status = 'resolved' AND (updated_at, id) > (%s::timestamp, %s)
+            ORDER BY updated_at, id LIMIT %s
+            """,
+            (after[0], after[1], limit),
+        )
+    else:
+        cur.execute(
+            """
+            SELECT id, subject, category, resolution_summary,
+                   CASE WHEN resolution_summary IS NULL THEN description END, updated_at
+            FROM tickets
+            WHERE status = 'resolved' AND updated_at IS NOT NULL
+            ORDER BY updated_at, id LIMIT %s
+            """,
+            (limit,),
+        )
+    return cur.fetchall()
+
+
+def _count_resolved_after(cur, after: List[Any] | None) -> int:
+    if after:
+        cur.execute(
+            "SELECT COUNT(*) FROM tickets WHERE status = 'resolved' AND (updated_at, id) > (%s::timestamp, %s)",
+            (after[0], after[1]),
+        )
+    else:
+        cur.execute("SELECT COUNT(*) FROM tickets WHERE status = 'resolved' AND updated_at IS NOT NULL")
+    return cur.fetchone()[0]
+
+
+def _resolution(summary, legacy_description) -> str | None:
+    """Rendered resolution of a ticket row; None when there is nothing to learn from."""
+    if summary:
+        # A "note" only says the conversation was too short to summarize
+        return None if summary.get("note") else format_resolution_summary(summary)
+    return legacy_resolution_summary(legacy_description)
+
+
+def faq_candidates(cases) -> List[List[Tuple[str, str]]]:
+    """Question/answer pairs per row of one batch of (id, subject, category, summary, legacy description, ...) rows.
+
+    Raises when there is something to mine but no API key, or the LLM call
+    fails, so the job is retried instead of skipping the batch.
+    """
+    qa: List[List[Tuple[str, str]]] = [[] for _ in cases]
+    resolved = [
+        (i, subject, category, resolution)
+        for i, (_id, subject, category, summary, legacy, *_) in enumerate(cases)
+        if (resolution := _resolution(summary, legacy))
+    ]
+    if not resolved:
+        return qa
+    if not settings.OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set; resolved tickets cannot be mined")
+    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    user = "\n\n".join(
+        f"Case {i + 1}\nSubject: {subject}\nCategory: {category}\n{resolution}"
+        for i, subject, category, resolution in resolved
+    )
+    completion = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "system", "content": _SYSTEM}, {"role": "user", "content": user}],
+        temperature=0.2,
+    )
+    text = completion.choices[0].message.content.strip()
+    for line in text.split("\n"):
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        case, q, a = int(m.group(1)) - 1, m.group(2).strip(), m.group(3).strip()
+        if 0 <= case < len(cases) and q and a:
+            qa[case].append((q, a))
+    return qa
+
+
+def take_candidates(
+    per_case: List[List[Tuple[str, str]]], budget: int | None, allow_partial: bool = False,
+) -> Tuple[List[Tuple[str, str]], int]:
+    """Candidates of the leading cases that fit ``budget`` (None = no cap) and how many cases they cover.
+
+    A case is only counted once all its candidates were taken, so the
+    checkpoint never passes a ticket whose candidates were cut. With
+    ``allow_partial`` (the first ticket of a run), a first case that alone
+    exceeds the budget is taken partially; otherwise such a ticket would stop
+    every run.
+    """
+    kept: List[Tuple[str, str]] = []
+    consumed = 0
+    for pairs in per_case:
+        if budget is not None and len(kept) + len(pairs) > budget:
+            if allow_partial and consumed == 0 and budget > 0:
+                kept.extend(pairs[:budget])
+                consumed = 1
+            break
+        kept.extend(pairs)
+        consumed += 1
+    return kept, consumed
+
+
+@job_handler(KIND)
+def mine_faqs(ctx: JobContext) -> Dict[str, Any]:
+    """Params: ``limit`` tickets to read this run and ``max_new`` FAQs to create (0 = no cap)."""
+    limit = int(ctx.params.get("limit") or 0)
+    max_new = int(ctx.params.get("max_new") or 0)
+    batch_size = max(1, settings.FAQ_MINING_BATCH_SIZE)
+
+    state = ctx.checkpoint
+    if state is None:
+        previous = last_checkpoint(KIND) or {}
+        state = {"after": previous.get("after"), "tickets": 0, "created": 0}
+
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        total = state["tickets"] + _count_resolved_after(cur, state["after"])
+        if limit:
+            total = min(total, limit)
+        conn.commit()
+        # Saved up front as well, so a run with nothing to do still hands its start point on
+        ctx.report({"done": state["tickets"], "total": total, "created": state["created"]}, state)
+
+        while state["tickets"] < total and not (max_new and state["created"] >= max_new):
+            cases = _resolved_after(cur, state["after"], min(batch_size, total - state["tickets"]))
+            conn.commit()
+            if not cases:
+                break
+            candidates, consumed = take_candidates(
+                faq_candidates(cases), max_new - state["created"] if max_new else None,
+                allow_partial=state["tickets"] == 0,
+            )
+            if not consumed:
+                break
+            created = upsert_faqs(candidates)
+            if created:
+                answer_cache.clear()
+            last = cases[consumed - 1]
+            state = {
+                "after": [last[5].isoformat(), last[0]],
+                "tickets": state["tickets"] + consumed,
+                "created": state["created"] + created,
+            }
+            ctx.report({"done": state["tickets"], "total": total, "created": state["created"]}, state)
+    finally:
+        cur.close(); conn.close()
+    return {"tickets": state["tickets"], "created": state["created"]}
@@ -0,0 +1,105 @@
+from typing import List, Tuple
+import psycopg2.extras
+
+from ..db.postgres import get_postgres_connection
+from ..core.config import settings
+from .answer_cache import normalize_query, embed, cosine, NORMALIZE_VERSION
+from .batching import BatchWriter
+from .faq_catalog import insert_faq_tags, faq_catalog
+
+
+# Serializes concurrent flushes across workers so the existence check and the
+# insert see each other's rows.
+_FAQ_WRITE_LOCK_ID = 0x46415131
+
+
+def enqueue_faq(question: str, answer: str) -> bool:
+    """Queue an LLM answer as an FAQ candidate; written later, off the request path."""
+    if not question or not answer:
+        return False
+    return faq_writer.submit((question.strip(), answer.strip()))
+
+
+def dedupe_candidates(candidates: List[Tuple[str, str]], threshold: float) -> List[Tuple[str, str, str]]:
+    """Collapse candidates with the same or a near-identical normalized question.
+
+    Returns (question, answer, question_norm) keeping the first of each group.
+    """
+    kept: List[Tuple[str, str, str]] = []
+    vectors = []
+    seen = set()
+    for question, answer in candidates:
+        norm = normalize_query(question)
+        if not norm or norm in seen:
+            continue
+        vec = embed(norm)
+        if any(cosine(vec, other) >= threshold for other in vectors):
+            continue
+        seen.add(norm)
+        vectors.append(vec)
+        kept.append((question, answer, norm))
+    return kept
+
+
+def upsert_faqs(candidates: List[Tuple[str, str]]) -> int:
+    """Insert FAQ candidates whose normalized question is not already stored.
+
+    Returns the number of rows inserted.
+    """
+    known = faq_catalog.snapshot.by_norm
+    rows = [r for r in dedupe_candidates(candidates, settings.FAQ_DEDUPE_SIMILARITY) if r[2] not in known]
+    if not rows:
+        return 0
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (_FAQ_WRITE_LOCK_ID,))
+        cur.execute("SELECT question_norm FROM faqs WHERE question_norm = ANY(%s)", ([r[2] for r in rows],))
+        existing = {r[0] for r in cur.fetchall()}
+        fresh = [r for r in rows if r[2] not in existing]
+        if fresh:
+            inserted = psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO faqs (question, answer, question_norm) VALUES %s RETURNING id, question",
+                fresh,
+                fetch=True,
+            )
+            insert_faq_tags(cur, inserted)
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+    if fresh:
+        faq_catalog.changed("INSERT")
+    return len(fresh)
+
+
+def backfill_question_norms() -> None:
+    """Fill question_norm for rows written before the column existed.
+
+    The column comment records the NORMALIZE_VERSION the stored values were
+    computed with; after normalize_query changes, every row is recomputed once.
+    """
+    marker = f"normalize_query v{NORMALIZE_VERSION}"
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute("SELECT col_description('faqs'::regclass, attnum) FROM pg_attribute "
+                    "WHERE attrelid = 'faqs'::regclass AND attname = 'question_norm'")
+        row = cur.fetchone()
+        outdated = not row or row[0] != marker
+        cur.execute("SELECT id, question, question_norm FROM faqs" + ("" if outdated else " WHERE question_norm IS NULL"))
+        rows = [(norm, _id) for _id, q, old in cur.fetchall() if (norm := normalize_query(q)) != old]
+        if rows:
+            psycopg2.extras.execute_batch(cur, "UPDATE faqs SET question_norm = %s WHERE id = %s", rows)
+        if outdated:
+            cur.execute(f"COMMENT ON COLUMN faqs.question_norm IS '{marker}'")
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+
+
+faq_writer = BatchWriter(
+    "faq",
+    upsert_faqs,
+    max_batch=settings.FAQ_WRITER_BATCH_SIZE,
+    flush_interval=settings.FAQ_WRITER_FLUSH_SECONDS,
+    max_queue=settings.FAQ_WRITER_MAX_QUEUE,
+)
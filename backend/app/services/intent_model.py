@@ -0,0 +1,159 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # the classifier is optional; chat falls back to services/intents.py
+    np = None
+
+from ..core.config import settings
+
+
+LABELS = ("other", "greeting", "resolved", "escalate")
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Unigrams and bigrams of the lowercased message; stopwords are kept on purpose
+    since "hi", "thanks" and "no" carry most of the signal for these intents."""
+    words = _TOKEN_RE.findall((text or "").lower().replace("’", "'"))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    """TF-IDF features + multinomial logistic regression, inference in NumPy.
+
+    Prediction touches only the weight rows of tokens present in the message,
+    so cost is proportional to message length, not vocabulary size.
+    """
+
+    def __init__(self, vocab: Dict[str, int], idf, weights, bias, labels: Sequence[str]):
+        self.vocab = vocab
+        self.idf = idf
+        self.weights = weights  # (n_features, n_labels)
+        self.bias = bias  # (n_labels,)
+        self.labels = tuple(labels)
+
+    def _features(self, tokens: List[str]) -> Tuple[List[int], "np.ndarray"]:
+        counts: Dict[int, int] = {}
+        for tok in tokens:
+            idx = self.vocab.get(tok)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        idxs = list(counts)
+        vals = np.fromiter(counts.values(), dtype=np.float32, count=len(idxs)) * self.idf[idxs]
+        norm = float(np.sqrt(vals @ vals)) if idxs else 0.0
+        if norm:
+            vals /= norm
+        return idxs, vals
+
+    def predict_proba(self, text: str) -> "np.ndarray":
+        idxs, vals = self._features(tokenize(text))
+        scores = self.bias + (vals @ self.weights[idxs] if idxs else 0.0)
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probs = self.predict_proba(text)
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    def save(self, path: str) -> None:
+        tokens = sorted(self.vocab, key=self.vocab.get)
+        np.savez_compressed(
+            path, tokens=np.array(tokens), idf=self.idf, weights=self.weights,
+            bias=self.bias, labels=np.array(self.labels),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IntentModel":
+        data = np.load(path, allow_pickle=False)
+        vocab = {str(tok): i for i, tok in enumerate(data["tokens"])}
+        return cls(vocab, data["idf"], data["weights"], data["bias"], [str(l) for l in data["labels"]])
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        min_df: int = 1,
+        max_features: int = 20000,
+        epochs: int = 200,
+        learning_rate: float = 1.0,
+        l2: float = 1e-4,
+        batch_size: int = 256,
+        seed: int = 0,
+    ) -> "IntentModel":
+        """Fit with mini-batch gradient descent; only one dense batch is materialized at a time."""
+        df: Dict[str, int] = {}
+        token_lists = [tokenize(t) for t in texts]
+        for toks in token_lists:
+            for tok in set(toks):
+                df[tok] = df.get(tok, 0) + 1
+        kept = sorted((t for t, c in df.items() if c >= min_df), key=lambda t: (-df[t], t))[:max_features]
+        vocab = {tok: i for i, tok in enumerate(kept)}
+        n = len(texts)
+        idf = np.array([np.log((1 + n) / (1 + df[t])) + 1.0 for t in kept], dtype=np.float32)
+
+        label_names = [l for l in LABELS if l in set(labels)] + sorted(set(labels) - set(LABELS))
+        y = np.array([label_names.index(l) for l in labels])
+        model = cls(vocab, idf, np.zeros((len(vocab), len(label_names)), dtype=np.float32),
+                    np.zeros(len(label_names), dtype=np.float32), label_names)
+
+        rows = [model._features(toks) for toks in token_lists]
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                batch = order[start:start + batch_size]
+                x = np.zeros((len(batch), len(vocab)), dtype=np.float32)
+                for r, i in enumerate(batch):
+                    idxs, vals = rows[i]
+                    x[r, idxs] = vals
+                scores = x @ model.weights + model.bias
+                scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+                probs = scores / scores.sum(axis=1, keepdims=True)
+                probs[np.arange(len(batch)), y[batch]] -= 1.0
+                model.weights -= learning_rate * (x.T @ probs / len(batch) + l2 * model.weights)
+                model.bias -= learning_rate * probs.mean(axis=0)
+        return model
+
+    def accuracy(self, texts: Iterable[str], labels: Iterable[str]) -> float:
+        pairs = list(zip(texts, labels))
+        if not pairs:
+            return 0.0
+        return sum(self.predict(t)[0] == l for t, l in pairs) / len(pairs)
+
+
+_model: IntentModel | None = None
+_model_loaded = False
+
+
+def get_intent_model() -> IntentModel | None:
+    """Load the trained model once per worker; None if disabled, missing or NumPy is absent."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model_loaded = True
+        path = settings.INTENT_MODEL_PATH
+        if np is not None and path and os.path.exists(path):
+            try:
+                _model = IntentModel.load(path)
+            except Exception:
+                _model = None
+    return _model
+
+
+def predict_intent(text: str) -> str | None:
+    """Confident local intent label, or None to let the normal pipeline decide."""
+    model = get_intent_model()
+    if model is None or not text:
+        return None
+    label, prob = model.predict(text)
+    if label == "other" or prob < settings.INTENT_MODEL_MIN_CONFIDENCE:
+        return None
+    if label == "resolved" and (prob < settings.INTENT_MODEL_RESOLVE_MIN_CONFIDENCE or text.rstrip().endswith("?")):
+        # A question ("is it fixed?") is never a confirmation, as in classify_message
+        return None
+    return label
@@ -0,0 +1,96 @@
+from typing import Dict, List
+from dataclasses import dataclass
+import re
+
+
+# Phrase lists per intent. Entries are regex fragments matched on word
+# boundaries against the lowercased message, so "great" no longer fires
+# inside "greater". Order matters only within one start position: the first
+# alternative wins, which is why negations are listed first and can swallow
+# "thanks" in "no thanks" or "resolved" in "not resolved". "declined" is a
+# negation aimed at escalation itself; it blocks escalate, while a negation
+# like "still not working" does not.
+_AGENT = r"(?:a |an |some )?(?:human agent|live agent|real person|human|person|agent|representative)"
+
+_MESSAGE_PHRASES: Dict[str, List[str]] = {
+    "declined": [
+        r"(?:don'?t|do not|no need to) escalate",
+        rf"(?:don'?t|do not|no need to) (?:(?:want|need)(?: to)? )?(?:(?:talk|speak|chat) (?:to|with) )?{_AGENT}",
+    ],
+    "negation": [
+        r"no,? thanks?(?: you)?", r"no thank you",
+        r"(?:not|never|isn'?t|wasn'?t|hasn'?t been|haven'?t been) (?:yet |really |quite )?(?:resolved|solved|fixed|working|helpful|great|perfect|good)",
+        r"(?:doesn'?t|didn'?t|does not|did not|won'?t|still doesn'?t|still does not) (?:help|work|fix|solve)",
+        r"still (?:not|broken|failing|getting|having|the same)",
+        r"not (?:at all|really|quite)",
+    ],
+    "escalate": [
+        r"escalate now", r"please escalate", r"escalate (?:this|my|the) (?:case|ticket|issue|request)",
+        # Only explicit requests; a mention ("is this a real person?") is not one
+        rf"(?:talk|speak|chat) (?:to|with) {_AGENT}",
+        rf"(?:i want|i'?d like|i need|get me|connect me (?:to|with)|transfer me to) {_AGENT}",
+    ],
+    "resolved": [
+        r"yes,? resolved", r"that helps,? thanks", r"resolved", r"solved", r"fixed",
+        r"that works", r"it works", r"perfect", r"thank you", r"thanks", r"thx", r"great", r"awesome",
+        r"that answers it", r"that'?s what i needed", r"exactly what i needed",
+        r"problem solved", r"issue resolved", r"all set", r"good to go",
+    ],
+    "problem": [
+        r"how do i", r"how can i", r"why is", r"why does", r"why can'?t", r"what'?s wrong",
+        r"not working", r"can'?t", r"cannot", r"unable to",
+        r"errors?", r"problems?", r"issues?", r"troubles?", r"help", r"fix(?:es|ing)?", r"solve",
+    ],
+}
+
+# Manual override commands; punctuation-led, so matched as whole messages.
+_ESCALATE_COMMANDS = frozenset({"!escalate", "/escalate"})
+
+_ANSWER_PHRASES: List[str] = [
+    r"here'?s how", r"follow these steps", r"to fix this", r"solution is",
+    r"you need to", r"try this", r"do the following", r"here'?s what",
+    r"the issue is", r"this should resolve", r"this will fix",
+]
+
+
+def _compile(groups: Dict[str, List[str]]) -> "re.Pattern[str]":
+    parts = [f"(?P<{name}>{'|'.join(phrases)})" for name, phrases in groups.items()]
+    return re.compile(r"(?<!\w)(?:" + "|".join(parts) + r")(?!\w)")
+
+
+_MESSAGE_RE = _compile(_MESSAGE_PHRASES)
+_ANSWER_RE = re.compile(r"(?<!\w)(?:" + "|".join(_ANSWER_PHRASES) + r")(?!\w)")
+# Curly apostrophes from mobile keyboards
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'"})
+
+
+@dataclass(frozen=True)
+class MessageIntents:
+    escalate: bool = False
+    resolved: bool = False
+    problem: bool = False
+    negated: bool = False
+
+
+def classify_message(text: str) -> MessageIntents:
+    """Classify a user message in one regex pass."""
+    lowered = (text or "").lower().translate(_APOSTROPHES).strip()
+    if not lowered:
+        return MessageIntents()
+    if lowered in _ESCALATE_COMMANDS:
+        return MessageIntents(escalate=True)
+    found = {m.lastgroup for m in _MESSAGE_RE.finditer(lowered)}
+    declined = "declined" in found
+    negated = "negation" in found or declined
+    return MessageIntents(
+        escalate="escalate" in found and not declined,
+        # A question ("is it fixed?") or a negation ("no thanks") is not a confirmation
+        resolved="resolved" in found and not negated and not lowered.endswith("?"),
+        problem="problem" in found or negated,
+        negated=negated,
+    )
+
+
+def offers_solution(answer: str) -> bool:
+    """True if an assistant answer reads like step-by-step help."""
+    return bool(answer) and _ANSWER_RE.search(answer.lower().translate(_APOSTROPHES)) is not None
@@ -0,0 +1,241 @@
+"""Background jobs for admin work that outlives a request.
+
+Jobs are rows in the ``jobs`` table, so any worker can report on them. A
+``JobRunner`` thread in every worker claims queued jobs one at a time with
+``FOR UPDATE SKIP LOCKED``. Handlers report progress and save a checkpoint
+as they go; both also act as the heartbeat. A job whose heartbeat is older
+than JOB_STALE_SECONDS (its worker died) is claimed again and resumes from
+its checkpoint, up to JOB_MAX_ATTEMPTS times.
+"""
+from typing import Any, Callable, Dict, List
+import os
+import socket
+import threading
+import uuid
+import psycopg2.extras
+
+from ..db.postgres import get_postgres_connection
+from ..core.config import settings
+from ..core.logs import get_logger, log_event
+import logging
+
+
+logger = get_logger("jobs")
+
+_HANDLERS: Dict[str, Callable[["JobContext"], Dict[str, Any]]] = {}
+_COLUMNS = "id, kind, status, params, progress, checkpoint, result, error, attempts, created_at, started_at, finished_at, updated_at"
+
+
+def job_handler(kind: str):
+    """Register ``fn(ctx) -> result dict`` as the handler of ``kind``."""
+    def register(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class JobContext:
+    def __init__(self, job_id: str, params: Dict[str, Any], checkpoint: Dict[str, Any] | None):
+        self.job_id = job_id
+        self.params = params
+        self.checkpoint = checkpoint  # None on the first attempt
+
+    def report(self, progress: Dict[str, Any], checkpoint: Dict[str, Any] | None = None) -> None:
+        """Store progress (and the resume point, if given); call after each unit of work."""
+        conn = get_postgres_connection(); cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE jobs SET progress = %s, checkpoint = COALESCE(%s, checkpoint), updated_at = NOW() WHERE id = %s",
+                (psycopg2.extras.Json(progress), psycopg2.extras.Json(checkpoint) if checkpoint is not None else None, self.job_id),
+            )
+            conn.commit()
+        finally:
+            cur.close(); conn.close()
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+
+
+def _row(r) -> Dict[str, Any]:
+    job = dict(zip([c.strip() for c in _COLUMNS.split(",")], r))
+    for k in ("created_at", "started_at", "finished_at", "updated_at"):
+        job[k] = job[k].isoformat() if job[k] else None
+    return job
+
+
+def submit_job(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue a job, or return the queued/running job of the same kind instead of starting a second one."""
+    if kind not in _HANDLERS:
+        raise ValueError(f"unknown job kind: {kind}")
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"jobs:{kind}",))
+        cur.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE kind = %s AND status IN ('queued','running') ORDER BY created_at LIMIT 1",
+            (kind,),
+        )
+        row = cur.fetchone()
+        if row is None:
+            cur.execute(
+                f"INSERT INTO jobs (id, kind, params) VALUES (%s, %s, %s) RETURNING {_COLUMNS}",
+                (str(uuid.uuid4()), kind, psycopg2.extras.Json(params)),
+            )
+            row = cur.fetchone()
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+    job_runner.wake()
+    return _row(row)
+
+
+def get_job(job_id: str) -> Dict[str, Any] | None:
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+    finally:
+        cur.close(); conn.close()
+    return _row(row) if row else None
+
+
+def list_jobs(kind: str | None = None, limit: int = 20) -> List[Dict[str, Any]]:
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE (%s IS NULL OR kind = %s) ORDER BY created_at DESC LIMIT %s",
+            (kind, kind, limit),
+        )
+        rows = cur.fetchall()
+    finally:
+        cur.close(); conn.close()
+    return [_row(r) for r in rows]
+
+
+def last_checkpoint(kind: str) -> Dict[str, Any] | None:
+    """Checkpoint of the most recent successful job of ``kind``; where an incremental job resumes."""
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT checkpoint FROM jobs WHERE kind = %s AND status = 'succeeded' ORDER BY finished_at DESC LIMIT 1",
+            (kind,),
+        )
+        row = cur.fetchone()
+    finally:
+        cur.close(); conn.close()
+    return row[0] if row else None
+
+
+class JobRunner:
+    def __init__(self, poll_seconds: float, stale_seconds: float, max_attempts: int):
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._conn = None  # the runner thread's claim connection, reused across polls
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        # A job in progress keeps its checkpoint and is resumed by another worker once stale
+        self._stopping.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                try:
+                    ran = self.run_next()
+                except Exception:
+                    ran = False
+                if not ran:
+                    self._wake.wait(self.poll_seconds)
+                    self._wake.clear()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _claim_connection(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = get_postgres_connection()
+        return self._conn
+
+    def _claim(self):
+        conn = self._claim_connection(); cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = %s,
+                       started_at = COALESCE(started_at, NOW()), updated_at = NOW()
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE kind = ANY(%s) AND (
+                        status = 'queued'
+                        OR (status = 'running' AND updated_at < NOW() - make_interval(secs => %s))
+                    )
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, kind, params, checkpoint, attempts
+                """,
+                (self.worker, list(_HANDLERS), self.stale_seconds),
+            )
+            row = cur.fetchone()
+            conn.commit()
+        except Exception:
+            # Reconnect on the next poll
+            cur.close(); conn.close()
+            raise
+        cur.close()
+        return row
+
+    def run_next(self) -> bool:
+        """Run one claimable job to completion; False if there was none."""
+        row = self._claim()
+        if row is None:
+            return False
+        job_id, kind, params, checkpoint, attempts = row
+        if attempts > self.max_attempts:
+            self._finish(job_id, "failed", None, "gave up after repeated worker failures")
+            return True
+        log_event(logger, logging.INFO, "job.started", kind=kind, job_id=job_id, attempt=attempts)
+        try:
+            result = _HANDLERS[kind](JobContext(job_id, params or {}, checkpoint))
+        except Exception as exc:
+            status = "failed" if attempts >= self.max_attempts else "queued"
+            log_event(logger, logging.WARNING, "job.failed", str(exc), kind=kind, job_id=job_id, attempt=attempts,
+                      retry=status == "queued", exc_info=True)
+            self._finish(job_id, status, None, str(exc))
+            return True
+        log_event(logger, logging.INFO, "job.succeeded", kind=kind, job_id=job_id)
+        self._finish(job_id, "succeeded", result, None)
+        return True
+
+    def _finish(self, job_id: str, status: str, result: Dict[str, Any] | None, error: str | None) -> None:
+        conn = get_postgres_connection(); cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                UPDATE jobs SET status = %s, result = %s, error = %s, updated_at = NOW(),
+                       finished_at = CASE WHEN %s IN ('succeeded','failed') THEN NOW() END
+                WHERE id = %s
+                """,
+                (status, psycopg2.extras.Json(result) if result is not None else None, error, status, job_id),
+            )
+            conn.commit()
+        finally:
+            cur.close(); conn.close()
+
+
+job_runner = JobRunner(settings.JOB_POLL_SECONDS, settings.JOB_STALE_SECONDS, settings.JOB_MAX_ATTEMPTS)
@@ -0,0 +1,226 @@
+"""Per-session summary documents.
+
+``sessions`` holds one document per chat session (``_id`` is the session id):
+started_at, last_at, the last message and its role, message counts, the
+first user and last assistant message (for resolution summaries) and the
+customer metadata. chat_writer upserts it in the same flush that inserts the
+case_memory batch, one update per session, so listings never have to group
+case_memory. Pages are ordered by (last_at, _id) descending and continued
+with an opaque cursor, which keeps every page an index range scan.
+"""
+from typing import Any, Dict, List, Tuple
+from datetime import datetime
+import base64
+import json
+import re
+
+from pymongo import DESCENDING, UpdateOne
+
+from ..db.mongo import get_sessions_collection, get_case_memory_collection
+from ..db.postgres import get_postgres_connection
+
+
+_META_FIELDS = ("user_email", "customer_name", "subject", "category")
+_LIST_FIELDS = {"_id": 1, "started_at": 1, "last_at": 1, "last_role": 1, "last_message": 1, "message_count": 1,
+                **{k: 1 for k in _META_FIELDS}}
+
+_collection = None
+
+
+def _sessions():
+    # One client for the flusher thread, as in chat_writer
+    global _collection
+    if _collection is None:
+        _collection = get_sessions_collection()
+    return _collection
+
+
+def session_updates(docs: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """One upsert per session for a batch of case_memory documents.
+
+    Pipeline updates, so "keep the first user message" and the counters can
+    be expressed against the stored document; values are $literal so message
+    text starting with "$" is not read as a field path.
+    """
+    by_session: Dict[str, List[Dict[str, Any]]] = {}
+    for doc in docs:
+        if doc.get("session_id"):
+            by_session.setdefault(doc["session_id"], []).append(doc)
+    ops = []
+    for session_id, messages in by_session.items():
+        messages.sort(key=lambda d: d.get("ts") or datetime.min)
+        last = messages[-1]
+        users = [m for m in messages if m.get("role") == "user"]
+        assistants = [m for m in messages if m.get("role") == "assistant"]
+        fields: Dict[str, Any] = {
+            "started_at": {"$min": ["$started_at", {"$literal": messages[0].get("ts")}]},
+            "last_at": {"$max": ["$last_at", {"$literal": last.get("ts")}]},
+            "last_role": {"$literal": last.get("role")},
+            "last_message": {"$literal": last.get("content")},
+            "message_count": {"$add": [{"$ifNull": ["$message_count", 0]}, len(messages)]},
+            "user_messages": {"$add": [{"$ifNull": ["$user_messages", 0]}, len(users)]},
+            "assistant_messages": {"$add": [{"$ifNull": ["$assistant_messages", 0]}, len(assistants)]},
+        }
+        if users:
+            fields["first_user_message"] = {"$ifNull": ["$first_user_message", {"$literal": users[0].get("content")}]}
+        if assistants:
+            fields["last_assistant_message"] = {"$literal": assistants[-1].get("content")}
+        for m in messages:
+            for k in _META_FIELDS:
+                if m.get(k) is not None:
+                    fields[k] = {"$literal": m[k]}
+        ops.append(UpdateOne({"_id": session_id}, [{"$set": fields}], upsert=True))
+    return ops
+
+
+def session_summary(session_id: str, pending: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    """The session's conversation counters, including ``pending`` (buffered, not yet flushed) messages.
+
+    Keys: message_count, user_messages, assistant_messages, first_user_message,
+    last_assistant_message. One indexed read, however long the session. None
+    if the stored document predates the counters; read the history instead.
+    """
+    doc = get_sessions_collection().find_one(
+        {"_id": session_id},
+        {"message_count": 1, "user_messages": 1, "assistant_messages": 1,
+         "first_user_message": 1, "last_assistant_message": 1},
+    ) or {}
+    if doc.get("message_count") and "user_messages" not in doc:
+        return None
+    summary = {
+        "message_count": doc.get("message_count", 0),
+        "user_messages": doc.get("user_messages", 0),
+        "assistant_messages": doc.get("assistant_messages", 0),
+        "first_user_message": doc.get("first_user_message"),
+        "last_assistant_message": doc.get("last_assistant_message"),
+    }
+    return _add_messages(summary, pending)
+
+
+def session_summary_from_history(history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """session_summary's counters computed from a full message list."""
+    return _add_messages({"message_count": 0, "user_messages": 0, "assistant_messages": 0,
+                          "first_user_message": None, "last_assistant_message": None}, history)
+
+
+def _add_messages(summary: Dict[str, Any], messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    for m in sorted(messages, key=lambda d: d.get("ts") or datetime.min):
+        summary["message_count"] += 1
+        if m.get("role") == "user":
+            summary["user_messages"] += 1
+            if summary["first_user_message"] is None:
+                summary["first_user_message"] = m.get("content")
+        elif m.get("role") == "assistant":
+            summary["assistant_messages"] += 1
+            summary["last_assistant_message"] = m.get("content")
+    return summary
+
+
+def record_messages(docs: List[Dict[str, Any]]) -> None:
+    ops = session_updates(docs)
+    if ops:
+        _sessions().bulk_write(ops, ordered=False)
+
+
+def rebuild_session_counters(session_id: str, history: List[Dict[str, Any]]) -> None:
+    """Overwrite a session's counters with ones computed from its full history."""
+    counters = session_summary_from_history(history)
+    _sessions().update_one({"_id": session_id}, {"$set": counters}, upsert=True)
+
+
+def count_sessions() -> int:
+    """Sessions across hot and archived tiers; archiving leaves the session documents in place."""
+    return get_sessions_collection().estimated_document_count()
+
+
+def ensure_session_indexes() -> None:
+    get_sessions_collection().create_index([("last_at", DESCENDING), ("_id", DESCENDING)])
+
+
+def backfill_sessions() -> None:
+    """Build the sessions collection from case_memory the first time it is empty."""
+    sessions = get_sessions_collection()
+    if sessions.find_one({}, {"_id": 1}):
+        return
+    get_case_memory_collection().aggregate([
+        {"$match": {"session_id": {"$ne": None}}},
+        {"$sort": {"session_id": 1, "ts": 1}},
+        {"$group": {
+            "_id": "$session_id",
+            "started_at": {"$first": "$ts"},
+            "last_at": {"$last": "$ts"},
+            "last_role": {"$last": "$role"},
+            "last_message": {"$last": "$content"},
+            "message_count": {"$sum": 1},
+            "user_messages": {"$sum": {"$cond": [{"$eq": ["$role", "user"]}, 1, 0]}},
+            "assistant_messages": {"$sum": {"$cond": [{"$eq": ["$role", "assistant"]}, 1, 0]}},
+            # Documents compare field by field, so these pick by ts; $min/$max skip the nulls
+            "first_user": {"$min": {"$cond": [{"$eq": ["$role", "user"]}, {"ts": "$ts", "content": "$content"}, None]}},
+            "last_assistant": {"$max": {"$cond": [{"$eq": ["$role", "assistant"]}, {"ts": "$ts", "content": "$content"}, None]}},
+            **{k: {"$last": f"${k}"} for k in _META_FIELDS},
+        }},
+        {"$set": {"first_user_message": "$first_user.content", "last_assistant_message": "$last_assistant.content"}},
+        {"$unset": ["first_user", "last_assistant"]},
+        {"$merge": {"into": "sessions", "whenMatched": "keepExisting"}},
+    ], allowDiskUse=True)
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    last_at = doc.get("last_at")
+    raw = json.dumps([last_at.isoformat() if last_at else None, doc["_id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime | None, str]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    last_at, session_id = json.loads(raw)
+    return (datetime.fromisoformat(last_at) if last_at else None), session_id
+
+
+def list_sessions(limit: int, cursor: str | None = None, q: str | None = None) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Newest-first page of session documents and the cursor of the next page (None at the end).
+
+    Raises ValueError for a malformed cursor.
+    """
+    query: Dict[str, Any] = {}
+    if cursor:
+        last_at, session_id = decode_cursor(cursor)
+        if last_at is None:
+            # Sessions without a timestamp sort last; continue among them by id
+            query["last_at"] = None
+            query["_id"] = {"$lt": session_id}
+        else:
+            query["$or"] = [
+                {"last_at": {"$lt": last_at}},
+                {"last_at": last_at, "_id": {"$lt": session_id}},
+                {"last_at": None},
+            ]
+    if q:
+        pattern = {"$regex": re.escape(q), "$options": "i"}
+        query = {"$and": [query, {"$or": [{k: pattern} for k in ("customer_name", "user_email", "subject")]}]}
+    docs = list(
+        get_sessions_collection().find(query, _LIST_FIELDS)
+        .sort([("last_at", DESCENDING), ("_id", DESCENDING)])
+        .limit(limit + 1)
+    )
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def latest_tickets(session_ids: List[str]) -> Dict[str, Tuple[int, str, str]]:
+    """session_id -> (ticket id, status, priority) of each session's newest ticket, in one query."""
+    if not session_ids:
+        return {}
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT DISTINCT ON (session_id) session_id, id, status, priority
+            FROM tickets WHERE session_id = ANY(%s)
+            ORDER BY session_id, id DESC
+            """,
+            (list(session_ids),),
+        )
+        return {r[0]: (r[1], r[2], r[3]) for r in cur.fetchall()}
+    finally:
+        cur.close(); conn.close()
@@ -0,0 +1,106 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import time
+import uuid
+
+from ..db.redis_client import get_redis_client
+from ..core.config import settings
+
+
+_LOCK_PREFIX = "singleflight:"
+
+# Delete the lock only if we still own it (it may have expired and been re-taken).
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    Within a worker, callers for a key already in flight await the leader's
+    future. Across workers, a Redis lock elects one leader; the others poll
+    ``lookup`` (where the leader publishes its result, e.g. the answer cache)
+    until a result appears or the lock is released, and only then compute it
+    themselves. If Redis is unreachable each worker simply leads on its own.
+    """
+
+    def __init__(self, lock_ttl_seconds: int, wait_seconds: float, poll_interval: float):
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    @classmethod
+    def from_settings(cls) -> "SingleFlight":
+        return cls(
+            lock_ttl_seconds=settings.SINGLEFLIGHT_LOCK_TTL_SECONDS,
+            wait_seconds=settings.SINGLEFLIGHT_WAIT_SECONDS,
+            poll_interval=settings.SINGLEFLIGHT_POLL_SECONDS,
+        )
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], lookup: Callable[[], Any]) -> Any:
+        existing = self._inflight.get(key)
+        if existing is not None:
+            return await asyncio.shield(existing)
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._lead(key, fn, lookup)
+        except BaseException:
+            # Waiters fall back to their own handling rather than inheriting the error
+            future.set_result(None)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]], lookup: Callable[[], Any]) -> Any:
+        lock_key = _LOCK_PREFIX + key
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            acquired = self._acquire(lock_key, token)
+            if acquired is not False:
+                break
+            # Another worker is generating this answer; wait for it to publish
+            await asyncio.sleep(self.poll_interval)
+            result = lookup()
+            if result:
+                return result
+            if time.monotonic() >= deadline:
+                acquired = None
+                break
+
+        try:
+            if acquired:
+                # A previous leader may have finished between our miss and the lock
+                result = lookup()
+                if result:
+                    return result
+            return await fn()
+        finally:
+            if acquired:
+                self._release(lock_key, token)
+
+    def _acquire(self, lock_key: str, token: str) -> bool | None:
+        """True if we hold the lock, False if someone else does, None if Redis is down."""
+        try:
+            return bool(get_redis_client().set(lock_key, token, nx=True, ex=self.lock_ttl_seconds))
+        except Exception:
+            return None
+
+    def _release(self, lock_key: str, token: str) -> None:
+        try:
+            get_redis_client().eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception:
+            pass
+
+
+generation_flight = SingleFlight.from_settings()
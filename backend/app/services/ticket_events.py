@@ -0,0 +1,90 @@
+from typing import Any, Dict
+import psycopg2.extras
+
+
+# Tickets used to carry their history inside ``description``: escalations were
+# appended as "[Escalated] <reason>" and the resolution as a text block after
+# LEGACY_SUMMARY_MARKER. New writes append a row to ticket_events instead and keep
+# the resolution in tickets.resolution_summary (JSONB); old rows are still parsed.
+LEGACY_SUMMARY_MARKER = "--- RESOLUTION SUMMARY ---"
+
+LIVE_STATUSES = "('open','in_progress','escalated')"
+
+# At most one live ticket per chat session. tickets is partitioned by created_at, so
+# this cannot be a unique index on session_id; instead a transaction-scoped advisory
+# lock on the session serializes the existence check. Both statements go in one
+# round trip, and the INSERT's snapshot is taken after the lock is granted.
+# Returns no row when the session already has a live ticket.
+INSERT_TICKET_UNLESS_LIVE = f"""
+    SELECT pg_advisory_xact_lock(hashtext(%(session_id)s));
+    INSERT INTO tickets (user_email, customer_name, subject, category, description, status, priority, session_id)
+    SELECT %(user_email)s, %(customer_name)s, %(subject)s, %(category)s, %(description)s, %(status)s, %(priority)s, %(session_id)s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM tickets
+        WHERE session_id = %(session_id)s AND status IN {LIVE_STATUSES}
+    )
+    RETURNING id
+"""
+
+# Locks the session a ticket will belong to after an update, under the same lock as
+# INSERT_TICKET_UNLESS_LIVE. Follow it with a statement guarded by LIVE_CONFLICT.
+LOCK_TICKET_SESSION = """
+    SELECT pg_advisory_xact_lock(hashtext(COALESCE(%(session_id)s, session_id)))
+    FROM tickets WHERE id = %(id)s;
+"""
+
+# WHERE clause fragment for an UPDATE of ``tickets``: true when the updated row would
+# become a second live ticket of its session.
+LIVE_CONFLICT = f"""
+    COALESCE(%(status)s, tickets.status) IN {LIVE_STATUSES} AND EXISTS (
+        SELECT 1 FROM tickets other
+        WHERE other.session_id = COALESCE(%(session_id)s, tickets.session_id)
+          AND other.id <> tickets.id AND other.status IN {LIVE_STATUSES}
+    )
+"""
+
+
+def transition_sql(set_clause: str, where_clause: str) -> str:
+    """UPDATE tickets and append one ticket_events row per updated ticket, in one statement.
+
+    Parameters, in order: those of ``set_clause``, those of ``where_clause``,
+    then the event type and its payload (wrap with ``event_payload``).
+    Returns the ticket ids that were updated.
+    """
+    return f"""
+        WITH updated AS (
+            UPDATE tickets SET {set_clause}
+            WHERE {where_clause}
+            RETURNING id
+        )
+        INSERT INTO ticket_events (ticket_id, type, payload)
+        SELECT id, %s, %s FROM updated
+        RETURNING ticket_id
+    """
+
+
+def event_payload(payload: Dict[str, Any] | None) -> psycopg2.extras.Json:
+    return psycopg2.extras.Json(payload or {})
+
+
+def format_resolution_summary(summary: Dict[str, Any] | None) -> str | None:
+    """Render the structured summary as the text block the admin UI shows."""
+    if not summary:
+        return None
+    if summary.get("note"):
+        return f"Issue resolved - {summary['note']}."
+    return "\n".join([
+        "RESOLUTION SUMMARY:",
+        f"- Initial Issue: {summary.get('initial_issue', '')}",
+        f"- Resolution Method: {summary.get('method', '')}",
+        f"- Conversation Length: {summary.get('message_count', 0)} messages",
+        f"- Resolution Time: {summary.get('resolved_at', '')}",
+        f"- Customer Confirmed: {'Yes' if summary.get('customer_confirmed') else 'No'}",
+    ])
+
+
+def legacy_resolution_summary(description: str | None) -> str | None:
+    """Summary text of a ticket resolved before resolution_summary existed."""
+    if description and LEGACY_SUMMARY_MARKER in description:
+        return description.split(LEGACY_SUMMARY_MARKER, 1)[1].strip()
+    return None
@@ -1,33 +1,55 @@
+import logging
 import socketio
+from .core.logs import get_logger, log_event
 from .services.chat import handle_incoming_message
+from .services.admission import chat_admission, Rejected
+from .services.connections import connections
+
+
+logger = get_logger("sockets")
 
 
 def register_socketio(sio: socketio.AsyncServer):
     @sio.event
     async def connect(sid, environ):
+        if not connections.opened(sio, sid, environ):
+            raise socketio.exceptions.ConnectionRefusedError("too many connections from this address")
         await sio.emit("connected", {"sid": sid}, to=sid)
 
     @sio.event
     async def disconnect(sid):
-        # no-op; could log
-        pass
+        connections.closed(sid)
 
     @sio.event
     async def chat_message(sid, data):
         # data: { session_id, content, user_email? }
+        connections.touch(sid)
         try:
-            print(f"🔍 SOCKET: Received chat_message: {data}", flush=True)
-            response = await handle_incoming_message(data)
-            print(f"🔍 SOCKET: Emitting bot_message with related field: {response.get('related', [])}", flush=True)
-            print(f"🔍 SOCKET: Full response: {response}", flush=True)
+            log_event(logger, logging.DEBUG, "socket.chat_message", sid=sid,
+                      session_id=data.get("session_id"), length=len(data.get("content") or ""))
+            async with chat_admission.admit(data.get("session_id")):
+                response = await handle_incoming_message(data)
+            log_event(logger, logging.DEBUG, "socket.bot_message", sid=sid,
+                      session_id=response.get("session_id"), related=len(response.get("related") or []))
             # Broadcast to all connected clients to avoid edge-cases with sid changes during upgrades
             await sio.emit("bot_message", response)
+        except Rejected as e:
+            # Only the sender sees this; the client may resend after retry_after seconds
+            log_event(logger, logging.INFO, "socket.chat_message_rejected", e.reason,
+                      sid=sid, session_id=data.get("session_id"), retry_after=e.retry_after)
+            await sio.emit("bot_message", {
+                "session_id": data.get("session_id"),
+                "role": "assistant",
+                "content": "We're receiving a lot of messages right now. Please wait a moment and try again.",
+                "related": [],
+                "busy": True,
+                "reason": e.reason,
+                "retry_after": e.retry_after,
+            }, to=sid)
         except Exception as e:
             # Never fail silently; emit a safe fallback and log the error
-            try:
-                print(f"❌ SOCKET ERROR handling chat_message: {e}", flush=True)
-            except Exception:
-                pass
+            log_event(logger, logging.ERROR, "socket.chat_message_failed", str(e),
+                      sid=sid, session_id=(data or {}).get("session_id"), exc_info=True)
             fallback = {
                 "session_id": data.get("session_id"),
                 "role": "assistant",
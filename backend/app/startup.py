@@ -1,10 +1,44 @@
 from fastapi import FastAPI
+from .core.logs import configure_logging, shutdown_logging
 from .db.postgres import init_schema
+from .services.faq_writer import faq_writer, backfill_question_norms
+from .services.faq_catalog import backfill_faq_tags, faq_catalog
+from .services.chat_writer import chat_writer
+from .services.sessions import ensure_session_indexes, backfill_sessions
+from .services.case_archive import ensure_indexes as ensure_case_memory_indexes
+from .services.connections import connections
+from .services.jobs import job_runner
+from .services import faq_mining  # noqa: F401  registers the faq_mining job
 
 
 def register_events(app: FastAPI) -> None:
     @app.on_event("startup")
     def on_startup():
+        configure_logging()
         init_schema()
+        backfill_question_norms()
+        backfill_faq_tags()
+        try:
+            # (session_id, ts) serves history reads, tiering and the archive jobs
+            ensure_case_memory_indexes()
+            ensure_session_indexes()
+            backfill_sessions()
+        except Exception:
+            pass
+        faq_catalog.start()
+        faq_writer.start()
+        chat_writer.start()
+        job_runner.start()
+
+    @app.on_event("shutdown")
+    def on_shutdown():
+        connections.stop()
+        # An interrupted job resumes from its checkpoint in another worker
+        job_runner.stop()
+        # Flush buffered chat messages and FAQ candidates before the worker exits
+        chat_writer.stop()
+        faq_writer.stop()
+        faq_catalog.stop()
+        shutdown_logging()
 
 
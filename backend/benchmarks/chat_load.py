@@ -0,0 +1,382 @@
+"""End-to-end load test for the Socket.IO chat path.
+
+A fleet of Socket.IO clients sends a fixed mix of messages, one chat session
+per client, and times each ``chat_message`` -> ``bot_message`` round trip.
+The server runs in a child process with the Gemini calls replaced by fakes
+that sleep for a configurable time, so numbers do not depend on a provider.
+
+Backing services come from benchmarks/docker-compose.yml (throwaway
+Postgres, Mongo and Redis on non-default ports, data on tmpfs):
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.chat_load --clients 50 --messages 20 --json run.json
+    python -m benchmarks.chat_load --baseline run.json --max-regression 0.2
+
+Run from backend/. Results are grouped by the branch the server reports
+(``source`` in bot_message, enabled through DEBUG_TIMINGS): cache, faq, llm,
+escalation, fallback. With --baseline the run exits 1 if any branch's p95 is
+more than --max-regression worse than the baseline's.
+"""
+from typing import Any, Dict, List, Tuple
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+
+# Defaults matching benchmarks/docker-compose.yml; exported env vars win.
+BENCH_ENV = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "55432",
+    "POSTGRES_DB": "csupport_bench",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "bench",
+    "MONGO_URI": "mongodb://localhost:57017",
+    "MONGO_DB": "csupport_bench",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "56379",
+    "OPENAI_API_KEY": "",
+    "DEBUG_TIMINGS": "1",
+    "LOG_LEVEL": "WARNING",
+}
+
+BRANCHES = ("cache", "faq", "llm", "escalation")
+
+_VERBS = ["update", "export", "rename", "archive", "transfer", "verify", "schedule", "download", "merge", "restore"]
+_ADJS = ["primary", "shared", "monthly", "legacy", "mobile", "default", "regional", "annual", "secondary", "custom"]
+_NOUNS = ["invoice", "workspace", "profile", "webhook", "report", "dashboard", "password", "plan", "address", "device"]
+_OWNERS = ["team", "organization", "subaccount", "project", "store", "family", "partner", "branch", "cohort", "tenant"]
+
+
+def _question(rng: random.Random) -> str:
+    serial = "".join(rng.choice("abcdefghjkmnpqrstuvwxyz23456789") for _ in range(12))
+    return (f"How do I {rng.choice(_VERBS)} the {rng.choice(_ADJS)} {rng.choice(_NOUNS)} "
+            f"for my {rng.choice(_OWNERS)} {serial}?")
+
+
+@dataclass
+class Workload:
+    """Per-client message plans plus the data the server must be primed with."""
+
+    plans: List[List[Tuple[str, str]]]
+    faqs: List[Tuple[str, str]] = field(default_factory=list)
+    cached: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def build_workload(clients: int, messages: int, mix: Dict[str, float], seed: int) -> Workload:
+    """Deterministic for a given seed, except LLM questions, which get a per-run
+    suffix so answers remembered by earlier runs cannot turn them into cache hits."""
+    rng = random.Random(seed)
+    run_tag = os.urandom(3).hex()
+    workload = Workload(plans=[])
+    cached = [(_question(rng), "Here's how: open Settings and follow these steps.") for _ in range(20)]
+    workload.cached = cached
+    names, weights = zip(*mix.items())
+    for _ in range(clients):
+        plan = []
+        for _ in range(messages):
+            branch = rng.choices(names, weights)[0]
+            if branch == "cache":
+                text = rng.choice(cached)[0]
+            elif branch == "faq":
+                # Each FAQ is asked once: the first hit populates the answer cache
+                text = _question(rng)
+                workload.faqs.append((text, f"Here's how: {text[:-1].lower()} from the admin panel."))
+            elif branch == "llm":
+                text = f"{_question(rng)[:-1]} {run_tag}?"
+            else:
+                text = "please escalate"
+            plan.append((branch, text))
+        workload.plans.append(plan)
+    return workload
+
+
+def prime(workload: Workload) -> None:
+    """Create the schema, seed FAQs and pre-populate the shared (Redis) answer cache."""
+    from app.db.postgres import init_schema
+    from app.services.answer_cache import answer_cache
+    from app.services.faq_writer import upsert_faqs, backfill_question_norms
+
+    init_schema()
+    backfill_question_norms()
+    answer_cache.clear()
+    for start in range(0, len(workload.faqs), 500):
+        upsert_faqs(workload.faqs[start:start + 500])
+    for question, answer in workload.cached:
+        answer_cache.put(question, answer)
+
+
+@dataclass
+class Sample:
+    client: int
+    expected: str
+    source: str
+    seconds: float
+    timings: Dict[str, float] | None
+
+
+async def _run_client(idx: int, url: str, plan: List[Tuple[str, str]], run_id: str,
+                      think: float, timeout: float, samples: List[Sample], errors: List[str]) -> None:
+    import socketio
+
+    session_id = f"bench-{run_id}-{idx}"
+    sio = socketio.AsyncClient(reconnection=False)
+    waiting: Dict[str, asyncio.Future] = {}
+
+    @sio.on("bot_message")
+    async def on_bot_message(data):
+        # bot_message is broadcast; keep only replies for this client's session
+        fut = waiting.get("reply")
+        if data.get("session_id") == session_id and fut is not None and not fut.done():
+            fut.set_result(data)
+
+    try:
+        await sio.connect(url, transports=["websocket"])
+    except Exception as exc:
+        errors.append(f"client {idx}: connect failed: {exc}")
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        for expected, text in plan:
+            waiting["reply"] = loop.create_future()
+            started = time.perf_counter()
+            await sio.emit("chat_message", {
+                "session_id": session_id,
+                "content": text,
+                "user_email": f"{session_id}@bench.local",
+                "category": "Technical Support",
+            })
+            try:
+                data = await asyncio.wait_for(waiting["reply"], timeout)
+            except asyncio.TimeoutError:
+                errors.append(f"client {idx}: no reply within {timeout}s")
+                continue
+            samples.append(Sample(idx, expected, data.get("source") or "unknown",
+                                  time.perf_counter() - started, data.get("timings")))
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        await sio.disconnect()
+
+
+async def run_fleet(url: str, workload: Workload, think: float, timeout: float, ramp: float) -> Tuple[List[Sample], List[str], float]:
+    run_id = os.urandom(4).hex()
+    samples: List[Sample] = []
+    errors: List[str] = []
+
+    async def delayed(idx: int, plan):
+        await asyncio.sleep(ramp * idx / max(len(workload.plans), 1))
+        await _run_client(idx, url, plan, run_id, think, timeout, samples, errors)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(delayed(i, plan) for i, plan in enumerate(workload.plans)))
+    return samples, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: List[Sample], errors: List[str], wall: float) -> Dict[str, Any]:
+    def dist(values: List[float]) -> Dict[str, float]:
+        values = sorted(values)
+        return {
+            "n": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+    by_source: Dict[str, List[float]] = {}
+    stages: Dict[str, List[float]] = {}
+    mismatched = 0
+    for s in samples:
+        by_source.setdefault(s.source, []).append(s.seconds)
+        mismatched += s.source != s.expected
+        for name, ms in (s.timings or {}).items():
+            if name != "total":
+                stages.setdefault(name, []).append(ms / 1000.0)
+    return {
+        "messages": len(samples),
+        "errors": len(errors),
+        "wall_seconds": round(wall, 3),
+        "throughput_per_s": round(len(samples) / wall, 2) if wall else 0.0,
+        "unexpected_branch": mismatched,
+        "all": dist([s.seconds for s in samples]),
+        "branches": {name: dist(v) for name, v in sorted(by_source.items())},
+        "server_stages": {name: dist(v) for name, v in sorted(stages.items())},
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"messages={report['messages']} errors={report['errors']} wall={report['wall_seconds']}s "
+          f"throughput={report['throughput_per_s']}/s unexpected_branch={report['unexpected_branch']}")
+    header = f"{'':<24}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    for title, rows in (("branch", dict(report["branches"], all=report["all"])), ("server stage", report["server_stages"])):
+        print(f"\n{title}\n{header}")
+        for name, d in rows.items():
+            print(f"{name:<24}{d['n']:>7}{d['p50_ms']:>10}{d['p95_ms']:>10}{d['p99_ms']:>10}{d['max_ms']:>10}")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    regressions = []
+    for name, base in baseline.get("branches", {}).items():
+        cur = report["branches"].get(name)
+        if cur and base.get("p95_ms") and cur["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {cur['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+    return regressions
+
+
+# ---- server side ---------------------------------------------------------
+
+def install_fake_llms(latency: float, jitter: float, related_latency: float, error_rate: float, seed: int) -> None:
+    """Replace the Gemini calls in services/chat with sleeps of the given length.
+
+    The fakes block like the real SDK calls do: the answer runs in a worker
+    thread, related-question generation runs on the event loop.
+    """
+    from app.core.tracing import traced
+    from app.services import chat
+
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def delay(base: float) -> float:
+        with lock:
+            return max(0.0, rng.gauss(base, base * jitter)) if jitter else base
+
+    @traced("llm_gemini")
+    def fake_gemini_answer(query: str) -> str | None:
+        time.sleep(delay(latency))
+        with lock:
+            failed = rng.random() < error_rate
+        if failed:
+            return None
+        return f"Here's how to handle that: follow these steps for '{query[:60]}'."
+
+    def fake_related(query: str, category: str | None, limit: int = 3) -> List[str]:
+        time.sleep(delay(related_latency))
+        return [f"How do I fix common {category or 'account'} issue number {i}?" for i in range(1, limit + 1)]
+
+    chat._gemini_answer = fake_gemini_answer
+    chat._generate_related_questions_online = fake_related
+
+
+def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    install_fake_llms(args.llm_latency_ms / 1000.0, args.llm_jitter, args.related_latency_ms / 1000.0,
+                      args.llm_error_rate, args.seed)
+    from app.main import asgi
+    uvicorn.run(asgi, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/metrics", timeout=2):
+                return
+        except Exception:
+            time.sleep(0.5)
+    raise SystemExit("server did not become ready")
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in BRANCHES:
+            raise argparse.ArgumentTypeError(f"unknown branch {name!r}; expected one of {BRANCHES}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", nargs="?", default="run", choices=("run", "serve"))
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=20, help="messages per client")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("cache=0.4,faq=0.2,llm=0.3,escalation=0.1"))
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a reply and the next message")
+    parser.add_argument("--ramp-seconds", type=float, default=1.0, help="spread client connects over this long")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-message reply timeout")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="target an already running server instead of spawning one "
+                                      "(it must run with DEBUG_TIMINGS=1 and use the same stores "
+                                      "as the POSTGRES_*/MONGO_*/REDIS_* env of this process)")
+    parser.add_argument("--llm-latency-ms", type=float, default=250.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="stddev as a fraction of the latency")
+    parser.add_argument("--related-latency-ms", type=float, default=250.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_out", help="write the report here")
+    parser.add_argument("--baseline", help="report JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    if args.mode == "serve":
+        serve(args)
+        return 0
+
+    workload = build_workload(args.clients, args.messages, args.mix, args.seed)
+    prime(workload)
+
+    proc = None
+    url = args.url
+    if not url:
+        url = f"http://127.0.0.1:{args.port}"
+        server_args = [sys.executable, "-m", "benchmarks.chat_load", "serve", "--port", str(args.port),
+                       "--seed", str(args.seed), "--llm-latency-ms", str(args.llm_latency_ms),
+                       "--llm-jitter", str(args.llm_jitter), "--related-latency-ms", str(args.related_latency_ms),
+                       "--llm-error-rate", str(args.llm_error_rate)]
+        proc = subprocess.Popen(server_args, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        if proc is not None:
+            wait_ready(url, proc)
+        samples, errors, wall = asyncio.run(run_fleet(url, workload, args.think_ms / 1000.0, args.timeout, args.ramp_seconds))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = summarize(samples, errors, wall)
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("json_out", "baseline", "mode")}
+    print_report(report)
+    for err in errors[:10]:
+        print(f"error: {err}", file=sys.stderr)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Accuracy corpus and micro-benchmark for the chat intent matcher.
+
+Run from backend/:  python -m benchmarks.intents
+Exits non-zero if any corpus case is misclassified. The corpus also runs
+under pytest as tests/test_intents.py.
+"""
+import sys
+import timeit
+
+from app.services.intents import classify_message, offers_solution
+
+
+# (message, expected intents). Intents not listed are expected to be False.
+MESSAGE_CORPUS = [
+    ("yes, resolved", {"resolved"}),
+    ("That helps, thanks!", {"resolved"}),
+    ("thanks", {"resolved"}),
+    ("Thank you so much", {"resolved"}),
+    ("perfect, that works", {"resolved"}),
+    ("awesome", {"resolved"}),
+    ("all set, good to go", {"resolved"}),
+    ("That’s what I needed", {"resolved"}),
+    ("problem solved", {"resolved"}),
+    ("great", {"resolved"}),
+    ("no thanks", {"negated", "problem"}),
+    ("No thank you, I still have a question", {"negated", "problem"}),
+    ("it's not fixed", {"negated", "problem"}),
+    ("thanks but it still doesn't work", {"negated", "problem"}),
+    ("that didn't help", {"negated", "problem"}),
+    ("is it resolved?", set()),
+    ("The price is greater than last month", set()),
+    ("my prefix setting is wrong", set()),
+    ("congratulations on the launch", set()),
+    ("!escalate", {"escalate"}),
+    ("/escalate", {"escalate"}),
+    ("please escalate", {"escalate"}),
+    ("Escalate now", {"escalate"}),
+    ("I want to talk to a human", {"escalate"}),
+    ("can I speak with a real person", {"escalate"}),
+    ("I want a human agent", {"escalate"}),
+    ("connect me to a live agent", {"escalate"}),
+    ("is this a real person?", set()),
+    ("the live agent earlier said to reinstall", set()),
+    ("my human agent account is locked", set()),
+    ("no need to escalate, thanks", {"negated", "problem"}),
+    ("I don't want a human agent", {"negated", "problem"}),
+    ("I do not need to talk to a person", {"negated", "problem"}),
+    ("don't need to speak with an agent, thanks", {"negated", "problem"}),
+    ("it's still not working, let me talk to a human", {"escalate", "negated", "problem"}),
+    ("How do I reset my password?", {"problem"}),
+    ("I'm getting an error when I pay", {"problem"}),
+    ("The app has errors on startup", {"problem"}),
+    ("login is not working", {"negated", "problem"}),
+    ("I can't log in", {"problem"}),
+    ("What are your business hours", set()),
+]
+
+ANSWER_CORPUS = [
+    ("Here's how to reset it: open Settings and choose Security.", True),
+    ("Follow these steps to update your card.", True),
+    ("You need to clear your cache first.", True),
+    ("Our office is open 9 to 5.", False),
+    ("Thanks for reaching out!", False),
+]
+
+
+def _legacy_resolution(content: str) -> bool:
+    keywords = [
+        'yes, resolved', 'that helps, thanks', 'resolved', 'solved', 'fixed',
+        'that works', 'perfect', 'thank you', 'thanks', 'great', 'awesome',
+        'that answers it', 'that\'s what i needed', 'exactly what i needed',
+        'problem solved', 'issue resolved', 'all set', 'good to go'
+    ]
+    content_lower = content.lower().strip()
+    return any(keyword in content_lower for keyword in keywords)
+
+
+def check_accuracy() -> int:
+    failures = 0
+    for text, expected in MESSAGE_CORPUS:
+        got = classify_message(text)
+        actual = {name for name in ("escalate", "resolved", "problem", "negated") if getattr(got, name)}
+        if actual != expected:
+            failures += 1
+            print(f"MISMATCH {text!r}: expected {sorted(expected)}, got {sorted(actual)}")
+    for text, expected in ANSWER_CORPUS:
+        if offers_solution(text) != expected:
+            failures += 1
+            print(f"MISMATCH answer {text!r}: expected {expected}")
+    legacy_wrong = sum(_legacy_resolution(t) != ("resolved" in e) for t, e in MESSAGE_CORPUS)
+    total = len(MESSAGE_CORPUS) + len(ANSWER_CORPUS)
+    print(f"accuracy: {total - failures}/{total} (legacy resolution check wrong on {legacy_wrong}/{len(MESSAGE_CORPUS)} messages)")
+    return failures
+
+
+def benchmark(number: int = 20000) -> None:
+    texts = [t for t, _ in MESSAGE_CORPUS]
+
+    def run_new():
+        for t in texts:
+            classify_message(t)
+
+    def run_legacy():
+        for t in texts:
+            _legacy_resolution(t)
+
+    for name, fn in (("compiled matcher (all intents)", run_new), ("legacy substring (resolution only)", run_legacy)):
+        seconds = timeit.timeit(fn, number=number // len(texts))
+        per_call_us = seconds / (number // len(texts) * len(texts)) * 1e6
+        print(f"{name:38s} {per_call_us:7.2f} us/message")
+
+
+if __name__ == "__main__":
+    failed = check_accuracy()
+    benchmark()
+    sys.exit(1 if failed else 0)
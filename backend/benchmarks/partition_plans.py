@@ -0,0 +1,80 @@
+"""Query plans of the date-range analytics queries against partitioned tickets.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for the /admin/analytics ticket queries over
+a week, a month, a quarter and the whole history, and reports how many of the
+monthly partitions each plan touched, its execution time and buffer reads.
+Seed first so there is enough data for the plans to mean something:
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    python -m tools.seed_synthetic --tickets 2000000 --faqs 1000 --skip-mongo --truncate
+    python -m benchmarks.partition_plans --end 2025-01-01 [--verbose]
+
+Against an unpartitioned tickets table (before `tools.ticket_partitions
+migrate`) the same script prints the baseline plans for comparison.
+"""
+from typing import List, Tuple
+from datetime import datetime, timedelta
+import argparse
+import re
+import sys
+
+from app.db.postgres import get_postgres_connection
+from app.db.partitions import ticket_partitions, tickets_partitioned
+
+
+# The /admin/analytics queries, with its created_at range filter
+QUERIES = {
+    "active": "SELECT COUNT(*) FROM tickets WHERE status IN ('open','in_progress','escalated') AND created_at >= %s AND created_at <= %s",
+    "resolved": "SELECT COUNT(*) FROM tickets WHERE status = 'resolved' AND created_at >= %s AND created_at <= %s",
+    "unique_users": "SELECT COUNT(DISTINCT user_email) FROM tickets WHERE created_at >= %s AND created_at <= %s",
+    "by_category": "SELECT category, COUNT(*) FROM tickets WHERE created_at >= %s AND created_at <= %s GROUP BY category",
+}
+_SCAN_RE = re.compile(r" on (tickets_p\d{4}_\d{2}|tickets_default|tickets)\b")
+_TIME_RE = re.compile(r"Execution Time: ([0-9.]+) ms")
+_BUFFERS_RE = re.compile(r"Buffers: shared(?: hit=(\d+))?(?: read=(\d+))?")
+
+
+def explain(cur, sql: str, params: Tuple) -> Tuple[List[str], str]:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)
+    plan = "\n".join(r[0] for r in cur.fetchall())
+    return sorted(set(_SCAN_RE.findall(plan))), plan
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--end", default="2025-01-01", help="end of the seeded history (seed_synthetic --end)")
+    parser.add_argument("--verbose", action="store_true", help="print every full plan")
+    args = parser.parse_args(argv)
+
+    end = datetime.fromisoformat(args.end)
+    ranges = {
+        "week": (end - timedelta(days=7), end),
+        "month": (end - timedelta(days=30), end),
+        "quarter": (end - timedelta(days=91), end),
+        "all": (datetime(1970, 1, 1), end),
+    }
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        partitioned = tickets_partitioned(cur)
+        total = len(ticket_partitions(cur)) if partitioned else 1
+        print(f"tickets {'partitioned into ' + str(total) + ' partitions' if partitioned else 'is one heap'}\n")
+        print(f"{'query':<14}{'range':<9}{'scanned':>9}{'exec ms':>10}{'hit':>10}{'read':>10}")
+        for range_name, (lo, hi) in ranges.items():
+            for name, sql in QUERIES.items():
+                scanned, plan = explain(cur, sql, (lo, hi))
+                ms = float(_TIME_RE.search(plan).group(1))
+                hit = read = 0
+                m = _BUFFERS_RE.search(plan)  # first line is the top node's total
+                if m:
+                    hit, read = int(m.group(1) or 0), int(m.group(2) or 0)
+                print(f"{name:<14}{range_name:<9}{f'{len(scanned)}/{total}':>9}{ms:>10.1f}{hit:>10}{read:>10}")
+                if args.verbose:
+                    print(plan + "\n")
+        conn.rollback()
+    finally:
+        cur.close(); conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
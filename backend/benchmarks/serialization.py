@@ -0,0 +1,146 @@
+"""Encode time and wire size for chat and admin payloads.
+
+Socket.IO: the default JSON packet vs the msgpack packet used on the
+SOCKETIO_MSGPACK_PATH endpoint, for a typical bot_message.
+REST: FastAPI's default path (jsonable_encoder + JSONResponse) vs
+ORJSONResponse as default class vs fast_json() (orjson, no encoder pass),
+for /admin/cases-table and /admin/users-live sized payloads.
+Compression: gzip and brotli (if installed) of the encoded cases-table body at
+the COMPRESSION_* defaults used by CompressionMiddleware.
+
+Run from backend/:  python -m benchmarks.serialization [--tickets 200]
+"""
+from typing import Any, Callable, Dict, List
+from datetime import datetime, timedelta
+import argparse
+import sys
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from socketio import packet
+
+
+def bot_message() -> Dict[str, Any]:
+    return {
+        "session_id": "c0a8012e-5d2b-4f7e-9a63-1f2e3d4c5b6a",
+        "role": "assistant",
+        "content": ("Here's how to update your payment method: open Account Settings, choose Billing, "
+                    "then Payment Methods. Click 'Add Payment Method', enter the card details and save. "
+                    "Your next invoice will use the new card.\n\n✅ Does this answer resolve your issue? "
+                    "If so, please let me know by saying 'yes, resolved' or 'that helps, thanks'."),
+        "related": ["How do I download my invoice?", "When will I be charged for my subscription?",
+                    "How do I cancel my subscription?"],
+    }
+
+
+def cases_table(tickets: int, messages_per_ticket: int) -> Dict[str, Any]:
+    items = []
+    for i in range(tickets):
+        items.append({
+            "customer_name": f"Customer {i}",
+            "customer_email": f"user{i}@example.com",
+            "subject": "Payment failed on renewal",
+            "category": "Billing Question",
+            "priority": "medium",
+            "status": "resolved" if i % 3 else "open",
+            "messages": [{"role": "user" if j % 2 == 0 else "assistant",
+                          "content": "My card was declined when the subscription renewed, what should I do?" if j % 2 == 0
+                          else "Please update the card under Billing > Payment Methods and retry the payment."}
+                         for j in range(messages_per_ticket)],
+            "resolution_summary": "Customer updated the expired card and the renewal succeeded." if i % 3 else None,
+        })
+    return {"items": items}
+
+
+def users_live(sessions: int) -> Dict[str, Any]:
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    return {"sessions": [{
+        "session_id": f"session-{i:06d}",
+        "user_email": f"user{i}@example.com",
+        "customer_name": f"Customer {i}",
+        "subject": "Login problem",
+        "category": "Technical Support",
+        "last_message_role": "assistant",
+        "last_message": "Try resetting your password from the login page.",
+        "last_at": now - timedelta(minutes=i),
+        "started_at": now - timedelta(minutes=i + 15),
+        "status": "open",
+        "priority": "medium",
+        "has_prefill": True,
+    } for i in range(sessions)]}
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    """Best per-call seconds over five runs of about 0.2 s each."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def socketio_rows(payload: Dict[str, Any]) -> List[tuple]:
+    rows = []
+    json_pkt = packet.Packet(packet.EVENT, data=["bot_message", payload], namespace="/")
+    rows.append(("socket.io json", len(json_pkt.encode().encode("utf-8")), _time(json_pkt.encode)))
+    try:
+        from socketio.msgpack_packet import MsgPackPacket
+    except ImportError:
+        rows.append(("socket.io msgpack", None, None))
+    else:
+        mp_pkt = MsgPackPacket(packet.EVENT, data=["bot_message", payload], namespace="/")
+        rows.append(("socket.io msgpack", len(mp_pkt.encode()), _time(mp_pkt.encode)))
+    return rows
+
+
+def rest_rows(name: str, payload: Dict[str, Any]) -> List[tuple]:
+    rows = [(f"{name} default", len(JSONResponse(jsonable_encoder(payload)).body),
+             _time(lambda: JSONResponse(jsonable_encoder(payload))))]
+    try:
+        from fastapi.responses import ORJSONResponse
+        import orjson  # noqa: F401
+    except ImportError:
+        return rows + [(f"{name} orjson", None, None)]
+    rows.append((f"{name} orjson class", len(ORJSONResponse(jsonable_encoder(payload)).body),
+                 _time(lambda: ORJSONResponse(jsonable_encoder(payload)))))
+    rows.append((f"{name} fast_json", len(ORJSONResponse(payload).body), _time(lambda: ORJSONResponse(payload))))
+    return rows
+
+
+def compression_rows(name: str, payload: Dict[str, Any]) -> List[tuple]:
+    from app.core.compression import brotli, compress
+    from app.core.config import settings
+
+    body = JSONResponse(jsonable_encoder(payload)).body
+    rows = []
+    for encoding, available in (("gzip", True), ("br", brotli is not None)):
+        if not available:
+            rows.append((f"{name} {encoding}", None, None))
+            continue
+        run = lambda: compress(body, encoding, settings.COMPRESSION_GZIP_LEVEL, settings.COMPRESSION_BROTLI_QUALITY)
+        rows.append((f"{name} {encoding}", len(run()), _time(run)))
+    return rows
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=200, help="rows in the cases-table payload")
+    parser.add_argument("--messages", type=int, default=10, help="messages per ticket")
+    parser.add_argument("--sessions", type=int, default=500, help="rows in the users-live payload")
+    args = parser.parse_args(argv)
+
+    rows = socketio_rows(bot_message())
+    rows += rest_rows("cases-table", cases_table(args.tickets, args.messages))
+    rows += rest_rows("users-live", users_live(args.sessions))
+    rows += compression_rows("cases-table", cases_table(args.tickets, args.messages))
+
+    print(f"{'payload / encoder':<30}{'bytes':>12}{'encode us':>14}")
+    for name, size, seconds in rows:
+        if size is None:
+            print(f"{name:<30}{'n/a (not installed)':>26}")
+        else:
+            print(f"{name:<30}{size:>12}{seconds * 1e6:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Soak test for Socket.IO connection lifecycle.
+
+Opens waves of raw engine.io websocket connections against a server spawned
+with short heartbeat and idle timeouts, mixing four client behaviours:
+
+* polite  - connects, holds for a while, disconnects cleanly;
+* abrupt  - connects, then drops the TCP connection without a goodbye;
+* zombie  - connects and never answers pings (a vanished client whose TCP
+            connection stays half-open); the heartbeat must drop it;
+* idle    - answers pings but never sends a message; the reaper must drop it.
+
+The live connection gauge is sampled from /metrics throughout. After the last
+wave the test waits out the timeouts and passes only if the gauge falls back
+to at most --tolerance connections. A final phase opens more connections
+than SOCKET_MAX_PER_IP from one address and checks the excess is refused.
+
+Needs the backing services from benchmarks/docker-compose.yml and
+prometheus-client in the server environment. Run from backend/:
+    python -m benchmarks.socket_soak --duration 120 --wave 50
+The heartbeat configuration itself is checked without services by
+tests/test_socketio_heartbeat.py (``python -m pytest`` from backend/).
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.chat_load import BENCH_ENV, wait_ready
+
+
+BEHAVIOURS = ("polite", "abrupt", "zombie", "idle")
+_GAUGE_RE = re.compile(r"^(socketio_connections|socketio_memory_per_connection_bytes) ([0-9.e+-]+)$", re.M)
+
+
+def read_gauges(url: str) -> Dict[str, float]:
+    try:
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as resp:
+            text = resp.read().decode()
+    except Exception:
+        return {}
+    return {name: float(value) for name, value in _GAUGE_RE.findall(text)}
+
+
+async def open_socket(ws_url: str):
+    """Engine.io v4 open + Socket.IO namespace connect. Returns (ws, accepted)."""
+    from websockets.asyncio.client import connect
+
+    ws = await connect(ws_url, open_timeout=10, ping_interval=None)
+    await ws.recv()  # engine.io OPEN: 0{"sid":...,"pingInterval":...}
+    await ws.send("40")
+    while True:
+        # The connect handler may emit events before the CONNECT ack (40) or error (44)
+        reply = await ws.recv()
+        if reply.startswith(("40", "44")):
+            return ws, reply.startswith("40")
+
+
+async def run_client(ws_url: str, behaviour: str, hold: float, stop: asyncio.Event, counts: Dict[str, int]) -> None:
+    try:
+        ws, accepted = await open_socket(ws_url)
+    except Exception:
+        counts["connect_failed"] += 1
+        return
+    if not accepted:
+        counts["refused"] += 1
+        await ws.close()
+        return
+    counts[behaviour] += 1
+    try:
+        if behaviour == "polite":
+            await _answer_pings(ws, time.monotonic() + hold)
+            await ws.send("41")
+            await ws.close()
+        elif behaviour == "abrupt":
+            await asyncio.sleep(hold)
+            ws.transport.abort()
+        elif behaviour == "zombie":
+            # Never read, so engine.io pings go unanswered; hold the socket until the end
+            await stop.wait()
+            ws.transport.abort()
+        else:
+            closed_by_server = await _answer_pings(ws, None, stop)
+            counts["idle_reaped"] += closed_by_server
+            if not closed_by_server:
+                ws.transport.abort()
+    except Exception:
+        counts["client_errors"] += 1
+
+
+async def _answer_pings(ws, deadline: float | None, stop: asyncio.Event | None = None) -> bool:
+    """Reply to engine.io pings until the deadline, ``stop`` or a server close (returns True)."""
+    while True:
+        timeout = None if deadline is None else deadline - time.monotonic()
+        if timeout is not None and timeout <= 0:
+            return False
+        if stop is not None and stop.is_set():
+            return False
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout if timeout is not None else 1.0)
+        except asyncio.TimeoutError:
+            continue
+        except Exception:
+            return True
+        if msg == "2":
+            await ws.send("3")
+        elif msg.startswith("41") or msg == "1":
+            return True
+
+
+async def soak(args: argparse.Namespace, url: str) -> int:
+    ws_url = url.replace("http", "ws", 1) + "/socket.io/?EIO=4&transport=websocket"
+    rng = random.Random(args.seed)
+    stop = asyncio.Event()
+    counts: Dict[str, int] = {k: 0 for k in (*BEHAVIOURS, "refused", "connect_failed", "client_errors", "idle_reaped")}
+    samples: List[Dict[str, float]] = []
+    tasks: List[asyncio.Task] = []
+
+    async def sample_forever():
+        start = time.monotonic()
+        while True:
+            gauges = await asyncio.to_thread(read_gauges, url)
+            gauges["t"] = round(time.monotonic() - start, 1)
+            samples.append(gauges)
+            print(f"t={gauges['t']:>7}s live={gauges.get('socketio_connections', '?'):>6} "
+                  f"bytes/conn={gauges.get('socketio_memory_per_connection_bytes', '?')}", flush=True)
+            await asyncio.sleep(args.sample_seconds)
+
+    sampler = asyncio.create_task(sample_forever())
+    weights = [args.polite, args.abrupt, args.zombie, args.idle]
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        for _ in range(args.wave):
+            behaviour = rng.choices(BEHAVIOURS, weights)[0]
+            hold = rng.uniform(0.5, args.hold_seconds)
+            tasks.append(asyncio.create_task(run_client(ws_url, behaviour, hold, stop, counts)))
+        await asyncio.sleep(args.wave_seconds)
+
+    # Everything left must be dropped by the heartbeat (zombies) or the reaper (idle)
+    settle = args.ping_interval + args.ping_timeout + args.idle_timeout + args.reap_interval + 10
+    print(f"waves done; waiting {settle}s for heartbeat and reaper", flush=True)
+    await asyncio.sleep(settle)
+    final = (await asyncio.to_thread(read_gauges, url)).get("socketio_connections")
+
+    # Per-address limit, with the server otherwise empty
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    limit_counts: Dict[str, int] = {k: 0 for k in counts}
+    limit_stop = asyncio.Event()
+    burst = [asyncio.create_task(run_client(ws_url, "idle", 0, limit_stop, limit_counts))
+             for _ in range(args.max_per_ip + args.limit_excess)]
+    await asyncio.sleep(5)
+    limit_stop.set()
+    await asyncio.gather(*burst, return_exceptions=True)
+    sampler.cancel()
+
+    peak = max((s.get("socketio_connections", 0) for s in samples), default=0)
+    print(f"\nclients: {counts}")
+    print(f"peak live connections: {peak:.0f}; after settle: {final}")
+    print(f"per-ip burst of {len(burst)}: accepted {limit_counts['idle']}, refused {limit_counts['refused']}")
+    failed = False
+    if final is None:
+        print("FAIL: socketio_connections gauge not available (is prometheus-client installed?)", file=sys.stderr)
+        failed = True
+    elif final > args.tolerance:
+        print(f"FAIL: {final:.0f} connections still live after settle", file=sys.stderr)
+        failed = True
+    if limit_counts["refused"] < args.limit_excess:
+        print(f"FAIL: expected at least {args.limit_excess} refusals past SOCKET_MAX_PER_IP", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=120.0, help="seconds of connection waves")
+    parser.add_argument("--wave", type=int, default=50, help="connections opened per wave")
+    parser.add_argument("--wave-seconds", type=float, default=2.0)
+    parser.add_argument("--hold-seconds", type=float, default=10.0, help="max hold time of polite/abrupt clients")
+    parser.add_argument("--polite", type=float, default=0.5)
+    parser.add_argument("--abrupt", type=float, default=0.2)
+    parser.add_argument("--zombie", type=float, default=0.15)
+    parser.add_argument("--idle", type=float, default=0.15)
+    parser.add_argument("--ping-interval", type=int, default=5)
+    parser.add_argument("--ping-timeout", type=int, default=5)
+    parser.add_argument("--idle-timeout", type=int, default=20)
+    parser.add_argument("--reap-interval", type=int, default=5)
+    parser.add_argument("--max-per-ip", type=int, default=1000)
+    parser.add_argument("--limit-excess", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0)
+    parser.add_argument("--sample-seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    for key, value in BENCH_ENV.items():
+        env.setdefault(key, value)
+    env.update({
+        "SOCKETIO_PING_INTERVAL_SECONDS": str(args.ping_interval),
+        "SOCKETIO_PING_TIMEOUT_SECONDS": str(args.ping_timeout),
+        "SOCKET_IDLE_TIMEOUT_SECONDS": str(args.idle_timeout),
+        "SOCKET_REAP_INTERVAL_SECONDS": str(args.reap_interval),
+        "SOCKET_MAX_PER_IP": str(args.max_per_ip),
+    })
+    url = f"http://127.0.0.1:{args.port}"
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.chat_load", "serve", "--port", str(args.port)],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env)
+    try:
+        wait_ready(url, proc)
+        return asyncio.run(soak(args, url))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import pytest
+
+from app.services import answer_cache as cache_module
+from app.services.answer_cache import AnswerCache, normalize_query
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+    def scan_iter(self, *args, **kwargs):
+        raise AssertionError("clear() must not scan the keyspace")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache_module, "get_redis_client", lambda: fake)
+    return fake
+
+
+def _cache(**kwargs):
+    options = {"max_entries": 100, "max_bytes": 1 << 20, "ttl_seconds": 60, "policy": "lru"}
+    options.update(kwargs)
+    return AnswerCache(**options)
+
+
+def test_normalize_keeps_question_words_apart():
+    assert normalize_query("How to cancel?") == "how cancel"
+    assert normalize_query("how to cancel") != normalize_query("when to cancel")
+
+
+def test_normalize_keeps_negations():
+    assert normalize_query("I can't log in") != normalize_query("I log in")
+
+
+def test_semantic_tier_does_not_answer_a_different_question(redis):
+    cache = _cache(similarity=0.1)
+    cache.put("how to cancel", "Open Billing and press Cancel.")
+    assert cache.get("when to cancel") is None
+    assert cache.get("how do I cancel") == "Open Billing and press Cancel."
+
+
+def test_lru_evicts_least_recently_used(redis):
+    cache = _cache(max_entries=2)
+    cache.put("reset password", "a")
+    cache.put("change email", "b")
+    cache.get("reset password")
+    cache.put("delete account", "c")
+    assert set(cache._entries) == {"reset password", "delete account"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lfu_evicts_least_frequently_used(redis):
+    cache = _cache(max_entries=2, policy="lfu")
+    cache.put("reset password", "a")
+    cache.put("change email", "b")
+    cache.get("change email")
+    cache.get("change email")
+    cache.get("reset password")
+    cache.put("delete account", "c")
+    assert set(cache._entries) == {"change email", "delete account"}
+
+
+def test_byte_budget_evicts(redis):
+    cache = _cache()
+    cache.put("reset password", "x" * 100)
+    cache.max_bytes = cache.stats()["bytes"] + 10
+    cache.put("change email", "y" * 100)
+    assert list(cache._entries) == ["change email"]
+
+
+def test_expired_entries_are_dropped(redis, monkeypatch):
+    cache = _cache()
+    cache.put("reset password", "a")
+    redis.data.clear()
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    assert cache.get("reset password") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_clear_bumps_the_generation_instead_of_deleting(redis):
+    cache = _cache()
+    cache.put("reset password", "a")
+    other_worker = _cache()
+    assert other_worker.get("reset password") == "a"
+
+    cache.clear()
+    assert cache.get("reset password") is None
+    # The old key stays until its TTL; it is just no longer addressed
+    assert any(key.endswith(":reset password") for key in redis.data)
+
+    fresh = _cache()
+    assert fresh.get("reset password") is None
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.services import chat_writer as chat_writer_module
+from app.services.batching import BatchWriter
+
+
+class Gate:
+    """flush_fn that records batches and holds the first one until opened."""
+
+    def __init__(self):
+        self.opened = threading.Event()
+        self.batches = []
+
+    def __call__(self, batch):
+        self.opened.wait(5)
+        self.batches.append(list(batch))
+
+    @property
+    def items(self):
+        return [it for batch in self.batches for it in batch]
+
+
+def _writer(gate, overflow, **kwargs):
+    writer = BatchWriter("test", gate, max_batch=1, flush_interval=0.01, max_queue=2, overflow=overflow, **kwargs)
+    # The flusher takes the first item and waits in flush_fn, so the queue fills behind it
+    writer.submit({"n": 0, "key": "a"})
+    deadline = time.monotonic() + 5
+    while writer.stats()["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return writer
+
+
+def _finish(writer, gate):
+    gate.opened.set()
+    writer.stop()
+    return [it["n"] for it in gate.items]
+
+
+def test_drop_newest_rejects_items_once_full():
+    gate = Gate()
+    writer = _writer(gate, "drop_newest")
+    assert writer.submit({"n": 1}) and writer.submit({"n": 2})
+    assert not writer.submit({"n": 3})
+    assert writer.stats()["dropped"] == 1
+    assert _finish(writer, gate) == [0, 1, 2]
+
+
+def test_drop_oldest_evicts_the_oldest_buffered_item():
+    gate = Gate()
+    writer = _writer(gate, "drop_oldest")
+    for n in (1, 2, 3):
+        assert writer.submit({"n": n})
+    assert writer.stats()["dropped"] == 1
+    assert _finish(writer, gate) == [0, 2, 3]
+
+
+def test_block_waits_then_drops_outside_an_event_loop():
+    gate = Gate()
+    writer = _writer(gate, "block", block_seconds=0.01)
+    writer.submit({"n": 1}); writer.submit({"n": 2})
+    started = time.monotonic()
+    assert not writer.submit({"n": 3})
+    assert time.monotonic() - started >= 0.01
+    assert _finish(writer, gate) == [0, 1, 2]
+
+
+def test_pending_tracks_items_by_key_until_flushed_or_released():
+    gate = Gate()
+    writer = _writer(gate, "drop_oldest", key=lambda it: it.get("key"))
+    first = writer.pending("a")[0]
+    second = {"n": 1, "key": "a"}
+    writer.submit(second); writer.submit({"n": 2, "key": "b"})
+    assert [it["n"] for it in writer.pending("a")] == [0, 1]
+    # Evicted items are no longer pending
+    writer.submit({"n": 3, "key": "b"})
+    assert [it["n"] for it in writer.pending("a")] == [0]
+    writer.release([first])
+    assert writer.pending("a") == []
+    _finish(writer, gate)
+    assert writer.pending("b") == []
+
+
+def _bulk_error(codes, write_concern=False):
+    return BulkWriteError({
+        "writeErrors": [{"index": i, "code": code} for i, code in codes],
+        "writeConcernErrors": [{"code": 64}] if write_concern else [],
+    })
+
+
+class FlakyCollection:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def insert_many(self, docs, ordered=True):
+        self.calls.append([d["_id"] for d in docs])
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    monkeypatch.setattr(chat_writer_module.settings, "CHAT_WRITER_RETRIES", 2)
+    monkeypatch.setattr(chat_writer_module.settings, "CHAT_WRITER_RETRY_SECONDS", 0)
+    monkeypatch.setattr(chat_writer_module, "_update_counters", lambda docs: None)
+    monkeypatch.setattr(chat_writer_module, "_stale_sessions", set())
+
+    def install(*errors):
+        fake = FlakyCollection(*errors)
+        monkeypatch.setattr(chat_writer_module, "_case_memory", lambda: fake)
+        return fake
+
+    return install
+
+
+DOCS = [{"_id": i, "session_id": f"s{i}"} for i in range(3)]
+
+
+def test_insert_retries_only_documents_that_did_not_land(collection):
+    fake = collection(_bulk_error([(1, 6)]), _bulk_error([(0, 11000)]))
+    chat_writer_module._insert_messages(DOCS)
+    # The retry's duplicate key error means the document landed meanwhile
+    assert fake.calls == [[0, 1, 2], [1]]
+    assert chat_writer_module._stale_sessions == set()
+
+
+def test_insert_retries_everything_after_a_connection_error(collection):
+    fake = collection(AutoReconnect("gone"))
+    chat_writer_module._insert_messages(DOCS)
+    assert fake.calls == [[0, 1, 2], [0, 1, 2]]
+
+
+def test_insert_gives_up_and_marks_every_session_stale(collection):
+    fake = collection(*[_bulk_error([(2, 6)])] + [_bulk_error([(0, 6)])] * 2)
+    with pytest.raises(BulkWriteError):
+        chat_writer_module._insert_messages(DOCS)
+    assert len(fake.calls) == 3
+    assert chat_writer_module._stale_sessions == {"s0", "s1", "s2"}
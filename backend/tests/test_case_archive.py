@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import gzip
+import os
+
+from bson import ObjectId
+
+from app.services import case_archive
+from app.services.case_archive import export_archived_sessions, read_segment
+
+
+T0 = datetime(2025, 1, 1, 9, 30)
+
+
+class FakeArchive:
+    def __init__(self, docs):
+        self.docs = docs
+        self.ops = []
+
+    def find(self, query):
+        docs = self.docs
+
+        class Cursor:
+            def sort(self, *args):
+                return iter(docs)
+        return Cursor()
+
+    def bulk_write(self, ops, ordered=True):
+        self.ops.extend(ops)
+
+
+def _session(session_id, n):
+    messages = [
+        {"_id": ObjectId(), "role": "user" if i % 2 == 0 else "assistant", "content": f"{session_id} {i} é",
+         "ts": T0 + timedelta(minutes=i)}
+        for i in range(n)
+    ]
+    # Stored out of order; the export sorts by ts
+    return {"_id": session_id, "messages": messages[::-1], "last_ts": messages[-1]["ts"]}
+
+
+def test_exported_sessions_read_back_by_reference(tmp_path, monkeypatch):
+    sessions = [_session("s1", 3), _session("s2", 2)]
+    archive = FakeArchive(sessions)
+    monkeypatch.setattr(case_archive, "get_case_archive_collection", lambda: archive)
+    monkeypatch.setattr(case_archive.settings, "CASE_ARCHIVE_DIR", str(tmp_path))
+
+    stats = export_archived_sessions(T0 + timedelta(days=1), str(tmp_path))
+    assert (stats["sessions"], stats["messages"], stats["files"]) == (2, 5, 1)
+
+    for op, session in zip(archive.ops, sessions):
+        # Only dropped if the messages did not change while being written
+        assert op._filter == {"_id": session["_id"], "messages": {"$size": len(session["messages"])}}
+        ref = op._doc["$push"]["segments"]
+        restored = read_segment(ref)
+        expected = sorted(session["messages"], key=lambda m: m["ts"])
+        assert restored == [{**m, "session_id": session["_id"]} for m in expected]
+
+    # The whole segment is still one valid .jsonl.gz
+    (name,) = os.listdir(tmp_path)
+    with gzip.open(tmp_path / name, "rt", encoding="utf-8") as fh:
+        assert len(fh.read().splitlines()) == 5
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from app.services.connections import ConnectionManager
+
+
+class _FakeServer:
+    def __init__(self):
+        self.disconnected = []
+
+    async def disconnect(self, sid):
+        self.disconnected.append(sid)
+
+
+def _environ(ip, forwarded=None):
+    env = {"REMOTE_ADDR": ip}
+    if forwarded:
+        env["HTTP_X_FORWARDED_FOR"] = forwarded
+    return env
+
+
+def test_reaper_disconnects_only_idle_sids():
+    async def scenario():
+        manager = ConnectionManager(idle_timeout=60, reap_interval=3600, max_per_ip=0, trust_forwarded_for=False)
+        sio = _FakeServer()
+        assert manager.opened(sio, "idle", _environ("10.0.0.1"))
+        assert manager.opened(sio, "active", _environ("10.0.0.2"))
+        manager._conns["idle"].last_seen = time.monotonic() - 120
+        manager.touch("active")
+        reaped = await manager.reap()
+        manager.stop()
+        return manager, sio, reaped
+
+    manager, sio, reaped = asyncio.run(scenario())
+    assert reaped == 1
+    assert sio.disconnected == ["idle"]
+    stats = manager.stats()
+    assert stats["live"] == 1 and stats["reaped"] == 1
+    # The server's disconnect event for a reaped sid is a no-op
+    manager.closed("idle")
+    assert manager.stats()["closed"] == 1
+
+
+def test_per_ip_cap_refuses_excess_and_frees_slots():
+    async def scenario():
+        manager = ConnectionManager(idle_timeout=0, reap_interval=60, max_per_ip=2, trust_forwarded_for=False)
+        sio = _FakeServer()
+        results = [manager.opened(sio, f"s{i}", _environ("10.0.0.1")) for i in range(3)]
+        other = manager.opened(sio, "elsewhere", _environ("10.0.0.2"))
+        manager.closed("s0")
+        again = manager.opened(sio, "s3", _environ("10.0.0.1"))
+        return manager, results, other, again
+
+    manager, results, other, again = asyncio.run(scenario())
+    assert results == [True, True, False]
+    assert other and again
+    assert manager.stats()["refused"] == 1
+
+
+def test_forwarded_for_is_only_used_when_trusted():
+    env = _environ("10.0.0.9", forwarded="203.0.113.5, 10.0.0.9")
+    assert ConnectionManager(0, 60, 0, trust_forwarded_for=False).client_ip(env) == "10.0.0.9"
+    assert ConnectionManager(0, 60, 0, trust_forwarded_for=True).client_ip(env) == "203.0.113.5"
+
+
+def test_limits_are_off_by_default():
+    from app.core.config import settings
+    assert settings.SOCKET_MAX_PER_IP == 0
+    assert settings.SOCKET_IDLE_TIMEOUT_SECONDS == 0
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import faq_mining
+from app.services.faq_mining import faq_candidates, take_candidates
+from app.services.ticket_events import LEGACY_SUMMARY_MARKER
+
+
+T0 = datetime(2026, 1, 1)
+SUMMARY = {"initial_issue": "cannot log in", "method": "FAQ-based solution", "message_count": 4}
+
+
+def _case(i, summary=SUMMARY, legacy=None):
+    return (i, f"subject {i}", "General", summary, legacy, T0 + timedelta(minutes=i))
+
+
+def test_take_candidates_without_cap_takes_everything():
+    per_case = [[("q1", "a1")], [], [("q2", "a2"), ("q3", "a3")]]
+    assert take_candidates(per_case, None) == ([("q1", "a1"), ("q2", "a2"), ("q3", "a3")], 3)
+
+
+def test_take_candidates_stops_before_a_case_that_does_not_fit():
+    per_case = [[("q1", "a1")], [("q2", "a2"), ("q3", "a3")], [("q4", "a4")]]
+    assert take_candidates(per_case, 2) == ([("q1", "a1")], 1)
+
+
+def test_take_candidates_takes_an_oversized_first_case_partially_only_when_allowed():
+    per_case = [[("q1", "a1"), ("q2", "a2")], [("q3", "a3")]]
+    assert take_candidates(per_case, 1, allow_partial=True) == ([("q1", "a1")], 1)
+    assert take_candidates(per_case, 1) == ([], 0)
+
+
+def test_faq_candidates_skips_tickets_without_a_summary(monkeypatch):
+    monkeypatch.setattr(faq_mining.settings, "OPENAI_API_KEY", None)
+    note = {"note": "limited conversation history"}
+    assert faq_candidates([_case(1, summary=None), _case(2, summary=note)]) == [[], []]
+
+
+def test_faq_candidates_raises_without_api_key(monkeypatch):
+    monkeypatch.setattr(faq_mining.settings, "OPENAI_API_KEY", None)
+    with pytest.raises(RuntimeError):
+        faq_candidates([_case(1)])
+
+
+class _FakeCompletions:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][1]["content"])
+        message = type("M", (), {"content": self.text})
+        choice = type("C", (), {"message": message})
+        return type("R", (), {"choices": [choice]})
+
+
+def test_faq_candidates_attributes_pairs_to_cases(monkeypatch):
+    completions = _FakeCompletions("[2] How do I log in?: Reset the password.\n[1] Bad line\nnoise\n[9] Out of range?: x")
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})
+    monkeypatch.setattr(faq_mining.settings, "OPENAI_API_KEY", "key")
+    monkeypatch.setattr(faq_mining, "OpenAI", lambda api_key: client)
+    legacy = f"opening message\n\n{LEGACY_SUMMARY_MARKER}\nold summary"
+    got = faq_candidates([_case(1, summary=None, legacy=legacy), _case(2)])
+    assert got == [[], [("How do I log in?", "Reset the password.")]]
+    # The resolution, not the customer's opening message, is what the model sees
+    assert "old summary" in completions.prompts[0] and "opening message" not in completions.prompts[0]
+    assert "cannot log in" in completions.prompts[0]
+
+
+def test_faq_candidates_propagates_llm_errors(monkeypatch):
+    def boom(api_key):
+        raise ConnectionError("api down")
+    monkeypatch.setattr(faq_mining.settings, "OPENAI_API_KEY", "key")
+    monkeypatch.setattr(faq_mining, "OpenAI", boom)
+    with pytest.raises(ConnectionError):
+        faq_candidates([_case(1)])
+
+
+class _Ctx:
+    def __init__(self, params):
+        self.params = params
+        self.checkpoint = None
+        self.reports = []
+
+    def report(self, progress, checkpoint=None):
+        self.reports.append((progress, checkpoint))
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+
+
+class _Conn:
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mining(monkeypatch):
+    """mine_faqs over an in-memory list of resolved tickets."""
+    tickets = [_case(i) for i in range(1, 6)]
+
+    def resolved_after(cur, after, limit):
+        rows = [t for t in tickets if after is None or (t[5], t[0]) > (datetime.fromisoformat(after[0]), after[1])]
+        return rows[:limit]
+
+    monkeypatch.setattr(faq_mining, "get_postgres_connection", _Conn)
+    monkeypatch.setattr(faq_mining, "_resolved_after", resolved_after)
+    monkeypatch.setattr(faq_mining, "_count_resolved_after", lambda cur, after: len(resolved_after(cur, after, 10**6)))
+    monkeypatch.setattr(faq_mining, "last_checkpoint", lambda kind: None)
+    monkeypatch.setattr(faq_mining, "upsert_faqs", lambda candidates: len(candidates))
+    monkeypatch.setattr(faq_mining.answer_cache, "clear", lambda: None)
+    monkeypatch.setattr(faq_mining.settings, "FAQ_MINING_BATCH_SIZE", 5)
+    return tickets
+
+
+def test_mine_faqs_checkpoint_stops_at_the_last_ticket_kept(mining, monkeypatch):
+    # Two candidates per ticket; max_new=3 fits only the first ticket completely
+    monkeypatch.setattr(faq_mining, "faq_candidates", lambda cases: [[("q", "a"), ("q2", "a2")] for _ in cases])
+    ctx = _Ctx({"limit": 0, "max_new": 3})
+    result = faq_mining.mine_faqs(ctx)
+    assert ctx.checkpoint["after"][1] == 1
+    assert result == {"tickets": 1, "created": 2}
+
+
+def test_mine_faqs_does_not_checkpoint_a_failed_batch(mining, monkeypatch):
+    def fail(cases):
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    monkeypatch.setattr(faq_mining, "faq_candidates", fail)
+    ctx = _Ctx({"limit": 0, "max_new": 0})
+    with pytest.raises(RuntimeError):
+        faq_mining.mine_faqs(ctx)
+    assert ctx.checkpoint["after"] is None and ctx.checkpoint["tickets"] == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services import intent_model
+from tools.train_intent_model import ESCALATION_REPLY, RESOLUTION_REPLY, label_conversations
+
+
+def _conversation(user_text, reply):
+    return [{"role": "user", "content": user_text}, {"role": "assistant", "content": reply}]
+
+
+@pytest.mark.parametrize("text,reply,expected", [
+    ("yes, resolved", f"Great! {RESOLUTION_REPLY}.", [("yes, resolved", "resolved")]),
+    # Legacy substring matching resolved these; the rule matcher does not
+    ("no thanks, still broken", f"Great! {RESOLUTION_REPLY}.", [("no thanks, still broken", "other")]),
+    ("is it fixed?", f"Great! {RESOLUTION_REPLY}.", []),
+    ("I want to talk to a human", f"{ESCALATION_REPLY}.", [("I want to talk to a human", "escalate")]),
+    ("hello", "Hi! How can I help you today?", [("hello", "greeting")]),
+    ("my card was declined", "Sorry to hear that...", [("my card was declined", "other")]),
+])
+def test_labels_are_rechecked_by_the_rule_matcher(text, reply, expected):
+    assert label_conversations([_conversation(text, reply)]) == expected
+
+
+class _FixedModel:
+    def __init__(self, label, prob):
+        self.result = (label, prob)
+
+    def predict(self, text):
+        return self.result
+
+
+@pytest.mark.parametrize("label,prob,text,expected", [
+    ("greeting", 0.8, "hey", "greeting"),
+    ("greeting", 0.5, "hey", None),
+    ("other", 0.99, "anything", None),
+    ("resolved", 0.8, "cheers mate", None),
+    ("resolved", 0.99, "cheers mate", "resolved"),
+    ("resolved", 0.99, "cheers, is it done?", None),
+])
+def test_predict_intent_thresholds(monkeypatch, label, prob, text, expected):
+    monkeypatch.setattr(intent_model, "get_intent_model", lambda: _FixedModel(label, prob))
+    assert intent_model.predict_intent(text) == expected
+
+
+def test_train_and_predict_round_trip(tmp_path):
+    np = pytest.importorskip("numpy")
+    texts = ["hi", "hello", "hey there", "thanks a lot", "thank you", "escalate please", "talk to a human", "my bill is wrong"]
+    labels = ["greeting", "greeting", "greeting", "resolved", "resolved", "escalate", "escalate", "other"]
+    model = intent_model.IntentModel.train(texts, labels, epochs=300, seed=1)
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+    loaded = intent_model.IntentModel.load(str(path))
+    assert loaded.accuracy(texts, labels) == 1.0
+    assert np.allclose(loaded.predict_proba("hello"), model.predict_proba("hello"))
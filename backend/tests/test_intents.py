@@ -0,0 +1,28 @@
+import pytest
+
+from app.services.intents import classify_message, offers_solution
+from benchmarks.intents import ANSWER_CORPUS, MESSAGE_CORPUS, check_accuracy
+
+
+@pytest.mark.parametrize("text,expected", MESSAGE_CORPUS)
+def test_message_corpus(text, expected):
+    got = classify_message(text)
+    assert {name for name in ("escalate", "resolved", "problem", "negated") if getattr(got, name)} == expected
+
+
+@pytest.mark.parametrize("text,expected", ANSWER_CORPUS)
+def test_answer_corpus(text, expected):
+    assert offers_solution(text) == expected
+
+
+def test_check_accuracy_reports_no_failures():
+    assert check_accuracy() == 0
+
+
+@pytest.mark.parametrize("text", [
+    "is this a real person?",
+    "the live agent earlier said to reinstall",
+    "a human agent told me yesterday it was fixed",
+])
+def test_mentions_of_agents_do_not_escalate(text):
+    assert not classify_message(text).escalate
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services import jobs
+from app.services.jobs import JobRunner, job_handler
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    runner = JobRunner(poll_seconds=1, stale_seconds=300, max_attempts=3)
+    runner.claimed = []
+    runner.finished = []
+    monkeypatch.setattr(runner, "_claim", lambda: runner.claimed.pop(0) if runner.claimed else None)
+    monkeypatch.setattr(runner, "_finish", lambda *args: runner.finished.append(args[1:]))
+    monkeypatch.setattr(jobs, "_HANDLERS", {})
+    return runner
+
+
+def test_nothing_to_run(runner):
+    assert runner.run_next() is False
+
+
+def test_handler_resumes_from_its_checkpoint(runner):
+    seen = []
+
+    @job_handler("test")
+    def handler(ctx):
+        seen.append((ctx.params, ctx.checkpoint))
+        return {"done": True}
+
+    runner.claimed.append(("j1", "test", {"limit": 5}, {"after": 3}, 2))
+    assert runner.run_next() is True
+    assert seen == [({"limit": 5}, {"after": 3})]
+    assert runner.finished == [("succeeded", {"done": True}, None)]
+
+
+@pytest.mark.parametrize("attempts, status", [(1, "queued"), (3, "failed")])
+def test_failed_handler_is_requeued_until_out_of_attempts(runner, attempts, status):
+    @job_handler("test")
+    def handler(ctx):
+        raise RuntimeError("boom")
+
+    runner.claimed.append(("j1", "test", None, None, attempts))
+    runner.run_next()
+    assert runner.finished == [(status, None, "boom")]
+
+
+def test_job_reclaimed_too_often_is_given_up(runner):
+    @job_handler("test")
+    def handler(ctx):
+        raise AssertionError("must not run again")
+
+    runner.claimed.append(("j1", "test", None, {"after": 1}, 4))
+    runner.run_next()
+    assert runner.finished == [("failed", None, "gave up after repeated worker failures")]
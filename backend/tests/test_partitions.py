@@ -0,0 +1,55 @@
+from datetime import date
+
+from app.db.partitions import (
+    DEFAULT_PARTITION, add_months, ensure_ticket_partitions, month_start, partition_name, ticket_partitions,
+)
+
+
+class FakeCursor:
+    """Answers the pg_inherits lookup with ``partitions`` and records everything else."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.executed = []
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        if "pg_inherits" in sql:
+            self._rows = [(name,) for name in self.partitions]
+        else:
+            self.executed.append(sql)
+
+    def fetchall(self):
+        return self._rows
+
+
+def test_month_arithmetic_crosses_years():
+    assert month_start(date(2026, 2, 17)) == date(2026, 2, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 31), 1) == date(2026, 2, 1)
+
+
+def test_partition_name():
+    assert partition_name(date(2026, 3, 1)) == "tickets_p2026_03"
+
+
+def test_ticket_partitions_sorts_default_first_then_by_month():
+    cur = FakeCursor(["tickets_p2026_02", DEFAULT_PARTITION, "tickets_p2025_12"])
+    assert ticket_partitions(cur) == [
+        (DEFAULT_PARTITION, None),
+        ("tickets_p2025_12", date(2025, 12, 1)),
+        ("tickets_p2026_02", date(2026, 2, 1)),
+    ]
+
+
+def test_ensure_ticket_partitions_creates_only_missing_months():
+    cur = FakeCursor([DEFAULT_PARTITION, "tickets_p2026_01"])
+    created = ensure_ticket_partitions(cur, date(2025, 12, 15), date(2026, 2, 1))
+    assert created == ["tickets_p2025_12", "tickets_p2026_02"]
+    assert len(cur.executed) == 2
+    ddl = cur.executed[1]
+    assert "pg_advisory_xact_lock(hashtext('tickets_partitions'))" in ddl
+    # Rows already in the default partition move before the range is attached
+    assert ddl.index(f"DELETE FROM {DEFAULT_PARTITION}") < ddl.index("ATTACH PARTITION")
+    assert "FOR VALUES FROM ('2026-02-01') TO ('2026-03-01')" in ddl
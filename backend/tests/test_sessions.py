@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.sessions import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    doc = {"_id": "session-42", "last_at": datetime(2026, 3, 1, 12, 30, 5, 123000)}
+    cursor = encode_cursor(doc)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (doc["last_at"], "session-42")
+
+
+def test_cursor_of_a_session_without_timestamp():
+    assert decode_cursor(encode_cursor({"_id": "s1"})) == (None, "s1")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24", encode_cursor({"_id": "s1"})[:-3]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises((ValueError, TypeError)):
+        decode_cursor(cursor)
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.services import singleflight as singleflight_module
+from app.services.singleflight import SingleFlight
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(singleflight_module, "get_redis_client", lambda: fake)
+    return fake
+
+
+def _flight():
+    return SingleFlight(lock_ttl_seconds=30, wait_seconds=0.2, poll_interval=0.01)
+
+
+def test_concurrent_calls_in_a_worker_run_once(redis):
+    flight, calls = _flight(), []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("k", generate, lambda: None) for _ in range(5)])
+
+    assert asyncio.run(scenario()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert redis.data == {}  # the lock is released
+
+
+def test_waiters_do_not_inherit_the_leaders_error(redis):
+    flight = _flight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        return await asyncio.gather(flight.do("k", fail, lambda: None), flight.do("k", fail, lambda: None),
+                                    return_exceptions=True)
+
+    leader, waiter = asyncio.run(scenario())
+    assert isinstance(leader, RuntimeError)
+    assert waiter is None
+
+
+def test_follower_takes_the_result_another_worker_published(redis):
+    flight, published = _flight(), {}
+    redis.data["singleflight:k"] = "other-worker"
+
+    async def generate():
+        raise AssertionError("must not generate while another worker does")
+
+    async def scenario():
+        async def publish():
+            await asyncio.sleep(0.03)
+            published["k"] = "shared answer"
+        asyncio.get_running_loop().create_task(publish())
+        return await flight.do("k", generate, lambda: published.get("k"))
+
+    assert asyncio.run(scenario()) == "shared answer"
+
+
+def test_follower_generates_itself_after_waiting(redis):
+    flight = _flight()
+    redis.data["singleflight:k"] = "other-worker"
+
+    async def generate():
+        return "own answer"
+
+    assert asyncio.run(flight.do("k", generate, lambda: None)) == "own answer"
+    assert redis.data == {"singleflight:k": "other-worker"}  # not ours to release
+
+
+def test_leads_alone_when_redis_is_down(monkeypatch):
+    def unreachable():
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(singleflight_module, "get_redis_client", unreachable)
+
+    async def generate():
+        return "answer"
+
+    assert asyncio.run(_flight().do("k", generate, lambda: None)) == "answer"
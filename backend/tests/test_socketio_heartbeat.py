@@ -0,0 +1,43 @@
+"""python-socketio takes ping_interval/ping_timeout in seconds; millisecond values
+(the engine.io client convention) would keep dead peers around for hours."""
+import socketio
+
+from app import main
+from app.core.config import settings
+
+
+def _captured_server_kwargs(monkeypatch):
+    calls = []
+    real = socketio.AsyncServer
+
+    def capture(*args, **kwargs):
+        calls.append(kwargs)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(main.socketio, "AsyncServer", capture)
+    monkeypatch.setattr(main, "register_events", lambda app: None)
+    main.create_app()
+    return calls
+
+
+def test_default_heartbeat_matches_engineio_defaults_in_seconds():
+    assert settings.SOCKETIO_PING_INTERVAL_SECONDS == 25
+    assert settings.SOCKETIO_PING_TIMEOUT_SECONDS == 20
+
+
+def test_every_server_gets_the_heartbeat_in_seconds(monkeypatch):
+    calls = _captured_server_kwargs(monkeypatch)
+    assert calls
+    for kwargs in calls:
+        assert kwargs["ping_interval"] == 25
+        assert kwargs["ping_timeout"] == 20
+
+
+def test_engineio_uses_the_configured_values(monkeypatch):
+    monkeypatch.setattr(settings, "SOCKETIO_PING_INTERVAL_SECONDS", 7)
+    monkeypatch.setattr(settings, "SOCKETIO_PING_TIMEOUT_SECONDS", 3)
+    monkeypatch.setattr(main, "register_events", lambda app: None)
+    app = main.create_app()
+    for sio in (app.state.sio, app.state.sio_msgpack):
+        if sio is not None:
+            assert (sio.eio.ping_interval, sio.eio.ping_timeout) == (7, 3)
@@ -0,0 +1,53 @@
+from app.services.ticket_events import (
+    INSERT_TICKET_UNLESS_LIVE, LEGACY_SUMMARY_MARKER, LIVE_CONFLICT, event_payload, format_resolution_summary,
+    legacy_resolution_summary, transition_sql,
+)
+
+
+def test_insert_takes_the_session_lock_before_checking_for_a_live_ticket():
+    sql = INSERT_TICKET_UNLESS_LIVE
+    assert sql.index("pg_advisory_xact_lock(hashtext(%(session_id)s))") < sql.index("INSERT INTO tickets")
+    assert "WHERE NOT EXISTS" in sql and "status IN ('open','in_progress','escalated')" in sql
+    # The RETURNING of the last statement is what fetchone sees
+    assert sql.rstrip().endswith("RETURNING id")
+
+
+def test_live_conflict_excludes_the_ticket_itself():
+    assert "other.id <> tickets.id" in LIVE_CONFLICT
+
+
+def test_transition_sql_logs_one_event_per_updated_ticket():
+    sql = transition_sql("status = %s", "id = %s")
+    assert "UPDATE tickets SET status = %s" in sql and "WHERE id = %s" in sql
+    assert "INSERT INTO ticket_events (ticket_id, type, payload)" in sql
+    assert "SELECT id, %s, %s FROM updated" in sql
+    # Placeholders in parameter order: set, where, event type, payload
+    assert sql.count("%s") == 4
+
+
+def test_event_payload_defaults_to_an_empty_object():
+    assert event_payload(None).adapted == {}
+    assert event_payload({"reason": "asked"}).adapted == {"reason": "asked"}
+
+
+def test_format_resolution_summary():
+    assert format_resolution_summary(None) is None
+    assert format_resolution_summary({"note": "too short to summarize"}) == "Issue resolved - too short to summarize."
+    text = format_resolution_summary({
+        "initial_issue": "cannot log in", "method": "FAQ-based solution", "message_count": 4,
+        "resolved_at": "2026-01-01T00:00:00", "customer_confirmed": True,
+    })
+    assert text.splitlines() == [
+        "RESOLUTION SUMMARY:",
+        "- Initial Issue: cannot log in",
+        "- Resolution Method: FAQ-based solution",
+        "- Conversation Length: 4 messages",
+        "- Resolution Time: 2026-01-01T00:00:00",
+        "- Customer Confirmed: Yes",
+    ]
+
+
+def test_legacy_resolution_summary():
+    assert legacy_resolution_summary(None) is None
+    assert legacy_resolution_summary("no summary here") is None
+    assert legacy_resolution_summary(f"issue\n[Escalated] x\n{LEGACY_SUMMARY_MARKER}\n  text \n") == "text"
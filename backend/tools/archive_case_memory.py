@@ -0,0 +1,54 @@
+"""Move cold chat sessions out of the hot case_memory collection.
+
+Sessions with no message for --hot-days are compacted into one
+case_memory_archive document each and deleted from case_memory. With --dir
+(default CASE_ARCHIVE_DIR), archived sessions idle for --export-days are then
+written to gzip JSONL segments there and their messages dropped from Mongo.
+Admin history and the chat pipeline read all tiers through
+services/case_archive.session_messages. Safe to re-run; meant for cron.
+
+Run from backend/:
+    python -m tools.archive_case_memory
+    python -m tools.archive_case_memory --hot-days 7 --export-days 90 --dir /var/lib/csupport/archive
+"""
+from typing import List
+from datetime import datetime, timedelta
+import argparse
+import sys
+import time
+
+from app.core.config import settings
+from app.db.mongo import get_case_memory_collection, get_case_archive_collection
+from app.services.case_archive import ensure_indexes, archive_cold_sessions, export_archived_sessions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hot-days", type=int, default=settings.CASE_MEMORY_HOT_DAYS)
+    parser.add_argument("--export-days", type=int, default=settings.CASE_ARCHIVE_EXPORT_DAYS)
+    parser.add_argument("--dir", default=settings.CASE_ARCHIVE_DIR, help="segment directory, as the app's CASE_ARCHIVE_DIR sees it; empty skips the export")
+    parser.add_argument("--max-sessions", type=int, default=0, help="cap per run (0: all cold sessions)")
+    parser.add_argument("--now", help="reference time, ISO format (default: now, UTC)")
+    args = parser.parse_args(argv)
+
+    now = datetime.fromisoformat(args.now) if args.now else datetime.utcnow()
+    ensure_indexes()
+    hot, archive = get_case_memory_collection(), get_case_archive_collection()
+    before = hot.estimated_document_count()
+
+    started = time.perf_counter()
+    stats = archive_cold_sessions(now - timedelta(days=args.hot_days), args.max_sessions or None)
+    print(f"archived {stats['sessions']} sessions / {stats['messages']} messages "
+          f"in {time.perf_counter() - started:.1f}s; case_memory {before} -> {hot.estimated_document_count()} documents")
+
+    if args.dir:
+        started = time.perf_counter()
+        stats = export_archived_sessions(now - timedelta(days=args.export_days), args.dir)
+        print(f"exported {stats['sessions']} sessions / {stats['messages']} messages to {stats['files']} segment(s), "
+              f"{stats['bytes'] / 1e6:.1f} MB, in {time.perf_counter() - started:.1f}s")
+    print(f"case_memory_archive: {archive.estimated_document_count()} sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
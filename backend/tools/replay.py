@@ -0,0 +1,160 @@
+"""Replay recorded conversations through the chat pipeline.
+
+User messages from case_memory (or a JSONL export of it) are fed to
+``handle_incoming_message`` in-process, keeping each session's order and the
+original gaps between messages divided by --speedup (0 replays as fast as
+possible). Sessions overlap as they did in production; --concurrency caps
+messages in flight. Gemini is replaced by the sleeping fakes from
+benchmarks/chat_load.py, so only our own code and stores are measured.
+
+Replayed sessions get a "replay-<run>-" prefix so they never touch the
+original tickets, but they are written to the configured databases: point
+POSTGRES_*/MONGO_*/REDIS_* at a staging copy.
+
+Reports latency percentiles per answer source (cache, faq, llm, escalation,
+resolution, greeting, fallback), per pipeline stage, and how far the replay
+fell behind its schedule. --json/--baseline work as in the load test.
+
+Run from backend/:
+    python -m tools.replay --sessions 2000 --speedup 20 --concurrency 64 --json replay.json
+    python -m tools.replay --jsonl export.jsonl --speedup 0 --baseline replay.json
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.chat_load import Sample, compare, install_fake_llms, percentile, print_report, summarize
+from tools.train_intent_model import ESCALATION_REPLY, RESOLUTION_REPLY, iter_conversations_jsonl, iter_conversations_mongo
+
+
+def _ts(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def load_sessions(conversations: Iterable[List[Dict]], limit: int) -> List[List[Tuple[float, Dict[str, Any], str]]]:
+    """Per session: (original ts, chat_message payload, source the original reply implies)."""
+    sessions = []
+    for messages in conversations:
+        replay = []
+        for msg, reply in zip(messages, messages[1:] + [None]):
+            if msg.get("role") != "user" or not (msg.get("content") or "").strip():
+                continue
+            reply_text = (reply or {}).get("content", "") if (reply or {}).get("role") == "assistant" else ""
+            expected = "escalation" if ESCALATION_REPLY in reply_text else "resolution" if RESOLUTION_REPLY in reply_text else ""
+            payload = {k: msg.get(k) for k in ("session_id", "content", "user_email", "customer_name", "subject", "category") if msg.get(k)}
+            replay.append((_ts(msg.get("ts")), payload, expected))
+        if replay:
+            sessions.append(replay)
+            if limit and len(sessions) >= limit:
+                break
+    return sessions
+
+
+async def replay(sessions, speedup: float, concurrency: int, run_id: str) -> Tuple[List[Sample], List[str], List[float], float]:
+    from app.services.chat import handle_incoming_message
+
+    samples: List[Sample] = []
+    errors: List[str] = []
+    lag: List[float] = []
+    origin = min(s[0][0] for s in sessions)
+    gate = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def run_session(idx: int, messages) -> None:
+        for ts, payload, expected in messages:
+            if speedup:
+                due = started + (ts - origin) / speedup
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lag.append(max(0.0, -delay))
+            data = dict(payload, session_id=f"replay-{run_id}-{payload.get('session_id', idx)}")
+            async with gate:
+                t0 = time.perf_counter()
+                try:
+                    response = await handle_incoming_message(data)
+                except Exception as exc:
+                    errors.append(f"session {payload.get('session_id')}: {exc!r}")
+                    continue
+                elapsed = time.perf_counter() - t0
+            source = response.get("source") or "unknown"
+            samples.append(Sample(idx, expected or source, source, elapsed, response.get("timings")))
+
+    await asyncio.gather(*(run_session(i, s) for i, s in enumerate(sessions)))
+    return samples, errors, lag, time.perf_counter() - started
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jsonl", help="read case_memory documents from this export instead of MongoDB")
+    parser.add_argument("--sessions", type=int, default=1000, help="replay at most this many sessions (0 = all)")
+    parser.add_argument("--speedup", type=float, default=10.0, help="compress original timing by this factor; 0 = no waiting")
+    parser.add_argument("--concurrency", type=int, default=32, help="messages in flight at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=250.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--related-latency-ms", type=float, default=250.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_out", help="write the report here")
+    parser.add_argument("--baseline", help="report JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    from app.core.config import settings
+    from app.services.chat_writer import chat_writer
+    from app.services.faq_writer import faq_writer
+
+    # Sources and stage timings ride on the response; no real LLM may be called
+    settings.DEBUG_TIMINGS = True
+    settings.OPENAI_API_KEY = None
+    install_fake_llms(args.llm_latency_ms / 1000.0, args.llm_jitter, args.related_latency_ms / 1000.0,
+                      args.llm_error_rate, args.seed)
+
+    conversations = iter_conversations_jsonl(args.jsonl) if args.jsonl else iter_conversations_mongo()
+    sessions = load_sessions(conversations, args.sessions)
+    if not sessions:
+        print("no conversations to replay", file=sys.stderr)
+        return 1
+    print(f"replaying {sum(len(s) for s in sessions)} user messages from {len(sessions)} sessions", flush=True)
+
+    try:
+        samples, errors, lag, wall = asyncio.run(replay(sessions, args.speedup, args.concurrency, os.urandom(4).hex()))
+    finally:
+        chat_writer.stop()
+        faq_writer.stop()
+
+    report = summarize(samples, errors, wall)
+    lag.sort()
+    report["schedule_lag_ms"] = {"p50": round(percentile(lag, 50) * 1000, 2), "p95": round(percentile(lag, 95) * 1000, 2),
+                                 "max": round(lag[-1] * 1000, 2) if lag else 0.0}
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("json_out", "baseline")}
+    print_report(report)
+    print(f"\nschedule lag ms: {report['schedule_lag_ms']}")
+    for err in errors[:10]:
+        print(f"error: {err}", file=sys.stderr)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
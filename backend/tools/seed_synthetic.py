@@ -0,0 +1,329 @@
+"""Generate a large synthetic dataset for scaling tests.
+
+Chat sessions are spread evenly over --days ending at --end. Each session gets
+a customer (Zipf-like: a few customers open many sessions), a category, a
+length (geometric, about --avg-turns user/assistant exchanges) and an outcome
+(resolved, escalated or still open), and its case_memory messages follow that
+outcome: resolved sessions end with a thank-you and the bot's resolution reply,
+escalated ones with an escalation request. --tickets of the sessions, spread
+evenly through time, have a ticket carrying the session's status and opening
+message, so tickets and messages line up the way production data does.
+
+Rows are streamed: Postgres tables through COPY from a generator-backed file
+object, case_memory through insert_many chunks. Memory stays flat regardless
+of volume and the same --seed always produces the same data.
+
+Run from backend/ (defaults are the target sizes; scale down for a laptop):
+    python -m tools.seed_synthetic --tickets 2000000 --faqs 200000 --messages 20000000
+    python -m tools.seed_synthetic --tickets 10000 --faqs 1000 --messages 100000 --truncate
+"""
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple
+from datetime import datetime, timedelta
+import argparse
+import itertools
+import math
+import random
+import sys
+import time
+
+from app.services.answer_cache import normalize_query
+
+
+ESCALATION_REPLY = "I've escalated this case to a human agent. You'll be contacted shortly."
+RESOLUTION_REPLY = "Great! I've marked your case as resolved. Thank you for confirming!"
+
+CATEGORIES = ["Technical Support", "Billing Question", "Account Help", "General Question"]
+CATEGORY_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+OUTCOMES = ["resolved", "escalated", "open", "in_progress"]
+OUTCOME_WEIGHTS = [0.72, 0.12, 0.11, 0.05]
+PRIORITIES = ["low", "medium", "high", "urgent"]
+PRIORITY_WEIGHTS = [0.25, 0.5, 0.2, 0.05]
+# Share of sessions starting in each hour of the day (UTC), business-hours heavy
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 3, 5, 8, 10, 10, 9, 8, 9, 10, 10, 9, 7, 5, 4, 3, 2, 2, 1]
+
+FIRST_NAMES = ["Ava", "Noah", "Mia", "Liam", "Zara", "Omar", "Priya", "Kenji", "Lucia", "Tomas",
+               "Amara", "Ivan", "Chloe", "Mateo", "Aisha", "Felix", "Sana", "Jonas", "Elena", "Ravi"]
+LAST_NAMES = ["Smith", "Khan", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kowalski", "Haddad", "Tanaka",
+              "Murphy", "Rossi", "Patel", "Nguyen", "Larsen", "Costa", "Meyer", "Ali", "Dubois", "Moreau"]
+
+TOPICS: Dict[str, List[str]] = {
+    "Technical Support": ["the app crashing on startup", "an error when uploading files", "the dashboard loading slowly",
+                          "a bug in the export feature", "sync issues between devices", "notifications not arriving",
+                          "a problem with the mobile login", "the search returning no results"],
+    "Billing Question": ["a double charge on my card", "a refund for last month", "updating my payment method",
+                         "an invoice with the wrong address", "the price of the annual plan", "cancelling my subscription",
+                         "a failed payment", "switching to monthly billing"],
+    "Account Help": ["changing my username", "exporting my account data", "deleting my profile",
+                     "updating my privacy settings", "adding a team member", "two-factor authentication",
+                     "merging two accounts", "recovering a locked account"],
+    "General Question": ["your business hours", "how to contact support", "where to find the user guide",
+                         "what is included in the free plan", "data retention", "the status page",
+                         "partner discounts", "the product roadmap"],
+}
+QUESTION_TEMPLATES = ["How do I fix {t}?", "I need help with {t}", "Can you help me with {t}?",
+                      "What should I do about {t}?", "Is there a way to sort out {t}?", "Question about {t}"]
+FOLLOW_UPS = ["I tried that but nothing changed", "Where exactly is that setting?", "Does this apply to the mobile app too?",
+              "It still shows the same error", "Can you explain the second step?", "How long does that usually take?",
+              "Is there a way to do this in bulk?", "OK, and what about my other account?"]
+ANSWER_TEMPLATES = ["Here's how to handle {t}: open Settings, choose the relevant section and follow the prompts.",
+                    "To fix this, please sign out, clear the app cache and sign in again. That resolves {t} in most cases.",
+                    "You need to go to Account Settings > Billing. From there you can manage {t}.",
+                    "Follow these steps: 1) open the menu, 2) select Help, 3) choose {t} and confirm.",
+                    "Thanks for the details. The issue is usually caused by an outdated app version; updating should sort out {t}."]
+THANKS = ["thanks, that fixed it", "yes, resolved", "that helps, thanks", "perfect, it works now", "all set, thank you"]
+ESCALATIONS = ["please escalate", "I want to talk to a human", "can I speak to a real person", "escalate this ticket"]
+FAQ_VERBS = ["reset", "change", "update", "export", "cancel", "download", "verify", "restore", "delete", "transfer",
+             "enable", "disable", "find", "share", "rename", "merge", "upgrade", "downgrade", "recover", "sync"]
+FAQ_OBJECTS = ["password", "profile", "invoice", "subscription", "payment method", "billing address", "username",
+               "account data", "privacy settings", "notification settings", "team workspace", "API key", "error log",
+               "refund request", "mobile app login", "two-factor settings", "support ticket", "email address",
+               "usage report", "integration"]
+FAQ_CONTEXTS = ["", " on mobile", " on the web app", " for my team", " after a failed payment", " without losing data",
+                " on a shared account", " from the admin console", " after the latest update", " for a closed account"]
+
+
+class Session(NamedTuple):
+    session_id: str
+    email: str
+    customer_name: str
+    category: str
+    topic: str
+    opener: str
+    outcome: str
+    priority: str
+    started_at: datetime
+    turns: int
+
+
+def session_profile(seed: int, index: int, start: datetime, spacing: float, avg_turns: float, users: int) -> Session:
+    """Everything about session ``index`` comes from its own RNG, so the ticket and
+    message streams agree without sharing state."""
+    rng = random.Random(f"{seed}:session:{index}")
+    user = int(users * rng.random() ** 3)  # heavy head: low ids are frequent customers
+    category = rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+    topic = rng.choice(TOPICS[category])
+    day = start + timedelta(seconds=index * spacing)
+    started_at = day.replace(hour=rng.choices(range(24), HOUR_WEIGHTS)[0], minute=rng.randrange(60), second=rng.randrange(60))
+    # floor(Exp(rate)) is geometric with mean 1/(e^rate - 1); pick rate so the mean is avg_turns
+    turns = 1 + int(rng.expovariate(math.log1p(1.0 / max(avg_turns - 1, 0.01))))
+    return Session(
+        session_id=f"syn{seed}-{index:010d}",
+        email=f"user{user}@example.com",
+        customer_name=f"{FIRST_NAMES[user % len(FIRST_NAMES)]} {LAST_NAMES[(user // len(FIRST_NAMES)) % len(LAST_NAMES)]}",
+        category=category,
+        topic=topic,
+        opener=rng.choice(QUESTION_TEMPLATES).format(t=topic),
+        outcome=rng.choices(OUTCOMES, OUTCOME_WEIGHTS)[0],
+        priority=rng.choices(PRIORITIES, PRIORITY_WEIGHTS)[0],
+        started_at=started_at,
+        turns=turns,
+    )
+
+
+def session_messages(seed: int, session: Session) -> Iterator[Dict[str, Any]]:
+    """case_memory documents for one session, shaped like services/chat.py writes them."""
+    rng = random.Random(f"{seed}:messages:{session.session_id}")
+    ts = session.started_at
+    meta = {"user_email": session.email, "customer_name": session.customer_name,
+            "subject": session.topic.capitalize(), "category": session.category}
+    for turn in range(session.turns):
+        last = turn == session.turns - 1
+        if turn == 0:
+            user, bot = session.opener, rng.choice(ANSWER_TEMPLATES).format(t=session.topic)
+        elif last and session.outcome == "resolved":
+            user, bot = rng.choice(THANKS), RESOLUTION_REPLY
+        elif last and session.outcome == "escalated":
+            user, bot = rng.choice(ESCALATIONS), ESCALATION_REPLY
+        else:
+            user, bot = rng.choice(FOLLOW_UPS), rng.choice(ANSWER_TEMPLATES).format(t=session.topic)
+        yield {"session_id": session.session_id, "role": "user", "content": user, "ts": ts, **meta}
+        ts += timedelta(seconds=rng.uniform(0.5, 6.0))
+        yield {"session_id": session.session_id, "role": "assistant", "content": bot, "ts": ts}
+        ts += timedelta(seconds=rng.expovariate(1 / 45.0))
+
+
+class CopyStream:
+    """Read-only file object over an iterator of COPY text lines, for ``copy_expert``."""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._pending = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        chunks, length = [self._pending], len(self._pending)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+            self.rows += 1
+        data = "".join(chunks)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_line(values: Iterable[Any]) -> str:
+    """One row in COPY text format; None becomes NULL."""
+    out = []
+    for v in values:
+        if v is None:
+            out.append("\\N")
+        elif isinstance(v, datetime):
+            out.append(v.isoformat(sep=" "))
+        else:
+            out.append(str(v).translate(_COPY_ESCAPES))
+    return "\t".join(out) + "\n"
+
+
+def _has_ticket(index: int, sessions: int, tickets: int) -> bool:
+    # Exactly `tickets` sessions, spread evenly through time
+    return (index + 1) * tickets // sessions > index * tickets // sessions
+
+
+def ticket_rows(args: argparse.Namespace, sessions: int, start: datetime, spacing: float) -> Iterator[str]:
+    for i in range(sessions):
+        if not _has_ticket(i, sessions, args.tickets):
+            continue
+        s = session_profile(args.seed, i, start, spacing, args.avg_turns, args.users)
+        duration = timedelta(minutes=2 * s.turns + (i % 7) * 11)
+        yield copy_line((
+            s.email, s.customer_name, s.topic.capitalize(), s.category, s.opener,
+            s.outcome, s.priority, s.session_id, s.started_at, s.started_at + duration,
+        ))
+
+
+def faq_rows(args: argparse.Namespace, start: datetime) -> Iterator[str]:
+    rng = random.Random(f"{args.seed}:faqs")
+    span = args.days * 86400
+    combos = list(itertools.product(FAQ_VERBS, FAQ_OBJECTS, FAQ_CONTEXTS))
+    rng.shuffle(combos)
+    for i in range(args.faqs):
+        verb, obj, ctx = combos[i % len(combos)]
+        # Past the natural combinations, number the variants so questions stay distinct
+        variant = f" (variant {i // len(combos)})" if i >= len(combos) else ""
+        question = f"How do I {verb} my {obj}{ctx}{variant}?"
+        answer = rng.choice(ANSWER_TEMPLATES).format(t=f"how to {verb} your {obj}")
+        created = start + timedelta(seconds=rng.uniform(0, span))
+        yield copy_line((question, answer, normalize_query(question), created, created))
+
+
+def copy_into(cur, table: str, columns: List[str], lines: Iterable[str]) -> int:
+    stream = CopyStream(lines)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 20)
+    return stream.rows
+
+
+def seed_postgres(args: argparse.Namespace, sessions: int, start: datetime, spacing: float) -> None:
+    from app.db.postgres import get_postgres_connection, init_schema
+    from app.db.partitions import tickets_partitioned, ensure_ticket_partitions
+    from app.services.faq_catalog import backfill_faq_tags
+
+    init_schema()
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        if args.truncate:
+            cur.execute("TRUNCATE tickets, faqs, faq_tags RESTART IDENTITY")
+        if tickets_partitioned(cur):
+            # Monthly partitions for the whole history, so nothing lands in tickets_default
+            ensure_ticket_partitions(cur, start.date(), datetime.fromisoformat(args.end).date())
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM faqs")
+        last_faq_id = cur.fetchone()[0]
+
+        started = time.perf_counter()
+        n = copy_into(cur, "tickets", ["user_email", "customer_name", "subject", "category", "description",
+                                       "status", "priority", "session_id", "created_at", "updated_at"],
+                      ticket_rows(args, sessions, start, spacing))
+        print(f"tickets: {n} rows in {time.perf_counter() - started:.1f}s", flush=True)
+
+        started = time.perf_counter()
+        n = copy_into(cur, "faqs", ["question", "answer", "question_norm", "created_at", "updated_at"],
+                      faq_rows(args, start))
+        conn.commit()
+        print(f"faqs: {n} rows in {time.perf_counter() - started:.1f}s", flush=True)
+    finally:
+        cur.close(); conn.close()
+
+    backfill_faq_tags(after_id=last_faq_id)
+    conn = get_postgres_connection(); conn.autocommit = True; cur = conn.cursor()
+    try:
+        cur.execute("ANALYZE tickets; ANALYZE faqs; ANALYZE faq_tags")
+    finally:
+        cur.close(); conn.close()
+
+
+def iter_messages(args: argparse.Namespace, sessions: int, start: datetime, spacing: float) -> Iterator[Dict[str, Any]]:
+    produced = 0
+    for i in range(sessions):
+        for doc in session_messages(args.seed, session_profile(args.seed, i, start, spacing, args.avg_turns, args.users)):
+            if produced >= args.messages:
+                return
+            produced += 1
+            yield doc
+
+
+def seed_mongo(args: argparse.Namespace, sessions: int, start: datetime, spacing: float) -> None:
+    from app.db.mongo import get_case_memory_collection, get_case_archive_collection, get_sessions_collection
+    from app.services.sessions import record_messages, ensure_session_indexes
+
+    col = get_case_memory_collection()
+    if args.truncate:
+        col.delete_many({})
+        get_case_archive_collection().delete_many({})
+        get_sessions_collection().delete_many({})
+    started, total = time.perf_counter(), 0
+    docs = iter_messages(args, sessions, start, spacing)
+    while True:
+        chunk = list(itertools.islice(docs, args.batch_size))
+        if not chunk:
+            break
+        col.insert_many(chunk, ordered=False)
+        # Summaries as chat_writer keeps them; a session split across chunks still adds up
+        record_messages(chunk)
+        total += len(chunk)
+        if total % (args.batch_size * 100) < args.batch_size:
+            print(f"case_memory: {total} documents ({total / (time.perf_counter() - started):.0f}/s)", flush=True)
+    col.create_index([("session_id", 1), ("ts", 1)])
+    ensure_session_indexes()
+    print(f"case_memory: {total} documents in {time.perf_counter() - started:.1f}s", flush=True)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=2_000_000)
+    parser.add_argument("--faqs", type=int, default=200_000)
+    parser.add_argument("--messages", type=int, default=20_000_000, help="case_memory documents")
+    parser.add_argument("--users", type=int, default=250_000, help="distinct customers")
+    parser.add_argument("--avg-turns", type=float, default=4.0, help="mean user/assistant exchanges per session")
+    parser.add_argument("--days", type=int, default=730, help="history length")
+    parser.add_argument("--end", default="2025-01-01", help="end of the generated history (fixed so runs are reproducible)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000, help="documents per insert_many")
+    parser.add_argument("--skip-postgres", action="store_true")
+    parser.add_argument("--skip-mongo", action="store_true")
+    parser.add_argument("--truncate", action="store_true",
+                        help="empty tickets, faqs, faq_tags, case_memory (with its archive) and sessions first")
+    args = parser.parse_args(argv)
+
+    # Enough sessions to carry the requested messages (2 per turn), and at least one per ticket
+    sessions = max(args.tickets, math.ceil(args.messages / (2 * args.avg_turns)), 1)
+    start = datetime.fromisoformat(args.end) - timedelta(days=args.days)
+    spacing = args.days * 86400 / sessions
+    print(f"{sessions} sessions over {args.days} days ending {args.end}, seed {args.seed}", flush=True)
+
+    if not args.skip_postgres:
+        seed_postgres(args, sessions, start, spacing)
+    if not args.skip_mongo:
+        seed_mongo(args, sessions, start, spacing)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Maintain the monthly partitions of ``tickets`` (see app/db/partitions.py).
+
+    status    list partitions with their row counts
+    migrate   convert an unpartitioned tickets table in place (takes an
+              exclusive lock and copies every row: run in a maintenance window)
+    maintain  create partitions TICKETS_PARTITION_MONTHS_AHEAD months ahead and
+              detach months older than TICKETS_RETENTION_MONTHS into
+              TICKETS_ARCHIVE_SCHEMA (or drop them with --drop); meant for cron
+
+Run from backend/:
+    python -m tools.ticket_partitions status
+    python -m tools.ticket_partitions migrate
+    python -m tools.ticket_partitions maintain --retention-months 24
+"""
+from typing import List
+from datetime import date
+import argparse
+import sys
+import time
+
+from app.core.config import settings
+from app.db.postgres import get_postgres_connection
+from app.db.partitions import (
+    tickets_partitioned, create_partitioned_tickets, ensure_ticket_partitions,
+    detach_ticket_partitions, ticket_partitions, month_start, add_months,
+)
+
+
+def status(cur) -> int:
+    if not tickets_partitioned(cur):
+        print("tickets is not partitioned; run `migrate`")
+        return 1
+    for name, month in ticket_partitions(cur):
+        cur.execute(f"SELECT COUNT(*) FROM {name}")
+        print(f"{name:<20}{month.isoformat() if month else 'default':>12}{cur.fetchone()[0]:>12}")
+    return 0
+
+
+def migrate(cur, keep_old: bool) -> int:
+    if tickets_partitioned(cur) is not False:
+        print("tickets is already partitioned (or missing); nothing to do")
+        return 0
+    started = time.perf_counter()
+    cur.execute("LOCK TABLE tickets IN ACCESS EXCLUSIVE MODE")
+    cur.execute("ALTER TABLE tickets RENAME TO tickets_unpartitioned")
+    # Free the index names (tickets_pkey, tickets_session_id_idx, ...) for the new table
+    cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'tickets_unpartitioned'")
+    for (index,) in cur.fetchall():
+        cur.execute(f"ALTER INDEX {index} RENAME TO {index.replace('tickets', 'tickets_unpartitioned', 1)}")
+    cur.execute("ALTER SEQUENCE IF EXISTS tickets_id_seq RENAME TO tickets_unpartitioned_id_seq")
+    create_partitioned_tickets(cur)
+
+    cur.execute("SELECT MIN(COALESCE(created_at, updated_at)), MAX(COALESCE(created_at, updated_at)) FROM tickets_unpartitioned")
+    first, last = cur.fetchone()
+    today = date.today()
+    ensure_ticket_partitions(cur, min(first.date(), today) if first else today,
+                             add_months(month_start(max(last.date(), today) if last else today),
+                                        settings.TICKETS_PARTITION_MONTHS_AHEAD))
+
+    cur.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'tickets' AND column_name IN (
+            SELECT column_name FROM information_schema.columns WHERE table_name = 'tickets_unpartitioned'
+        )
+        """
+    )
+    columns = [c for (c,) in cur.fetchall()]
+    select = ", ".join("COALESCE(created_at, updated_at, NOW())" if c == "created_at" else c for c in columns)
+    cur.execute(f"INSERT INTO tickets ({', '.join(columns)}) SELECT {select} FROM tickets_unpartitioned")
+    copied = cur.rowcount
+    cur.execute("SELECT setval(pg_get_serial_sequence('tickets', 'id'), COALESCE((SELECT MAX(id) FROM tickets), 0) + 1, false)")
+    if not keep_old:
+        cur.execute("DROP TABLE tickets_unpartitioned")
+    print(f"copied {copied} tickets into {len(ticket_partitions(cur))} partitions in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def maintain(cur, retention_months: int, archive_schema: str | None) -> int:
+    if not tickets_partitioned(cur):
+        print("tickets is not partitioned; run `migrate`")
+        return 1
+    this_month = month_start(date.today())
+    created = ensure_ticket_partitions(cur, this_month, add_months(this_month, settings.TICKETS_PARTITION_MONTHS_AHEAD))
+    detached: List[str] = []
+    if retention_months:
+        detached = detach_ticket_partitions(cur, add_months(this_month, -retention_months), archive_schema)
+    print(f"created: {', '.join(created) or '-'}")
+    print(f"detached: {', '.join(detached) or '-'}" + (f" (moved to schema {archive_schema})" if detached and archive_schema else ""))
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("status", "migrate", "maintain"))
+    parser.add_argument("--keep-old", action="store_true", help="migrate: keep the old table as tickets_unpartitioned")
+    parser.add_argument("--retention-months", type=int, default=settings.TICKETS_RETENTION_MONTHS,
+                        help="maintain: detach months older than this (0 keeps everything)")
+    parser.add_argument("--drop", action="store_true", help="maintain: drop detached partitions instead of archiving")
+    args = parser.parse_args(argv)
+
+    conn = get_postgres_connection(); cur = conn.cursor()
+    try:
+        if args.command == "status":
+            return status(cur)
+        if args.command == "migrate":
+            code = migrate(cur, args.keep_old)
+        else:
+            code = maintain(cur, args.retention_months, None if args.drop else (settings.TICKETS_ARCHIVE_SCHEMA or None))
+        conn.commit()
+    finally:
+        cur.close(); conn.close()
+    if args.command == "migrate":
+        conn = get_postgres_connection(); conn.autocommit = True; cur = conn.cursor()
+        try:
+            cur.execute("ANALYZE tickets")
+        finally:
+            cur.close(); conn.close()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Train the local intent classifier from stored conversations.
+
+Labels are derived from what the bot did next: a user message answered with
+the manual-escalation reply is an escalation request, one answered with the
+resolution confirmation is a resolution/thanks, and short openers are
+greetings. Everything else the bot answered normally is "other". Older
+replies came from substring keyword checks, so those labels are re-checked
+with intents.classify_message: a negated message is "other", and a
+resolution the rule matcher does not confirm is left out. A small seed set
+keeps every label represented on a fresh database.
+
+Run from backend/:
+    python -m tools.train_intent_model --out intent_model.npz
+    python -m tools.train_intent_model --jsonl export.jsonl --out intent_model.npz
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.services.intent_model import IntentModel, LABELS
+from app.services.intents import classify_message
+
+
+ESCALATION_REPLY = "I've escalated this case to a human agent"
+RESOLUTION_REPLY = "I've marked your case as resolved"
+_GREETING_RE = re.compile(
+    r"^(?:hi|hii+|hello|hey|hey there|hiya|yo|greetings|good (?:morning|afternoon|evening))(?: there| team| all)?[!.,\s]*$"
+)
+
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("hi", "greeting"), ("hello", "greeting"), ("hey there", "greeting"), ("good morning", "greeting"),
+    ("hello!", "greeting"), ("hi team", "greeting"), ("good evening", "greeting"), ("hey", "greeting"),
+    ("thanks", "resolved"), ("thank you so much", "resolved"), ("yes, resolved", "resolved"),
+    ("that helps, thanks", "resolved"), ("perfect, that worked", "resolved"), ("all set now", "resolved"),
+    ("problem solved, thanks", "resolved"), ("great, it works now", "resolved"), ("awesome thanks", "resolved"),
+    ("please escalate", "escalate"), ("I want to talk to a human", "escalate"), ("get me a real person", "escalate"),
+    ("connect me to an agent", "escalate"), ("escalate this ticket", "escalate"), ("let me speak to a representative", "escalate"),
+    ("can a human look at this", "escalate"), ("transfer me to support staff", "escalate"),
+    ("how do I reset my password?", "other"), ("my payment failed", "other"), ("the app keeps crashing", "other"),
+    ("no thanks, it still doesn't work", "other"), ("why was I charged twice?", "other"), ("hello, my login is broken", "other"),
+    ("thanks but I still get an error", "other"), ("how do I cancel my subscription", "other"), ("where is my invoice", "other"),
+    ("hi, how do I change my email?", "other"), ("it's not fixed", "other"), ("what are your business hours", "other"),
+]
+
+
+def iter_conversations_mongo() -> Iterator[List[Dict]]:
+    from app.db.mongo import get_case_memory_collection
+    col = get_case_memory_collection()
+    session_id, messages = None, []
+    cursor = col.find({}, {"_id": 0, "session_id": 1, "role": 1, "content": 1, "ts": 1}).sort([("session_id", 1), ("ts", 1)])
+    for doc in cursor:
+        if doc.get("session_id") != session_id:
+            if messages:
+                yield messages
+            session_id, messages = doc.get("session_id"), []
+        messages.append(doc)
+    if messages:
+        yield messages
+
+
+def iter_conversations_jsonl(path: str) -> Iterator[List[Dict]]:
+    """One case_memory document per line, grouped by session_id."""
+    sessions: Dict[str, List[Dict]] = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                doc = json.loads(line)
+                sessions.setdefault(doc.get("session_id"), []).append(doc)
+    for messages in sessions.values():
+        yield sorted(messages, key=lambda d: str(d.get("ts", "")))
+
+
+def relabel(text: str, label: str) -> str | None:
+    """Check a reply-derived escalate/resolved label against the rule matcher; None drops the example."""
+    intents = classify_message(text)
+    if intents.negated:
+        return "other"
+    if label == "resolved" and not intents.resolved:
+        return None
+    return label
+
+
+def label_conversations(conversations: Iterable[List[Dict]]) -> List[Tuple[str, str]]:
+    examples: List[Tuple[str, str]] = []
+    for messages in conversations:
+        for msg, reply in zip(messages, messages[1:] + [None]):
+            if msg.get("role") != "user" or not msg.get("content"):
+                continue
+            text = msg["content"].strip()
+            reply_text = (reply or {}).get("content", "") if (reply or {}).get("role") == "assistant" else ""
+            if ESCALATION_REPLY in reply_text or RESOLUTION_REPLY in reply_text:
+                label = relabel(text, "escalate" if ESCALATION_REPLY in reply_text else "resolved")
+                if label:
+                    examples.append((text, label))
+            elif _GREETING_RE.match(text.lower()):
+                examples.append((text, "greeting"))
+            elif reply_text:
+                examples.append((text, "other"))
+    return examples
+
+
+def balance(examples: List[Tuple[str, str]], max_ratio: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """Cap the dominant "other" class at max_ratio times the largest intent class."""
+    counts = Counter(label for _, label in examples)
+    cap = max_ratio * max([counts[l] for l in LABELS if l != "other"] + [1])
+    others = [e for e in examples if e[1] == "other"]
+    rng.shuffle(others)
+    return [e for e in examples if e[1] != "other"] + others[:cap]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jsonl", help="read case_memory documents from this export instead of MongoDB")
+    parser.add_argument("--out", default="intent_model.npz")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--min-df", type=int, default=1)
+    parser.add_argument("--max-other-ratio", type=int, default=3)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    conversations = iter_conversations_jsonl(args.jsonl) if args.jsonl else iter_conversations_mongo()
+    mined = label_conversations(conversations)
+    examples = balance(mined + SEED_EXAMPLES, args.max_other_ratio, rng)
+    rng.shuffle(examples)
+    print(f"mined {len(mined)} labelled messages; training on {len(examples)}: {dict(Counter(l for _, l in examples))}")
+
+    split = int(len(examples) * (1 - args.holdout)) if len(examples) > 50 else len(examples)
+    train, test = examples[:split], examples[split:]
+    model = IntentModel.train([t for t, _ in train], [l for _, l in train], min_df=args.min_df, epochs=args.epochs, seed=args.seed)
+    if test:
+        print(f"holdout accuracy: {model.accuracy([t for t, _ in test], [l for _, l in test]):.3f} on {len(test)} messages")
+
+    probe = [t for t, _ in examples[:200]] or ["hello"]
+    started = time.perf_counter()
+    for text in probe:
+        model.predict(text)
+    print(f"inference: {(time.perf_counter() - started) / len(probe) * 1e6:.1f} us/message")
+
+    model.save(args.out)
+    print(f"saved {args.out} ({len(model.vocab)} features, labels {list(model.labels)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
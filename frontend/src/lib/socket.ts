@@ -22,7 +22,12 @@ if (typeof window !== 'undefined') (window as any).socket = socket
 
 // Verbose client-side logging for diagnostics in production
 socket.on('connect', () => console.log('🔗 socket connected:', socket.id))
-socket.on('disconnect', (reason) => console.log('❌ socket disconnected:', reason))
+socket.on('disconnect', (reason) => {
+  console.log('❌ socket disconnected:', reason)
+  // socket.io-client does not reconnect on its own after the server closed the
+  // connection (e.g. the idle reaper); a tab left open must not silently go dead
+  if (reason === 'io server disconnect') socket.connect()
+})
 socket.on('connect_error', (err) => console.log('⚠️ socket connect_error:', err?.message || err))
 socket.onAny((event, ...args) => {
   try {
@@ -3,11 +3,14 @@ import { api } from '../../lib/api'
 
 type FAQ = { id?: number, question: string, answer: string }
 
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000
+
 export default function FAQs() {
   const [items, setItems] = useState<FAQ[]>([])
   const [q, setQ] = useState('')
   const [a, setA] = useState('')
   const [busy, setBusy] = useState(false)
+  const [progress, setProgress] = useState('')
   const hasDraft = q.trim() !== '' || a.trim() !== ''
 
   const load = async () => {
@@ -22,6 +25,24 @@ export default function FAQs() {
     setQ(''); setA('')
   }
 
+  // Mining runs as a background job; poll it until it finishes or we give up waiting
+  const generate = async () => {
+    const { data } = await api.post('/api/faq/generate', {}, { headers: authHeader() })
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS
+    while (Date.now() < deadline) {
+      const { data: job } = await api.get(`/api/jobs/${data.job_id}`, { headers: authHeader() })
+      const p = job.progress || {}
+      if (p.total !== undefined) setProgress(`${p.done}/${p.total} tickets, ${p.created} new`)
+      if (job.status === 'succeeded') return
+      if (job.status === 'failed') {
+        setProgress(`Mining failed: ${job.error || 'unknown error'}`)
+        return
+      }
+      await new Promise(resolve => setTimeout(resolve, 2000))
+    }
+    setProgress('Still running in the background; check back later')
+  }
+
   const remove = async (id?: number) => {
     if (!id) return
     await api.delete(`/api/faq/${id}`, { headers: authHeader() })
@@ -61,12 +82,14 @@ export default function FAQs() {
         <button disabled={busy} className="bg-blue-600 text-white px-3 py-1 rounded shadow" onClick={async () => {
           try {
             setBusy(true)
-            await api.post('/api/faq/generate', {}, { headers: authHeader() })
+            await generate()
             await load()
           } finally {
             setBusy(false)
+            setProgress('')
           }
         }}>Generate New FAQs</button>
+        {busy && progress && <span className="ml-3 text-sm text-gray-600">{progress}</span>}
       </div>
       <ul className="space-y-2">
         {items.map(it => (
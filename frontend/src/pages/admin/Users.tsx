@@ -47,9 +47,18 @@ export default function Users() {
     }
 
     try {
-      // Load chat sessions
-      const { data } = await api.get('/api/admin/users-live', { headers: authHeader() })
-      setSessions(data.sessions || [])
+      // Load chat sessions; the endpoint is paged, and filtering below needs all of them
+      const all: Session[] = []
+      let cursor: string | null = null
+      do {
+        const { data }: { data: any } = await api.get('/api/admin/users-live', {
+          headers: authHeader(),
+          params: { limit: 1000, ...(cursor ? { cursor } : {}) },
+        })
+        all.push(...(data.sessions || []))
+        cursor = data.next_cursor || null
+      } while (cursor)
+      setSessions(all)
     } catch (error) {
       console.error('Failed to load chat sessions:', error)
     }